@@ -0,0 +1,79 @@
+import os
+import sys
+import time
+
+#make the tier modules importable when the script is run directly
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "Network & Business Logic Tier"))
+
+from ResponseCodec import ResponseCodec, FrameDecoder
+
+def makePayload(rows, firstID=1):
+    """
+    Builds a select-style response body with the given number of movie rows.
+
+    Args:
+        rows (int): The number of rows.
+        firstID (int, optional): The MovieID of the first row. Defaults to 1.
+
+    Returns:
+        bytes: The payload, one pipe-delimited row per line.
+    """
+    lines = []
+    for movieID in range(firstID, firstID + rows):
+        description = f"Movie number {movieID} follows a group of characters through a long and eventful story. " * 3
+        lines.append(f"Title {movieID}|Director {movieID % 50}|{1950 + movieID % 75}|{description}|{movieID % 10 + 1}|{movieID}")
+    return "\n".join(lines).encode()
+
+def measure(payloads, newCodec, reuseContext):
+    """
+    Encodes and decodes a sequence of payloads.
+
+    Args:
+        payloads (list): The response bodies (bytes).
+        newCodec (callable): Creates the `ResponseCodec` to encode with.
+        reuseContext (bool): True to send every payload on one connection, as the events of a subscription are sent, False to
+                             use a new codec and decoder per payload, as for every other command.
+
+    Returns:
+        tuple: (bytes on the wire per frame, encode CPU microseconds per frame, decode CPU microseconds per frame)
+    """
+    codec = newCodec()
+    start = time.process_time()
+    frames = [(codec if reuseContext else newCodec()).encode(payload) for payload in payloads]
+    encodeTime = time.process_time() - start
+
+    decoder = FrameDecoder()
+    start = time.process_time()
+    for frame in frames:
+        (decoder if reuseContext else FrameDecoder()).feed(frame)
+    decodeTime = time.process_time() - start
+
+    count = len(payloads)
+    return sum(len(frame) for frame in frames) / count, encodeTime / count * 1e6, decodeTime / count * 1e6
+
+def main():
+    """
+    Prints the wire size and CPU cost of raw frames, zlib with a fresh context per frame and zlib with a reused context.
+
+    The server answers one command per connection, so every select or search response is compressed from a fresh context
+    ("zlib-fresh"). Only the events of a "#subscribe" connection share a context ("zlib-subscribe"); its numbers do not
+    apply to any other command.
+    """
+    repeat = 200
+    modes = [
+        ("raw", lambda: ResponseCodec("identity"), True),
+        ("zlib-fresh", lambda: ResponseCodec("zlib", threshold=0), False),
+        ("zlib-subscribe", lambda: ResponseCodec("zlib", threshold=0), True),
+    ]
+    print(f"{'rows':>6} {'mode':<14} {'bytes':>10} {'ratio':>6} {'enc us':>9} {'dec us':>9}")
+    for rows in (1, 10, 100, 1000):
+        #every frame carries different movies, like consecutive events on one subscription
+        payloads = [makePayload(rows, index * rows + 1) for index in range(repeat)]
+        rawSize = sum(len(payload) for payload in payloads) / repeat
+        for name, newCodec, reuseContext in modes:
+            size, encodeTime, decodeTime = measure(payloads, newCodec, reuseContext)
+            print(f"{rows:>6} {name:<14} {size:>10.0f} {rawSize / size:>6.2f} {encodeTime:>9.1f} {decodeTime:>9.1f}")
+
+if __name__ == "__main__":
+    main()
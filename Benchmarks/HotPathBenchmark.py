@@ -0,0 +1,301 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import socket
+import statistics
+import sys
+import tempfile
+import timeit
+from datetime import datetime, timedelta
+
+#make the tier modules importable when the script is run directly
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "Network & Business Logic Tier"))
+sys.path.insert(0, os.path.join(ROOT, "Data Tier"))
+
+import MovieDAO
+import ProcessSQL as ProcessSQLModule
+from FileHandler import FileHandler
+from Movie import Movie
+from ProcessSQL import ProcessSQL
+from Query import Query
+from SaveLogsService import SaveLogsService
+from SQLDeleteService import SQLDeleteService
+from SQLInsertService import SQLInsertService
+from SQLSelectService import SQLSelectService
+from SQLUpdateService import SQLUpdateService
+
+DESCRIPTION = ("Paranormal investigators help a family terrorized by a dark presence in their farmhouse, "
+               "and the case turns out to be the most terrifying of their careers.")
+MOVIE = Movie("The Conjuring", "James Wan", 2013, DESCRIPTION, 1, 42)
+UPDATE = f"#update|The Conjuring|James Wan|2013|{DESCRIPTION}|1|42"
+INSERT = f"#insert|The Conjuring|James Wan|2013|{DESCRIPTION}|1|0"
+
+def stubGetMovieById(movieID, timeout=None, fromPrimary=False):
+    return MOVIE
+
+def stubWriteMovie(movie, timeout=None):
+    return movie
+
+def stubDeleteMovie(movieID, timeout=None):
+    return MOVIE
+
+class StubSaveLogsService:
+    """
+    Replaces the log write in the dispatch benchmarks, which is measured on its own by the SaveLogsService cases.
+    """
+    def __init__(self, command, gui_server=None):
+        self.command = command
+
+    def doWork(self):
+        return self.command
+
+@contextlib.contextmanager
+def stubs():
+    """
+    Swaps the `MovieDAO` functions used by the services for stubs answering from memory, and the query log write of
+    `ProcessSQL` for a no-op, so the benchmarks time the Python code of the hot path rather than a database or the disk.
+    """
+    saved = {name: getattr(MovieDAO, name) for name in ("getMovieById", "updateAMovie", "insertAMovie", "deleteAMovie")}
+    savedLog = ProcessSQLModule.SaveLogsService
+    MovieDAO.getMovieById = stubGetMovieById
+    MovieDAO.updateAMovie = stubWriteMovie
+    MovieDAO.insertAMovie = stubWriteMovie
+    MovieDAO.deleteAMovie = stubDeleteMovie
+    ProcessSQLModule.SaveLogsService = StubSaveLogsService
+    try:
+        yield
+    finally:
+        for name, function in saved.items():
+            setattr(MovieDAO, name, function)
+        ProcessSQLModule.SaveLogsService = savedLog
+
+def makeQueries(size):
+    """
+    Builds a query log with the mix of a busy server: mostly selects, some updates and inserts with long descriptions, a few
+    deletes.
+
+    Args:
+        size (int): The number of records.
+
+    Returns:
+        list: The `Query` objects, oldest first.
+    """
+    queries = []
+    start = datetime(2025, 1, 1)
+    for index in range(size):
+        #one record per second
+        timestamp = (start + timedelta(seconds=index)).strftime("%Y%m%d_%H%M%S")
+        kind = index % 20
+        if kind < 16:
+            details = f"select|{index % 5000 + 1}"
+        elif kind < 18:
+            details = UPDATE[1:].replace("|42", f"|{index % 5000 + 1}")
+        elif kind < 19:
+            details = INSERT[1:]
+        else:
+            details = f"delete|{index % 5000 + 1}"
+        queries.append(Query(timestamp, details))
+    return queries
+
+def dispatch(command, answered=True):
+    """
+    Builds a benchmark of `ProcessSQL` for one command: receiving it from a socket, choosing and running the service, and
+    sending the response, with the stubbed DAO and log.
+
+    Args:
+        command (str): The command sent by the client.
+        answered (bool, optional): False for commands the server does not answer, such as "#delete". Defaults to True.
+
+    Returns:
+        callable: One request.
+    """
+    server, client = socket.socketpair()
+    request = command.encode()
+    reply = bytearray(4096)
+    def run():
+        client.sendall(request)
+        ProcessSQL(server).process()
+        if answered:
+            client.recv_into(reply)
+    run.sockets = (server, client)
+    return run
+
+def cases(sizes):
+    """
+    Yields the benchmarks, setting up the files each one needs first. Run in a scratch directory: SaveLogsService writes
+    LogsOfQueries.txt in the current directory.
+
+    Args:
+        sizes (list): The query log sizes (number of records) to benchmark the log functions with.
+
+    Yields:
+        tuple: (name, function running one operation)
+    """
+    query = Query("20250508_182557", UPDATE[1:])
+    yield "Query.writeAsRecord", query.writeAsRecord
+    yield "Movie.writeAsRecord", MOVIE.writeAsRecord
+    yield "SQLSelectService.doWork", lambda: SQLSelectService("#select|42").doWork()
+    yield "SQLSelectService.doWork[notmodified]", lambda: SQLSelectService(f"#select|42|v={MOVIE.version()}").doWork()
+    yield "SQLUpdateService.doWork", lambda: SQLUpdateService(UPDATE).doWork()
+    yield "SQLInsertService.doWork", lambda: SQLInsertService(INSERT).doWork()
+    yield "SQLDeleteService.doWork", lambda: SQLDeleteService("#delete|42").doWork()
+    for name, command in (("select", "#select|42"), ("update", UPDATE), ("delete", "#delete|42")):
+        run = dispatch(command, name != "delete")
+        yield f"ProcessSQL.process[{name}]", run
+        for sock in run.sockets:
+            sock.close()
+    for size in sizes:
+        fileName = f"queries-{size}.txt"
+        queries = makeQueries(size)
+        FileHandler.save(queries, fileName)
+        yield f"FileHandler.getData[{size}]", lambda fileName=fileName: FileHandler.getData(fileName)
+        yield f"FileHandler.save[{size}]", lambda fileName=fileName, queries=queries: FileHandler.save(queries, fileName)
+        #each run adds one record, which does not matter against the size of the log
+        FileHandler.save(queries, "LogsOfQueries.txt")
+        yield f"SaveLogsService.doWork[{size}]", lambda: SaveLogsService("#select|42").doWork()
+
+def measure(function, repeat=5):
+    """
+    Times one operation.
+
+    The number of calls per round is picked so a round takes at least 0.2 s, and the median and best round are kept.
+
+    Args:
+        function (callable): The operation.
+        repeat (int, optional): The number of rounds. Defaults to 5.
+
+    Returns:
+        dict: {"median": seconds per call, "min": seconds per call, "number": calls per round}
+    """
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    times = [elapsed / number for elapsed in timer.repeat(repeat, number)]
+    return {"median": statistics.median(times), "min": min(times), "number": number}
+
+def run(sizes, repeat=5, only=None):
+    """
+    Runs the benchmarks in a scratch directory and prints each result as it comes.
+
+    Args:
+        sizes (list): The query log sizes.
+        repeat (int, optional): The number of rounds per benchmark. Defaults to 5.
+        only (str, optional): Run only the benchmarks whose name contains this text. Defaults to None (all).
+
+    Returns:
+        dict: The results, as saved in a baseline file.
+    """
+    results = {}
+    workDir = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch, stubs(), open(os.devnull, 'w') as devnull:
+        os.chdir(scratch)
+        try:
+            for name, function in cases(sizes):
+                if only and only not in name:
+                    continue
+                #the services and FileHandler print progress, which would flood the report
+                with contextlib.redirect_stdout(devnull):
+                    result = measure(function, repeat)
+                results[name] = result
+                print(f"{name:<42} {formatTime(result['median']):>12} (best {formatTime(result['min'])})")
+        finally:
+            os.chdir(workDir)
+    return {"created": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+            "machine": platform.platform(), "sizes": sizes, "results": results}
+
+def formatTime(seconds):
+    """
+    Formats a duration with a unit that suits it.
+
+    Args:
+        seconds (float): The duration.
+
+    Returns:
+        str: e.g. "1.25 us" or "310.4 ms".
+    """
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.2f} us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.1f} ms"
+    return f"{seconds:.2f} s"
+
+def compare(baseline, current, threshold=0.1):
+    """
+    Prints the change of every benchmark between two runs and flags the ones that got slower by more than the threshold.
+
+    The best rounds are compared, since they vary less between runs than the medians on a busy machine. A benchmark missing
+    from either run is listed but not flagged.
+
+    Args:
+        baseline (dict): The earlier run, as returned by `run`.
+        current (dict): The later run.
+        threshold (float, optional): The slowdown, as a fraction, above which a benchmark is a regression. Defaults to 0.1.
+
+    Returns:
+        list: The names of the regressed benchmarks.
+    """
+    regressions = []
+    print(f"{'benchmark':<42} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name in dict.fromkeys(list(baseline["results"]) + list(current["results"])):
+        before = baseline["results"].get(name)
+        after = current["results"].get(name)
+        if not before or not after:
+            print(f"{name:<42} {formatTime(before['min']) if before else '-':>12} {formatTime(after['min']) if after else '-':>12}")
+            continue
+        change = after["min"] / before["min"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"{name:<42} {formatTime(before['min']):>12} {formatTime(after['min']):>12} {change:>+8.1%}{flag}")
+    return regressions
+
+def main(argv=None):
+    """
+    Command line entry point:
+    "python HotPathBenchmark.py run --save baseline.json" times the hot path and stores a baseline;
+    "python HotPathBenchmark.py compare baseline.json" runs again (or reads a second file) and exits with status 1 if any
+    benchmark regressed beyond the threshold.
+
+    Args:
+        argv (list, optional): The command line arguments. Defaults to None (use sys.argv).
+    """
+    parser = argparse.ArgumentParser(description="Micro-benchmarks of the per-request code paths.")
+    parser.add_argument("action", choices=["run", "compare"])
+    parser.add_argument("files", nargs="*", help="compare: the baseline file, and optionally a second result file")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000],
+                        help="query log sizes in records (default: 1000 100000; add 1000000 for a full run)")
+    parser.add_argument("--repeat", type=int, default=5, help="timing rounds per benchmark (default: 5)")
+    parser.add_argument("--only", help="run only the benchmarks whose name contains this text")
+    parser.add_argument("--save", help="write the results of this run to a JSON file")
+    parser.add_argument("--threshold", type=float, default=0.1, help="slowdown flagged as a regression (default: 0.1, 10%%)")
+    args = parser.parse_args(argv)
+
+    if args.action == "compare" and not args.files:
+        parser.error("compare needs a baseline file")
+    baseline = None
+    if args.action == "compare":
+        with open(args.files[0]) as file:
+            baseline = json.load(file)
+    if args.action == "compare" and len(args.files) > 1:
+        with open(args.files[1]) as file:
+            current = json.load(file)
+    else:
+        #a comparison reruns the sizes of the baseline, so the same benchmarks are compared
+        sizes = baseline["sizes"] if baseline else args.sizes
+        current = run(sizes, args.repeat, args.only)
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(current, file, indent=2)
+    if baseline:
+        print()
+        regressions = compare(baseline, current, args.threshold)
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}.")
+        sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
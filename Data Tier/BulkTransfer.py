@@ -0,0 +1,171 @@
+import argparse
+import csv
+import json
+import time
+import MovieDAO
+from Movie import Movie
+
+class BulkTransfer:
+    """
+    Imports and exports the Movies catalog as CSV or JSON Lines files.
+
+    This class provides static methods that stream movies between a file and the database through `MovieDAO`, one chunk at a
+    time, so memory use does not depend on the size of the file or of the table. Both directions report their throughput.
+
+    CSV files have a header row with the columns Title, Director, YearReleased, Description, GenreID and (on export) MovieID.
+    JSON Lines files hold one object per line with the same keys.
+    """
+    FIELDS = ["MovieID", "Title", "Director", "YearReleased", "Description", "GenreID"]
+
+    @staticmethod
+    def detectFormat(fileName):
+        """
+        Works out the file format from the file extension.
+
+        Args:
+            fileName (str): The file name.
+
+        Returns:
+            str: "csv" or "jsonl".
+
+        Raises:
+            ValueError: If the extension is not .csv, .jsonl or .ndjson.
+        """
+        lowerName = fileName.lower()
+        if lowerName.endswith(".csv"):
+            return "csv"
+        if lowerName.endswith(".jsonl") or lowerName.endswith(".ndjson"):
+            return "jsonl"
+        raise ValueError(f"Cannot tell the format of {fileName}, use .csv or .jsonl")
+
+    @staticmethod
+    def readMovies(file, fileFormat):
+        """
+        Yields the movies stored in an open file, one line at a time.
+
+        Args:
+            file (file): The open text file.
+            fileFormat (str): "csv" or "jsonl".
+
+        Yields:
+            Movie: The next movie of the file.
+        """
+        if fileFormat == "csv":
+            records = csv.DictReader(file)
+        else:
+            records = (json.loads(line) for line in file if line.strip())
+        for record in records:
+            yield Movie(record["Title"], record.get("Director"), record.get("YearReleased"),
+                        record["Description"], record["GenreID"], record.get("MovieID"))
+
+    @staticmethod
+    def writeMovies(file, movies, fileFormat):
+        """
+        Writes movies to an open file, one line per movie.
+
+        Args:
+            file (file): The open text file.
+            movies (iterable): The `Movie` objects to write.
+            fileFormat (str): "csv" or "jsonl".
+
+        Returns:
+            int: The number of movies written.
+        """
+        count = 0
+        writer = None
+        if fileFormat == "csv":
+            writer = csv.writer(file)
+            writer.writerow(BulkTransfer.FIELDS)
+        for movie in movies:
+            values = [movie.movieID, movie.title, movie.director, movie.yearReleased, movie.description, movie.genreID]
+            if writer:
+                writer.writerow(values)
+            else:
+                file.write(json.dumps(dict(zip(BulkTransfer.FIELDS, values))) + "\n")
+            count += 1
+        return count
+
+    @staticmethod
+    def importMovies(fileName, fileFormat=None, chunkSize=1000):
+        """
+        Loads all movies of a file into the database.
+
+        Each chunk of `chunkSize` rows is inserted with one `executemany` call and committed on its own.
+
+        Args:
+            fileName (str): The CSV or JSON Lines file to read.
+            fileFormat (str, optional): "csv" or "jsonl". Defaults to None (use the file extension).
+            chunkSize (int, optional): The number of rows per chunk. Defaults to 1000.
+
+        Returns:
+            tuple: (rows imported, seconds taken)
+        """
+        fileFormat = fileFormat if fileFormat else BulkTransfer.detectFormat(fileName)
+        start = time.perf_counter()
+        with open(fileName, 'r', newline='', encoding='utf-8') as file:
+            count = MovieDAO.insertMovies(BulkTransfer.readMovies(file, fileFormat), chunkSize)
+        elapsed = time.perf_counter() - start
+        print(f"Imported {count} movies in {elapsed:.2f} s ({BulkTransfer.rate(count, elapsed):.0f} rows/sec).")
+        return count, elapsed
+
+    @staticmethod
+    def exportMovies(fileName, fileFormat=None, chunkSize=1000):
+        """
+        Writes all movies of the database to a file.
+
+        Rows are fetched `chunkSize` at a time and written as they arrive.
+
+        Args:
+            fileName (str): The CSV or JSON Lines file to write.
+            fileFormat (str, optional): "csv" or "jsonl". Defaults to None (use the file extension).
+            chunkSize (int, optional): The number of rows fetched at a time. Defaults to 1000.
+
+        Returns:
+            tuple: (rows exported, seconds taken)
+        """
+        fileFormat = fileFormat if fileFormat else BulkTransfer.detectFormat(fileName)
+        start = time.perf_counter()
+        with open(fileName, 'w', newline='', encoding='utf-8') as file:
+            count = BulkTransfer.writeMovies(file, MovieDAO.iterMovies(chunkSize), fileFormat)
+        elapsed = time.perf_counter() - start
+        print(f"Exported {count} movies in {elapsed:.2f} s ({BulkTransfer.rate(count, elapsed):.0f} rows/sec).")
+        return count, elapsed
+
+    @staticmethod
+    def rate(count, elapsed):
+        """
+        Computes a throughput.
+
+        Args:
+            count (int): The number of rows.
+            elapsed (float): The seconds taken.
+
+        Returns:
+            float: Rows per second (0 when no time was measured).
+        """
+        return count / elapsed if elapsed > 0 else 0.0
+
+def main(argv=None):
+    """
+    Command line entry point, e.g. "python BulkTransfer.py export movies.csv --backend sqlite --database MovieData.db".
+
+    Args:
+        argv (list, optional): The command line arguments. Defaults to None (use sys.argv).
+    """
+    parser = argparse.ArgumentParser(description="Bulk import or export of the Movies catalog.")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("file", help="a .csv or .jsonl file")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="file format (default: from the extension)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="rows per chunk (default: 1000)")
+    parser.add_argument("--backend", choices=["sqlserver", "sqlite"], default="sqlserver", help="database backend (default: sqlserver)")
+    parser.add_argument("--database", help="pyodbc connection string, or SQLite file path")
+    args = parser.parse_args(argv)
+
+    MovieDAO.configure(args.backend, args.database)
+    if args.action == "import":
+        BulkTransfer.importMovies(args.file, args.format, args.chunk_size)
+    else:
+        BulkTransfer.exportMovies(args.file, args.format, args.chunk_size)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+import threading
+import time
+
+class Endpoint:
+    """
+    Represents one database (the primary or a replica) and its pool of idle connections.
+
+    Attributes:
+        database (str): The connection string or SQLite path of the database.
+        isPrimary (bool): True for the primary, False for a replica.
+        idle (list): Open connections that are not in use, most recently used last.
+        unhealthyUntil (float): The `time.monotonic()` value before which the endpoint is skipped. 0 when healthy.
+        failures (int): The number of consecutive failures.
+    """
+    def __init__(self, database, isPrimary):
+        """
+        Initializes the Endpoint object.
+
+        Args:
+            database (str): The connection string or SQLite path of the database.
+            isPrimary (bool): True for the primary, False for a replica.
+        """
+        self.database = database
+        self.isPrimary = isPrimary
+        self.idle = []
+        self.unhealthyUntil = 0.0
+        self.failures = 0
+
+    def isHealthy(self, now):
+        """
+        Checks whether the endpoint may be used.
+
+        Args:
+            now (float): The current `time.monotonic()` value.
+
+        Returns:
+            bool: True if the endpoint is healthy or its back-off period is over (it is then probed again).
+        """
+        return now >= self.unhealthyUntil
+
+class ConnectionRouter:
+    """
+    Routes database connections: writes go to the primary and reads are spread round-robin over the replicas.
+
+    Each endpoint keeps up to `poolSize` idle connections so requests do not pay for a new connection every time. A replica that
+    fails to connect or to run a query is marked unhealthy and skipped for `retryAfter` seconds (doubling with each further
+    failure, up to `maxRetryAfter`), after which it is probed again. When no replica is healthy, reads go to the primary.
+
+    Reads made by a session shortly after it wrote are sent to the primary for `pinSeconds`, so a client always sees its own
+    changes even if the replicas lag behind. The session is set per thread with `setSession`.
+
+    Attributes:
+        primary (Endpoint): The endpoint that receives all writes.
+        replicas (list): The replica endpoints.
+        poolSize (int): The maximum number of idle connections kept per endpoint.
+        pinSeconds (float): How long reads of a session stay on the primary after it wrote. 0 disables pinning.
+        retryAfter (float): The initial back-off in seconds for an unhealthy replica.
+        maxRetryAfter (float): The longest back-off in seconds.
+    """
+    def __init__(self, connect, primary, replicas=(), poolSize=5, pinSeconds=2.0, retryAfter=5.0, maxRetryAfter=60.0):
+        """
+        Initializes the ConnectionRouter object.
+
+        Args:
+            connect (callable): Opens a new connection given a database (connection string or SQLite path).
+            primary (str): The database that receives writes.
+            replicas (iterable, optional): The databases that serve reads. Defaults to none (everything goes to the primary).
+            poolSize (int, optional): The maximum number of idle connections kept per endpoint. Defaults to 5.
+            pinSeconds (float, optional): How long reads stay on the primary after a session writes. Defaults to 2.0.
+            retryAfter (float, optional): The initial back-off for an unhealthy replica. Defaults to 5.0.
+            maxRetryAfter (float, optional): The longest back-off. Defaults to 60.0.
+        """
+        self.connect = connect
+        self.primary = Endpoint(primary, True)
+        self.replicas = [Endpoint(replica, False) for replica in replicas]
+        self.poolSize = poolSize
+        self.pinSeconds = pinSeconds
+        self.retryAfter = retryAfter
+        self.maxRetryAfter = maxRetryAfter
+        self.nextReplica = 0
+        self.inUse = {}         # id(connection) -> (endpoint, forWrite)
+        self.lastWrite = {}     # session -> time of its last write
+        self.session = threading.local()
+        self.lock = threading.Lock()
+
+    def setSession(self, session):
+        """
+        Sets the session of the calling thread, e.g. the client's address for the request being served.
+
+        Args:
+            session (str): The session key, or None for no session (reads are never pinned).
+        """
+        self.session.key = session
+
+    def acquire(self, forWrite, preferPrimary=False):
+        """
+        Returns a connection to the primary (for writes) or to the next healthy replica (for reads).
+
+        Replicas that cannot be connected to are marked unhealthy and the next one is tried, then the primary.
+
+        Args:
+            forWrite (bool): True if the connection will be used to change data.
+            preferPrimary (bool, optional): True to read from the primary, e.g. when the read must not lag behind the last
+                                            commit. Unlike a write, such a read does not pin the session. Defaults to False.
+
+        Returns:
+            Connection: An open connection. Give it back with `release`.
+
+        Raises:
+            Exception: Whatever the connect function raises if the primary cannot be reached either.
+        """
+        for endpoint in self.candidates(forWrite or preferPrimary):
+            try:
+                conn = self.take(endpoint)
+            except Exception as e:
+                if endpoint.isPrimary:
+                    raise
+                print(f"Replica {endpoint.database} is unavailable: {e}")
+                self.markFailed(endpoint)
+                continue
+            #only a write pins the session when released, not a read that preferred the primary
+            with self.lock:
+                self.inUse[id(conn)] = (endpoint, forWrite)
+            return conn
+
+    def release(self, conn, broken=False):
+        """
+        Gives a connection back.
+
+        Healthy connections return to their endpoint's pool (or are closed if the pool is full). A broken connection is closed
+        and, for a replica, the replica is marked unhealthy. Releasing a successful write connection pins the session's reads
+        to the primary for `pinSeconds`.
+
+        Args:
+            conn (Connection): The connection from `acquire`.
+            broken (bool, optional): True if a database error occurred on the connection. Defaults to False.
+        """
+        with self.lock:
+            endpoint, forWrite = self.inUse.pop(id(conn), (None, False))
+            if endpoint and not broken and len(endpoint.idle) < self.poolSize:
+                endpoint.idle.append(conn)
+                conn = None
+            if endpoint and not broken:
+                endpoint.failures = 0
+                endpoint.unhealthyUntil = 0.0
+            session = getattr(self.session, "key", None)
+            if forWrite and not broken and session is not None and self.pinSeconds > 0:
+                now = time.monotonic()
+                self.lastWrite[session] = now
+                #forget sessions whose pin has run out so the map does not grow with every client
+                if len(self.lastWrite) > 1024:
+                    self.lastWrite = {key: at for key, at in self.lastWrite.items() if now - at < self.pinSeconds}
+        if conn is not None:
+            conn.close()
+        if broken and endpoint and not endpoint.isPrimary:
+            self.markFailed(endpoint)
+
+    def markFailed(self, endpoint):
+        """
+        Marks a replica unhealthy and drops its idle connections.
+
+        Args:
+            endpoint (Endpoint): The replica that failed.
+        """
+        with self.lock:
+            endpoint.failures += 1
+            backOff = min(self.maxRetryAfter, self.retryAfter * 2 ** (endpoint.failures - 1))
+            endpoint.unhealthyUntil = time.monotonic() + backOff
+            idle, endpoint.idle = endpoint.idle, []
+        for conn in idle:
+            conn.close()
+
+    def candidates(self, forWrite):
+        """
+        Lists the endpoints to try, in order, for a new connection.
+
+        Args:
+            forWrite (bool): True if the connection will be used to change data.
+
+        Returns:
+            list: The endpoints to try; the primary is always last.
+        """
+        if forWrite or not self.replicas or self.isPinned():
+            return [self.primary]
+        now = time.monotonic()
+        healthy = [replica for replica in self.replicas if replica.isHealthy(now)]
+        if not healthy:
+            return [self.primary]
+        #rotate over the healthy replicas only, so the load of a failed one is shared evenly
+        with self.lock:
+            start = self.nextReplica % len(healthy)
+            self.nextReplica += 1
+        return healthy[start:] + healthy[:start] + [self.primary]
+
+    def isPinned(self):
+        """
+        Checks whether the calling thread's session wrote within the last `pinSeconds`.
+
+        Returns:
+            bool: True if the session's reads must go to the primary.
+        """
+        session = getattr(self.session, "key", None)
+        if session is None or self.pinSeconds <= 0:
+            return False
+        now = time.monotonic()
+        with self.lock:
+            lastWrite = self.lastWrite.get(session)
+            if lastWrite is not None and now - lastWrite >= self.pinSeconds:
+                del self.lastWrite[session]
+                lastWrite = None
+        return lastWrite is not None
+
+    def take(self, endpoint):
+        """
+        Takes an idle connection from an endpoint's pool, or opens a new one.
+
+        Args:
+            endpoint (Endpoint): The endpoint to connect to.
+
+        Returns:
+            Connection: An open connection.
+        """
+        with self.lock:
+            if endpoint.idle:
+                return endpoint.idle.pop()
+        return self.connect(endpoint.database)
+
+    def close(self):
+        """
+        Closes every idle connection of every endpoint.
+        """
+        with self.lock:
+            idle = []
+            for endpoint in [self.primary] + self.replicas:
+                idle.extend(endpoint.idle)
+                endpoint.idle = []
+        for conn in idle:
+            conn.close()
@@ -1,4 +1,5 @@
 import os
+import threading
 from Query import Query
 
 class FileHandler:
@@ -7,8 +8,12 @@ class FileHandler:
 
     This class provides static methods for loading query data from a file and saving query data to a file.
     It interacts with the `Query` class to represent individual queries.
+
+    The log is read, changed and rewritten by several worker threads. `lock` serializes these steps; callers that read the log
+    and then save it hold the lock across both, so no record written in between is lost.
     """
     queries = []
+    lock = threading.RLock()
 
     @staticmethod
     def getData(fileName):
@@ -26,45 +31,47 @@ class FileHandler:
                   does not exist, an I/O error occurs, or the file format is invalid.
                   Returns None if file is empty.
         """
-        FileHandler.queries = []
+        #the whole read is locked, since FileHandler.queries is shared by all callers
+        with FileHandler.lock:
+            FileHandler.queries = []
 
-        # Try to open the file
-        try:
-            with open(fileName, 'r') as file:
-                lines = file.readlines()
-        except FileNotFoundError:
-            print("File Not Found.")
-            return []
-        except IOError:
-            print("Unknown IO error occurred.")
-            return []
-        except Exception as e:
-            print("An unknown error occurred:", e)
-            return []
+            # Try to open the file
+            try:
+                with open(fileName, 'r') as file:
+                    lines = file.readlines()
+            except FileNotFoundError:
+                print("File Not Found.")
+                return []
+            except IOError:
+                print("Unknown IO error occurred.")
+                return []
+            except Exception as e:
+                print("An unknown error occurred:", e)
+                return []
 
-        # Try to read the size from the first line
-        try:
-            size = int(lines[0].strip())
-            FileHandler.queries = [None] * size
-        except (ValueError, IndexError):
-            print("File Format Error")
-            return []
+            # Try to read the size from the first line
+            try:
+                size = int(lines[0].strip())
+                FileHandler.queries = [None] * size
+            except (ValueError, IndexError):
+                print("File Format Error")
+                return []
 
-        # Process each line
-        index = 0
-        for line in lines[1:]:
-            parts = line.strip().split("#", 1)
-            if len(parts) == 2 and index < size:
-                timestamp = parts[0].strip()
-                queryDetails = parts[1].strip()
-                FileHandler.queries[index] = Query(timestamp, queryDetails)
-                index += 1
+            # Process each line
+            index = 0
+            for line in lines[1:]:
+                parts = line.strip().split("#", 1)
+                if len(parts) == 2 and index < size:
+                    timestamp = parts[0].strip()
+                    queryDetails = parts[1].strip()
+                    FileHandler.queries[index] = Query(timestamp, queryDetails)
+                    index += 1
 
-        print("Log Added.")
-        return FileHandler.queries
+            print("Log Added.")
+            return FileHandler.queries
 
     @staticmethod
-    def save(queriesToSave):
+    def save(queriesToSave, fileName="LogsOfQueries.txt"):
         """
         Saves query data to a file.
 
@@ -73,11 +80,13 @@ class FileHandler:
 
         Args:
             queriesToSave (list): A list of `Query` objects to save.
+            fileName (str, optional): The name of the file to write. Defaults to "LogsOfQueries.txt".
         """
         try:
-            with open("LogsOfQueries.txt", 'w') as file:
-                file.write(f"{len(queriesToSave)}\n")
-                for query in queriesToSave:
-                    file.write(f"{query.writeAsRecord()}\n")
+            with FileHandler.lock:
+                with open(fileName, 'w') as file:
+                    file.write(f"{len(queriesToSave)}\n")
+                    for query in queriesToSave:
+                        file.write(f"{query.writeAsRecord()}\n")
         except IOError as e:
             print("Error saving file:", e)
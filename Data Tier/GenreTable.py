@@ -0,0 +1,63 @@
+import hashlib
+from types import MappingProxyType
+
+class GenreTable:
+    """
+    An immutable snapshot of the Genres table.
+
+    The server loads the table once and shares the snapshot between all workers without locking; if the genres have to be
+    reloaded, a new snapshot replaces the old one. The version is a fingerprint of the content, so a client that cached a
+    snapshot can ask whether it is still current (see `GenreService`) and both sides agree on it without storing numbers.
+
+    Attributes:
+        genres (tuple): (GenreID, GenreName) pairs as strings, ordered by GenreID.
+        names (mappingproxy): A read-only GenreID -> GenreName lookup.
+        version (str): 16 hexadecimal characters that change whenever any genre changes.
+    """
+    def __init__(self, genres):
+        """
+        Initializes the GenreTable object.
+
+        Args:
+            genres (iterable): (GenreID, GenreName) pairs, e.g. the rows of `MovieDAO.getGenres`.
+        """
+        self.genres = tuple(sorted(((str(genreID), str(name)) for genreID, name in genres), key=lambda genre: int(genre[0])))
+        self.names = MappingProxyType(dict(self.genres))
+        self.version = hashlib.blake2b(self.writeAsRecord().encode(), digest_size=8).hexdigest()
+
+    def name(self, genreID):
+        """
+        Looks up the name of a genre.
+
+        Args:
+            genreID (int or str): The GenreID.
+
+        Returns:
+            str: The genre name, or an empty string if the GenreID is unknown.
+        """
+        return self.names.get(str(genreID), "")
+
+    def writeAsRecord(self):
+        """
+        Formats the genres as the body of a "#genres" response.
+
+        Returns:
+            str: One "GenreID|GenreName" line per genre.
+        """
+        return "".join(f"{genreID}|{name}\n" for genreID, name in self.genres)
+
+    @staticmethod
+    def fromRecord(text):
+        """
+        Rebuilds a snapshot from the text of `writeAsRecord`.
+
+        Args:
+            text (str): The "GenreID|GenreName" lines.
+
+        Returns:
+            GenreTable: The snapshot, with the same version as the one it was written from.
+        """
+        return GenreTable(tuple(line.split("|", 1)) for line in text.splitlines() if "|" in line)
+
+    def __len__(self):
+        return len(self.genres)
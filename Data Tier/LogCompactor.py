@@ -0,0 +1,265 @@
+import argparse
+import gzip
+import json
+import os
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from FileHandler import FileHandler
+
+class LogCompactor:
+    """
+    Keeps the query log small by moving aged records into rollups and compressed archives.
+
+    Records older than `keepRawHours` are taken out of the log file. Each one is counted in a per-minute and a per-hour bucket of
+    the rollup file (by command verb and by MovieID), and the raw record is appended to a gzip archive per day in `archiveDir`.
+    Recent records stay in the log, where the server's cache warm-up reads them. Minute buckets are dropped after
+    `minuteRetentionDays`; hour buckets are kept, so a report over months of history reads a few kilobytes of rollups.
+
+    The rollup file remembers the timestamp of the last record compacted. Records up to it are never counted again, so if the
+    compactor stops between writing the rollups and rewriting the log, the next run only drops the leftovers from the log.
+
+    Attributes:
+        fileName (str): The query log.
+        archiveDir (str): The directory of the daily gzip archives.
+        rollupFile (str): The JSON file holding the rollups.
+        keepRawHours (float): How long records stay raw in the log.
+        minuteRetentionDays (float): How long minute buckets are kept.
+    """
+    TIMESTAMP = "%Y%m%d_%H%M%S"
+    MINUTE_KEY = 13     # "YYYYmmdd_HHMM"
+    HOUR_KEY = 11       # "YYYYmmdd_HH"
+
+    def __init__(self, fileName="LogsOfQueries.txt", archiveDir="LogArchive", rollupFile="LogRollups.json",
+                 keepRawHours=24.0, minuteRetentionDays=7.0):
+        """
+        Initializes the LogCompactor object.
+
+        Args:
+            fileName (str, optional): The query log. Defaults to "LogsOfQueries.txt".
+            archiveDir (str, optional): The directory of the gzip archives. Defaults to "LogArchive".
+            rollupFile (str, optional): The JSON file holding the rollups. Defaults to "LogRollups.json".
+            keepRawHours (float, optional): How long records stay raw in the log. Defaults to 24.0.
+            minuteRetentionDays (float, optional): How long minute buckets are kept. Defaults to 7.0.
+        """
+        self.fileName = fileName
+        self.archiveDir = archiveDir
+        self.rollupFile = rollupFile
+        self.keepRawHours = keepRawHours
+        self.minuteRetentionDays = minuteRetentionDays
+        self.stopped = threading.Event()
+        self.thread = None
+
+    @staticmethod
+    def movieOf(queryDetails):
+        """
+        Finds the MovieID a logged command is about.
+
+        Args:
+            queryDetails (str): The logged command without its '#', e.g. "select|3" or "update|...|3".
+
+        Returns:
+            str: The MovieID, or None for commands that do not name an existing movie (such as "insert").
+        """
+        parts = queryDetails.split("|")
+        if parts[0] in ("select", "delete") and len(parts) > 1:
+            movieID = parts[1].strip()
+        elif parts[0] == "update" and len(parts) > 6:
+            movieID = parts[6].strip()
+        else:
+            return None
+        return movieID if movieID.isdigit() else None
+
+    def loadRollups(self):
+        """
+        Reads the rollup file.
+
+        Returns:
+            dict: {"compactedThrough": timestamp or "", "minutes": {key: bucket}, "hours": {key: bucket}}, where each bucket is
+                  {"verbs": {verb: count}, "movies": {movieID: count}}.
+        """
+        try:
+            with open(self.rollupFile, 'r') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {"compactedThrough": "", "minutes": {}, "hours": {}}
+
+    def saveRollups(self, rollups):
+        """
+        Writes the rollup file, replacing the old one only once the new one is complete.
+
+        Args:
+            rollups (dict): The rollups, as returned by `loadRollups`.
+        """
+        temporary = self.rollupFile + ".tmp"
+        with open(temporary, 'w') as file:
+            json.dump(rollups, file, separators=(",", ":"), sort_keys=True)
+        os.replace(temporary, self.rollupFile)
+
+    @staticmethod
+    def count(bucket, query):
+        """
+        Adds a record to a rollup bucket.
+
+        Args:
+            bucket (dict): The bucket, {"verbs": {...}, "movies": {...}}.
+            query (Query): The record.
+        """
+        verb = query.queryDetails.split("|", 1)[0]
+        bucket["verbs"][verb] = bucket["verbs"].get(verb, 0) + 1
+        movieID = LogCompactor.movieOf(query.queryDetails)
+        if movieID:
+            bucket["movies"][movieID] = bucket["movies"].get(movieID, 0) + 1
+
+    def archive(self, queries):
+        """
+        Appends raw records to the gzip archive of their day, e.g. LogArchive/queries-20250508.txt.gz.
+
+        Each call adds a gzip member to the file; `gzip.open` reads all members as one stream.
+
+        Args:
+            queries (list): The `Query` objects to archive.
+        """
+        os.makedirs(self.archiveDir, exist_ok=True)
+        days = {}
+        for query in queries:
+            days.setdefault(query.timestamp[:8], []).append(query)
+        for day, records in days.items():
+            with gzip.open(os.path.join(self.archiveDir, f"queries-{day}.txt.gz"), 'at') as file:
+                file.writelines(f"{query.writeAsRecord()}\n" for query in records)
+
+    def compact(self, now=None):
+        """
+        Moves the records older than `keepRawHours` from the log into the rollups and the archives.
+
+        The log is only locked while it is read and while it is rewritten, so requests keep being logged during the compaction.
+
+        Args:
+            now (datetime, optional): The current time. Defaults to None (datetime.now()).
+
+        Returns:
+            int: The number of records compacted.
+        """
+        now = now if now else datetime.now()
+        cutoff = (now - timedelta(hours=self.keepRawHours)).strftime(LogCompactor.TIMESTAMP)
+        rollups = self.loadRollups()
+        compactedThrough = rollups["compactedThrough"]
+        queries = [query for query in FileHandler.getData(self.fileName) if query is not None]
+        aged = [query for query in queries if compactedThrough < query.timestamp < cutoff]
+
+        if aged:
+            #archive first: a failure before the rollups are saved can only archive a record twice, never lose it
+            self.archive(aged)
+            for query in aged:
+                for buckets, length in ((rollups["minutes"], LogCompactor.MINUTE_KEY), (rollups["hours"], LogCompactor.HOUR_KEY)):
+                    bucket = buckets.setdefault(query.timestamp[:length], {"verbs": {}, "movies": {}})
+                    LogCompactor.count(bucket, query)
+            compactedThrough = max(compactedThrough, max(query.timestamp for query in aged))
+            rollups["compactedThrough"] = compactedThrough
+        oldestMinute = (now - timedelta(days=self.minuteRetentionDays)).strftime(LogCompactor.TIMESTAMP)[:LogCompactor.MINUTE_KEY]
+        minutes = {key: bucket for key, bucket in rollups["minutes"].items() if key >= oldestMinute}
+        if aged or len(minutes) < len(rollups["minutes"]):
+            rollups["minutes"] = minutes
+            self.saveRollups(rollups)
+
+        if compactedThrough and any(query.timestamp <= compactedThrough for query in queries):
+            with FileHandler.lock:
+                #read again, the log may have grown since
+                queries = FileHandler.getData(self.fileName)
+                FileHandler.save([query for query in queries if query is not None and query.timestamp > compactedThrough],
+                                 self.fileName)
+        return len(aged)
+
+    def summarize(self, since="", until=None, granularity="hour"):
+        """
+        Counts the commands per verb and per MovieID over a time range, from the rollups and the raw records still in the log.
+
+        Rollup buckets are counted whole when their start lies in the range, so with hour buckets a range starting or ending
+        inside an hour includes the whole hour. Minute buckets are finer but only cover the last `minuteRetentionDays`.
+
+        Args:
+            since (str, optional): The start of the range as a timestamp or a prefix of one, e.g. "20250501". Defaults to "" (all).
+            until (str, optional): The exclusive end of the range, in the same form. Defaults to None (now).
+            granularity (str, optional): "hour" or "minute" rollups. Defaults to "hour".
+
+        Returns:
+            tuple: (verbs, movies), two `Counter` objects.
+        """
+        rollups = self.loadRollups()
+        verbs = Counter()
+        movies = Counter()
+        buckets, length = ((rollups["minutes"], LogCompactor.MINUTE_KEY) if granularity == "minute"
+                           else (rollups["hours"], LogCompactor.HOUR_KEY))
+        for key, bucket in buckets.items():
+            if key >= since[:length] and (until is None or key < until[:length]):
+                verbs.update(bucket["verbs"])
+                movies.update(bucket["movies"])
+        for query in FileHandler.getData(self.fileName):
+            if (query is not None and query.timestamp > rollups["compactedThrough"] and query.timestamp >= since
+                    and (until is None or query.timestamp < until)):
+                verbs[query.queryDetails.split("|", 1)[0]] += 1
+                movieID = LogCompactor.movieOf(query.queryDetails)
+                if movieID:
+                    movies[movieID] += 1
+        return verbs, movies
+
+    def start(self, interval=3600.0):
+        """
+        Compacts the log every `interval` seconds on a background thread until `stop` is called.
+
+        Args:
+            interval (float, optional): Seconds between compactions. Defaults to 3600.0.
+        """
+        def run():
+            while not self.stopped.wait(interval):
+                try:
+                    compacted = self.compact()
+                    if compacted:
+                        print(f"Log compaction: {compacted} records moved to rollups and archives")
+                except Exception as e:
+                    print("Log compaction failed:", e)
+        self.stopped.clear()
+        self.thread = threading.Thread(target=run, name="log-compactor", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stops the background compaction started by `start`.
+        """
+        self.stopped.set()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+def main(argv=None):
+    """
+    Command line entry point, e.g. "python LogCompactor.py compact --keep-raw-hours 24" or
+    "python LogCompactor.py report --since 20250501 --until 20250601".
+
+    Args:
+        argv (list, optional): The command line arguments. Defaults to None (use sys.argv).
+    """
+    parser = argparse.ArgumentParser(description="Compact the query log into rollups and archives, or report from them.")
+    parser.add_argument("action", choices=["compact", "report"])
+    parser.add_argument("--log-file", default="LogsOfQueries.txt", help="query log (default: LogsOfQueries.txt)")
+    parser.add_argument("--archive-dir", default="LogArchive", help="directory of the gzip archives (default: LogArchive)")
+    parser.add_argument("--rollup-file", default="LogRollups.json", help="rollup file (default: LogRollups.json)")
+    parser.add_argument("--keep-raw-hours", type=float, default=24.0, help="hours records stay raw in the log (default: 24)")
+    parser.add_argument("--since", default="", help="report start, a timestamp prefix such as 20250501")
+    parser.add_argument("--until", help="report end (exclusive), a timestamp prefix")
+    parser.add_argument("--granularity", choices=["hour", "minute"], default="hour", help="rollups used by the report (default: hour)")
+    parser.add_argument("--top", type=int, default=10, help="most requested movies listed by the report (default: 10)")
+    args = parser.parse_args(argv)
+
+    compactor = LogCompactor(args.log_file, args.archive_dir, args.rollup_file, args.keep_raw_hours)
+    if args.action == "compact":
+        print(f"Compacted {compactor.compact()} records.")
+    else:
+        verbs, movies = compactor.summarize(args.since, args.until, args.granularity)
+        for verb, count in verbs.most_common():
+            print(f"{verb}: {count}")
+        for movieID, count in movies.most_common(args.top):
+            print(f"movie {movieID}: {count}")
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import hashlib
+
 class Movie:
     """
     Represents a movie entity.
@@ -24,4 +26,27 @@ class Movie:
         self.yearReleased = yearReleased
         self.description = description
         self.genreID = genreID
-    
\ No newline at end of file
+
+    def writeAsRecord(self):
+        """
+        Formats the movie as a record string.
+
+        This method joins the movie attributes with the delimiter ('|'), in the order used by the server's responses
+        and by the client to rebuild the movie.
+
+        Returns:
+            str: The record in the format "title|director|yearReleased|description|genreID|movieID".
+        """
+        return f"{self.title}|{self.director}|{self.yearReleased}|{self.description}|{self.genreID}|{self.movieID}"
+
+    def version(self):
+        """
+        Computes a short fingerprint of the movie's record.
+
+        The client and the server compute it the same way from `writeAsRecord()`, so a client can ask the server
+        whether its copy is still current without the server storing any version numbers.
+
+        Returns:
+            str: 16 hexadecimal characters that change whenever any attribute of the movie changes.
+        """
+        return hashlib.blake2b(self.writeAsRecord().encode(), digest_size=8).hexdigest()
@@ -0,0 +1,123 @@
+import threading
+import time
+from collections import Counter, OrderedDict
+
+class MovieCache:
+    """
+    Keeps recently used `Movie` objects in memory so repeated selects do not go to the database.
+
+    The cache is a least-recently-used map from MovieID (as a string) to `Movie`, limited to `capacity` entries.
+    It is shared by all worker threads, so every operation holds a lock.
+
+    Changes made through this server invalidate their movie at once. Changes it never sees (made through another server, by
+    `BulkTransfer` or directly in the database) are picked up when the entry expires, `ttl` seconds after it was stored.
+
+    Attributes:
+        capacity (int): The maximum number of movies kept in the cache.
+        ttl (float): Seconds a movie stays in the cache, or None to keep it until it is invalidated or evicted.
+        movies (OrderedDict): The cached movies as (movie, expiry time) pairs, least recently used first.
+        hits (int): The number of lookups answered from the cache.
+        misses (int): The number of lookups that had to go to the database.
+        generation (int): Incremented by every invalidation, so a reader can tell whether a movie changed while it was
+                          reading it from the database.
+    """
+    def __init__(self, capacity=1000, ttl=60.0):
+        """
+        Initializes the MovieCache object.
+
+        Args:
+            capacity (int, optional): The maximum number of movies kept in the cache. Defaults to 1000.
+            ttl (float, optional): Seconds a movie stays in the cache, None for no limit. Defaults to 60.0.
+        """
+        self.capacity = capacity
+        self.ttl = ttl
+        self.movies = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self.lock = threading.Lock()
+
+    def get(self, movieID):
+        """
+        Looks up a movie.
+
+        Args:
+            movieID (int or str): The MovieID to look up.
+
+        Returns:
+            Movie: The cached movie, or None if it is not in the cache or has expired.
+        """
+        key = str(movieID).strip()
+        with self.lock:
+            entry = self.movies.get(key)
+            if entry is not None and entry[1] is not None and time.monotonic() >= entry[1]:
+                #expired: drop it so the caller reloads the movie
+                del self.movies[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.movies.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, movie, generation=None):
+        """
+        Adds or replaces a movie, evicting the least recently used one if the cache is full.
+
+        Args:
+            movie (Movie): The movie to cache. Movies without a MovieID are ignored.
+            generation (int, optional): The `generation` read before the movie was loaded. If a movie was invalidated since
+                                        then, the loaded copy may be stale and is not cached. Defaults to None (always cache).
+        """
+        if movie is None or movie.movieID is None:
+            return
+        key = str(movie.movieID).strip()
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return
+            self.movies[key] = (movie, time.monotonic() + self.ttl if self.ttl else None)
+            self.movies.move_to_end(key)
+            while len(self.movies) > self.capacity:
+                self.movies.popitem(last=False)
+
+    def invalidate(self, movieID):
+        """
+        Removes a movie from the cache, e.g. after it was deleted.
+
+        Args:
+            movieID (int or str): The MovieID to remove.
+        """
+        with self.lock:
+            self.movies.pop(str(movieID).strip(), None)
+            self.generation += 1
+
+    def __len__(self):
+        with self.lock:
+            return len(self.movies)
+
+    def __bool__(self):
+        #an empty cache is still a cache; without this `len` would make it falsy and "if cache:" would skip it
+        return True
+
+    @staticmethod
+    def hotMovieIDs(queries, limit):
+        """
+        Ranks the MovieIDs of the "select" records in a query log by how often they were selected.
+
+        Args:
+            queries (list): The `Query` objects to scan, e.g. the most recent part of the log.
+            limit (int): The maximum number of MovieIDs to return.
+
+        Returns:
+            tuple: (hotIDs, counts) where hotIDs is the list of the most selected MovieIDs (strings), hottest first,
+                   and counts is a `Counter` of every selected MovieID.
+        """
+        counts = Counter()
+        for query in queries:
+            if query is None or not query.queryDetails.startswith("select|"):
+                continue
+            movieID = query.queryDetails.split("|")[1].strip()
+            if movieID.isdigit():
+                counts[movieID] += 1
+        return [movieID for movieID, _ in counts.most_common(limit)], counts
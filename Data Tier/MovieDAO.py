@@ -1,24 +1,349 @@
-import pyodbc
+import heapq
+import itertools
+import math
+import os
+import sqlite3
+import time
 from Movie import Movie
+from ConnectionRouter import ConnectionRouter
+from ShardMap import ShardMap, IdAllocator
+from Tracer import Tracer
 
-def getConnection():
+#the database used by getConnection(), see configure()
+BACKEND = "sqlserver"
+#conn_str = 'DRIVER={SQL Server};SERVER=localhost;DATABASE=MovieData;Trusted_Connection=yes'
+CONNECTION_STRING = "DRIVER={SQL Server};SERVER=THANG;DATABASE=MovieData;Trusted_Connection=yes"
+SQLITE_PATH = "MovieData.db"
+
+#pyodbc is imported by the first SQL Server connection, so processes using SQLite never load the ODBC driver
+pyodbc = None
+DatabaseErrors = (sqlite3.Error,)
+
+#routes reads to replicas and writes to the primary once configureReplicas() is called
+ROUTER = None
+
+#splits the Movies table over several databases once configureShards() is called
+SHARDS = None
+ID_ALLOCATOR = None
+
+def configure(backend="sqlserver", database=None):
+    """
+    Selects the database used by all functions of this module.
+
+    Args:
+        backend (str, optional): "sqlserver" to connect through pyodbc or "sqlite" to use a local SQLite file. Defaults to "sqlserver".
+        database (str, optional): The pyodbc connection string for "sqlserver" or the file path for "sqlite". Defaults to None
+                                  (keep the current setting).
+
+    Raises:
+        ValueError: If the backend is unknown.
+    """
+    global BACKEND, CONNECTION_STRING, SQLITE_PATH
+    if backend not in ("sqlserver", "sqlite"):
+        raise ValueError(f"Unknown database backend: {backend}")
+    BACKEND = backend
+    if database and backend == "sqlite":
+        SQLITE_PATH = database
+    elif database:
+        CONNECTION_STRING = database
+
+def loadPyodbc():
+    """
+    Imports pyodbc the first time it is needed.
+
+    Returns:
+        module: The pyodbc module.
+    """
+    global pyodbc, DatabaseErrors
+    if pyodbc is None:
+        import pyodbc as driver
+        pyodbc = driver
+        DatabaseErrors = (sqlite3.Error, pyodbc.Error)
+    return pyodbc
+
+def createSQLiteDatabase(path, sampleMovies=True):
+    """
+    Creates a SQLite database with the Genres and Movies tables and their sample rows, unless the file already has them.
+
+    The schema mirrors MovieDatabase.sql and is read from MovieDatabaseSQLite.sql next to this module.
+
+    Args:
+        path (str): The SQLite file to create or check.
+        sampleMovies (bool, optional): False to leave the new Movies table empty, e.g. for a shard. Defaults to True.
+    """
+    conn = sqlite3.connect(path)
+    try:
+        exists = conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='Movies'").fetchone()
+        if not exists:
+            with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "MovieDatabaseSQLite.sql")) as file:
+                conn.executescript(file.read())
+            if not sampleMovies:
+                conn.execute("DELETE FROM Movies")
+            conn.commit()
+    finally:
+        conn.close()
+
+def configureReplicas(primary=None, replicas=(), poolSize=5, pinSeconds=2.0, retryAfter=5.0):
+    """
+    Splits reads from writes: writes go to the primary and reads round-robin over the replicas.
+
+    Connections are then pooled per database. Replicas that fail are skipped for a while and probed again later, and reads of a
+    session that has just written stay on the primary for `pinSeconds` (see `setSession`). With the "sqlite" backend the primary
+    and replicas are file paths, which makes it easy to try the routing locally.
+
+    Args:
+        primary (str, optional): The database that receives writes. Defaults to None (the database given to `configure`).
+        replicas (iterable, optional): The databases that serve reads. Defaults to none.
+        poolSize (int, optional): The maximum number of idle connections kept per database. Defaults to 5.
+        pinSeconds (float, optional): How long reads stay on the primary after a session writes. Defaults to 2.0.
+        retryAfter (float, optional): Seconds a failed replica is skipped before it is probed again. Defaults to 5.0.
+    """
+    global ROUTER
+    if ROUTER:
+        ROUTER.close()
+    if primary is None:
+        primary = SQLITE_PATH if BACKEND == "sqlite" else CONNECTION_STRING
+    ROUTER = ConnectionRouter(openConnection, primary, replicas, poolSize, pinSeconds, retryAfter)
+
+def configureShards(databases, strategy="hash", bounds=None, poolSize=5, blockSize=100):
+    """
+    Splits the Movies table over several databases (shards) by MovieID. This replaces `configureReplicas`.
+
+    Single-movie functions then run on the one shard holding the movie, while `getMoviesByIds`, `iterMovies`, `searchMovies` and
+    `countMovies` query all shards in parallel and merge the results. Every shard needs the Genres table, since movies refer to
+    it. New MovieIDs come from a counter in the IdAllocator table of the first shard, created here if missing, rather than from
+    the shards' identity columns, so IDs stay unique across shards.
+
+    Args:
+        databases (iterable): The shards' connection strings or SQLite paths, in shard order.
+        strategy (str, optional): "hash" or "range" (see `ShardMap`). Defaults to "hash".
+        bounds (list, optional): For "range", the exclusive upper MovieID bound of every shard but the last. Defaults to None.
+        poolSize (int, optional): The maximum number of idle connections kept per shard. Defaults to 5.
+        blockSize (int, optional): The number of MovieIDs reserved from the counter at a time. Defaults to 100.
+
+    Raises:
+        ValueError: If the layout is not usable.
+        RuntimeError: If a shard cannot be read to start the ID counter.
+        DatabaseErrors: If the ID counter cannot be created.
+    """
+    global SHARDS, ID_ALLOCATOR, ROUTER
+    if ROUTER:
+        ROUTER.close()
+        ROUTER = None
+    if SHARDS:
+        SHARDS.close()
+    SHARDS = ShardMap(openConnection, databases, strategy, bounds, poolSize)
+    createIdAllocator()
+    ID_ALLOCATOR = IdAllocator(reserveMovieIds, blockSize)
+
+def createIdAllocator():
+    """
+    Creates the IdAllocator table on the first shard, unless it exists, starting after the highest MovieID of all shards.
+    """
+    if BACKEND == "sqlite":
+        create_query = "CREATE TABLE IF NOT EXISTS IdAllocator (Name VARCHAR(50) PRIMARY KEY, NextID INTEGER NOT NULL)"
+        insert_query = "INSERT OR IGNORE INTO IdAllocator (Name, NextID) VALUES ('Movies', ?)"
+    else:
+        create_query = ("IF OBJECT_ID('IdAllocator', 'U') IS NULL "
+                        "CREATE TABLE IdAllocator (Name VARCHAR(50) PRIMARY KEY, NextID BIGINT NOT NULL)")
+        insert_query = ("IF NOT EXISTS (SELECT 1 FROM IdAllocator WHERE Name = 'Movies') "
+                        "INSERT INTO IdAllocator (Name, NextID) VALUES ('Movies', ?)")
+    highest = SHARDS.scatter(lambda shard: queryShard(shard, "SELECT MAX(MovieID) FROM Movies", ()))
+    if None in highest:
+        raise RuntimeError("Cannot read the highest MovieID of every shard")
+    nextID = max((rows[0][0] or 0 for rows in highest), default=0) + 1
+    conn = getConnection(shard=0)
+    broken = False
+    try:
+        cursor = conn.cursor()
+        cursor.execute(create_query)
+        cursor.execute(insert_query, (nextID,))
+        conn.commit()
+    except DatabaseErrors:
+        broken = True
+        raise
+    finally:
+        releaseConnection(conn, broken)
+
+def reserveMovieIds(count, timeout=None):
+    """
+    Reserves a block of new MovieIDs from the counter on the first shard. Used by the `IdAllocator`.
+
+    Args:
+        count (int): The number of IDs.
+        timeout (float, optional): The query timeout in seconds. Defaults to None.
+
+    Returns:
+        tuple: (first ID, first ID after the block)
+
+    Raises:
+        DatabaseErrors: If a database error occurs.
+    """
+    if BACKEND == "sqlite":
+        reserve_query = "UPDATE IdAllocator SET NextID = NextID + ? WHERE Name = 'Movies' RETURNING NextID"
+    else:
+        reserve_query = "UPDATE IdAllocator SET NextID = NextID + ? OUTPUT INSERTED.NextID WHERE Name = 'Movies'"
+    conn = getConnection(timeout, shard=0)
+    broken = False
+    try:
+        cursor = conn.cursor()
+        cursor.execute(reserve_query, (count,))
+        limit = cursor.fetchone()[0]
+        conn.commit()
+    except DatabaseErrors:
+        broken = True
+        raise
+    finally:
+        releaseConnection(conn, broken)
+    return limit - count, limit
+
+def shardFor(movieID):
+    """
+    Returns the shard holding a movie.
+
+    Args:
+        movieID (int): The MovieID.
+
+    Returns:
+        int: The shard index, or None unless `configureShards` was called.
+    """
+    return SHARDS.shardFor(movieID) if SHARDS else None
+
+def fanOut(function):
+    """
+    Runs a function on every shard in parallel, or once on the single database.
+
+    Args:
+        function (callable): Called with the shard index (None without shards).
+
+    Returns:
+        list: The result of each call, in shard order.
+    """
+    if SHARDS:
+        return SHARDS.scatter(function)
+    return [function(None)]
+
+def setSession(session):
+    """
+    Tells the read/write router which session the calling thread is serving, e.g. the client's address.
+
+    Does nothing unless `configureReplicas` or `configureShards` was called.
+
+    Args:
+        session (str): The session key, or None.
+    """
+    if SHARDS:
+        SHARDS.setSession(session)
+    elif ROUTER:
+        ROUTER.setSession(session)
+
+def openConnection(database):
+    """
+    Opens a new connection with the configured backend.
+
+    Args:
+        database (str): The pyodbc connection string, or the SQLite file path.
+
+    Returns:
+        Connection: A pyodbc or sqlite3 Connection object.
     """
-    Establishes a connection to the SQL Server database.
+    if BACKEND == "sqlite":
+        #pooled connections may be used by any worker thread
+        return sqlite3.connect(database, check_same_thread=False)
+    return loadPyodbc().connect(database)
 
-    This function creates a connection string and uses pyodbc to connect to the database.  The connection string specifies the driver, 
-    server, database name, and uses trusted authentication.
+@Tracer.traced("MovieDAO.getConnection")
+def getConnection(timeout=None, forWrite=True, shard=None, preferPrimary=False):
+    """
+    Establishes a connection to the configured database.
+
+    For the "sqlserver" backend this function uses pyodbc with `CONNECTION_STRING`, which specifies the driver, server, database name
+    and uses trusted authentication. For the "sqlite" backend it opens `SQLITE_PATH`. If `configureReplicas` was called, the
+    connection comes from the router instead: from the primary's pool for writes, from a replica's pool for reads. If
+    `configureShards` was called, it comes from the pool of the given shard.
+
+    Args:
+        timeout (float, optional): The query timeout in seconds for statements run on the connection. pyodbc only supports whole
+                                   seconds, so the value is rounded up. SQLite statements are interrupted once the time is up.
+                                   Defaults to None (no timeout).
+        forWrite (bool, optional): False if the connection is only used to read. Defaults to True.
+        shard (int, optional): The shard to connect to, see `shardFor`. Defaults to None (the first shard).
+        preferPrimary (bool, optional): True to read from the primary even if read replicas are configured. The read does not
+                                        count as a write, so it does not pin the session to the primary. Defaults to False.
 
     Returns:
-        pyodbc.Connection: A pyodbc Connection object representing the database connection.
+        Connection: A pyodbc or sqlite3 Connection object representing the database connection. Give it back with
+                    `releaseConnection`.
     """
-    #create a connection string to the database
-    #conn_str = 'DRIVER={SQL Server};SERVER=localhost;DATABASE=MovieData;Trusted_Connection=yes'
-    conn_str = "DRIVER={SQL Server};SERVER=THANG;DATABASE=MovieData;Trusted_Connection=yes"
-    conn = pyodbc.connect(conn_str)
+    if SHARDS:
+        conn = SHARDS.acquire(shard or 0, forWrite, preferPrimary)
+    elif ROUTER:
+        conn = ROUTER.acquire(forWrite, preferPrimary)
+    else:
+        #create a connection string to the database
+        conn = openConnection(SQLITE_PATH if BACKEND == "sqlite" else CONNECTION_STRING)
+
+    #pooled connections keep their settings, so the timeout is always set (or cleared)
+    if BACKEND == "sqlite":
+        if timeout is not None:
+            stopAt = time.monotonic() + timeout
+            #a non-zero return value interrupts the running statement
+            conn.set_progress_handler(lambda: time.monotonic() > stopAt, 1000)
+        else:
+            conn.set_progress_handler(None, 0)
+    else:
+        conn.timeout = max(1, math.ceil(timeout)) if timeout is not None else 0
     return conn
 
+def returningClauses(table="INSERTED"):
+    """
+    Builds the clauses that make an INSERT, UPDATE or DELETE statement return the affected row in the same round trip.
+
+    SQL Server uses an OUTPUT clause placed before VALUES/WHERE, SQLite a RETURNING clause at the end of the statement.
+
+    Args:
+        table (str, optional): The SQL Server pseudo table the OUTPUT clause reads, "INSERTED" or "DELETED" (for a DELETE).
+                               Defaults to "INSERTED".
+
+    Returns:
+        tuple: (output, returning) where one of the two is an empty string for the configured backend.
+    """
+    columns = ["MovieID", "Title", "Director", "YearReleased", "Description", "GenreID"]
+    if BACKEND == "sqlserver":
+        return "OUTPUT " + ", ".join(f"{table}.{column}" for column in columns), ""
+    return "", "RETURNING " + ", ".join(columns)
+
+def allowExplicitIds(cursor):
+    """
+    Lets the following INSERT statements on a connection set MovieID themselves, as sharded inserts do.
+
+    SQLite accepts explicit values for an AUTOINCREMENT column; SQL Server needs IDENTITY_INSERT turned on for the session.
+
+    Args:
+        cursor (Cursor): A cursor of the connection.
+    """
+    if BACKEND == "sqlserver":
+        cursor.execute("SET IDENTITY_INSERT Movies ON")
+
+def releaseConnection(conn, broken=False):
+    """
+    Closes a connection from `getConnection`, or returns it to its pool when read/write splitting or sharding is configured.
+
+    Args:
+        conn (Connection): The connection.
+        broken (bool, optional): True if an error occurred on the connection, so it must not be reused. Defaults to False.
+    """
+    if SHARDS or ROUTER:
+        if not broken:
+            #end any open transaction before the connection is reused
+            conn.rollback()
+        (SHARDS or ROUTER).release(conn, broken)
+    else:
+        conn.close()
+
 # get a movie from the database by its movieID
-def getMovieById(movieID):
+@Tracer.traced("MovieDAO.getMovieById")
+def getMovieById(movieID, timeout=None, fromPrimary=False):
     """
     Retrieves a movie from the database by its MovieID.
 
@@ -27,17 +352,25 @@ def getMovieById(movieID):
 
     Args:
         movieID (int): The MovieID of the movie to retrieve.
+        timeout (float, optional): The query timeout in seconds. Defaults to None.
+        fromPrimary (bool, optional): True to read from the primary even if read replicas are configured, when the row must
+                                      not lag behind the last commit. The session is not pinned by it. Defaults to False.
 
     Returns:
-        Movie: A `Movie` object if the movie is found, None otherwise.
+        Movie: A `Movie` object if the movie is found, None if no movie has the MovieID.
 
     Raises:
-        pyodbc.Error: If a database error occurs during the operation.
+        DatabaseErrors: If a database error occurs during the operation, including a query that ran out of time. Unlike
+                        most functions of this module it is raised, so a failed lookup is not mistaken for a missing movie.
         Exception: For any other unexpected error.
     """
+    conn = None
+    broken = False
+    row = None
+    movie = None
     try:    
         # establish a connection with the Database
-        conn = getConnection()
+        conn = getConnection(timeout, forWrite=False, shard=shardFor(movieID), preferPrimary=fromPrimary)
 
         # create a query string
         query = "SELECT MovieID, Title, Director, YearReleased, Description, GenreID FROM Movies WHERE MovieID=?"
@@ -50,13 +383,17 @@ def getMovieById(movieID):
 
         # fetch one record
         row = cursor.fetchone()
-    except pyodbc.Error as e:
+    except DatabaseErrors as e:
         print("Database error: ", e)
+        broken = True
+        raise
     except Exception as e:
         print("Unexpected error: ", e)
+        broken = True
+        raise
     finally:
         if conn:
-            conn.close()    # close connection
+            releaseConnection(conn, broken)    # close connection or return it to its pool
 
     # create a movie object
     if row:
@@ -64,25 +401,94 @@ def getMovieById(movieID):
 
     return movie
 
+# get several movies from the database in one query
+@Tracer.traced("MovieDAO.getMoviesByIds")
+def getMoviesByIds(movieIDs, timeout=None, shard=None):
+    """
+    Retrieves several movies from the database with a single SELECT query.
+
+    This function is used to fill the server's cache in one round trip instead of one query per movie. SQL Server accepts at most
+    2100 parameters per statement, so callers should keep the list well below that. With shards, the MovieIDs are grouped by
+    shard and each shard is queried in parallel for its own movies.
+
+    Args:
+        movieIDs (list): The MovieIDs of the movies to retrieve.
+        timeout (float, optional): The query timeout in seconds. Defaults to None.
+        shard (int, optional): Query only this shard. Defaults to None (the shards holding the movies).
+
+    Returns:
+        list: The `Movie` objects that were found, in no particular order. Empty if none were found or an error occurred.
+    """
+    movies = []
+    if not movieIDs:
+        return movies
+    if SHARDS and shard is None:
+        groups = {}
+        for movieID in movieIDs:
+            groups.setdefault(SHARDS.shardFor(movieID), []).append(movieID)
+        for found in SHARDS.scatter(lambda index: getMoviesByIds(groups.get(index), timeout, index)):
+            movies.extend(found)
+        return movies
+    conn = None
+    broken = False
+    try:
+        # establish a connection with the Database
+        conn = getConnection(timeout, forWrite=False, shard=shard)
+
+        # create a query string with one placeholder per MovieID
+        placeholders = ", ".join("?" for _ in movieIDs)
+        query = f"SELECT MovieID, Title, Director, YearReleased, Description, GenreID FROM Movies WHERE MovieID IN ({placeholders})"
+
+        # create a cursor on the connection (a cursor is an object used to interact with the database)
+        cursor = conn.cursor()
+
+        # execuate the query
+        cursor.execute(query, tuple(movieIDs))
+
+        # create a movie object for each record
+        for row in cursor.fetchall():
+            movies.append(Movie(row[1], row[2], row[3], row[4], row[5], row[0]))
+    except DatabaseErrors as e:
+        print("Database error: ", e)
+        broken = True
+    except Exception as e:
+        print("Unexpected error: ", e)
+        broken = True
+    finally:
+        if conn:
+            releaseConnection(conn, broken)    # close connection or return it to its pool
+
+    return movies
+
 # update a movie
-def updateAMovie(movie):
+@Tracer.traced("MovieDAO.updateAMovie")
+def updateAMovie(movie, timeout=None):
     """
     Updates an existing movie's information in the database.
 
     This function establishes a database connection, executes an UPDATE query
-    to modify the movie's details, and commits the changes.
+    to modify the movie's details, and commits the changes. The statement returns
+    the updated row, so no second query is needed to read it back.
 
     Args:
         movie (Movie): A `Movie` object containing the updated movie information.
+        timeout (float, optional): The query timeout in seconds. Defaults to None.
+
+    Returns:
+        Movie: The movie as stored in the database, or None if no movie has that MovieID or an error occurred.
 
      Raises:
-        pyodbc.Error: If a database error occurs during the operation.
+        DatabaseErrors: If a database error occurs during the operation.
         Exception: For any other unexpected error.
     """
+    conn = None
+    broken = False
+    updated = None
     try:    
         # establish a connection with the Database
-        conn = getConnection()
+        conn = getConnection(timeout, shard=shardFor(movie.movieID))
         # create a query string
+        output, returning = returningClauses()
         update_query = f"""
             UPDATE Movies SET 
                 Title = ?,
@@ -90,7 +496,9 @@ def updateAMovie(movie):
                 YearReleased = ?,
                 Description = ?,
                 GenreID = ?
+            {output}
             WHERE MovieID = ?
+            {returning}
         """
         values = (movie.title, movie.director, movie.yearReleased, movie.description, movie.genreID, movie.movieID)
 
@@ -99,87 +507,411 @@ def updateAMovie(movie):
 
         # execuate the query
         cursor.execute(update_query, values)
+        # read the updated row before committing
+        row = cursor.fetchone()
         # save all changes to the database
         conn.commit()
-    except pyodbc.Error as e:
+        if row:
+            updated = Movie(row[1], row[2], row[3], row[4], row[5], row[0])
+    except DatabaseErrors as e:
         print("Database error: ", e)
+        broken = True
     except Exception as e:
         print("Unexpected error: ", e)
+        broken = True
     finally:
         if conn:
-            conn.close()    # close connection
+            releaseConnection(conn, broken)    # close connection or return it to its pool
+
+    return updated
 
 
 # insert a movie into the database
-def insertAMovie(movie):
+@Tracer.traced("MovieDAO.insertAMovie")
+def insertAMovie(movie, timeout=None):
     """
     Inserts a new movie into the database.
 
     This function establishes a database connection, executes an INSERT query
-    to add the movie to the database, and commits the changes.
+    to add the movie to the database, and commits the changes. The statement returns
+    the new row, including the MovieID generated by the database. With shards, the
+    MovieID comes from the `IdAllocator` and decides the shard the movie goes to.
 
     Args:
         movie (Movie): A `Movie` object containing the movie's information.
+        timeout (float, optional): The query timeout in seconds. Defaults to None.
+
+    Returns:
+        Movie: The inserted movie with its new MovieID, or None if an error occurred.
 
     Raises:
-        pyodbc.Error: If a database error occurs during the operation.
+        DatabaseErrors: If a database error occurs during the operation.
         Exception: For any other unexpected error.
     """
+    conn = None
+    broken = False
+    inserted = None
     try:
+        movieID = ID_ALLOCATOR.allocate()[0] if SHARDS else None
         # establish a connection with the Database
-        conn = getConnection()
+        conn = getConnection(timeout, shard=shardFor(movieID))
         # create a query string
+        output, returning = returningClauses()
         insert_query = f"""
             INSERT INTO Movies (Title, Director, YearReleased, Description, GenreID)
+            {output}
             VALUES (?, ?, ?, ?, ?)
+            {returning}
         """
         values = (movie.title, movie.director, movie.yearReleased, movie.description, movie.genreID)
 
         # create a cursor on the connection (a cursor is an object used to interact with the database)
         cursor = conn.cursor()
 
+        if movieID is not None:
+            # the new movie gets the allocated MovieID instead of one from the shard's identity column
+            allowExplicitIds(cursor)
+            insert_query = f"""
+                INSERT INTO Movies (MovieID, Title, Director, YearReleased, Description, GenreID)
+                {output}
+                VALUES (?, ?, ?, ?, ?, ?)
+                {returning}
+            """
+            values = (movieID,) + values
+
         # execuate the query
         cursor.execute(insert_query, values)
+        # read the new row before committing
+        row = cursor.fetchone()
         conn.commit()   # save all changes to the database
-    except pyodbc.Error as e:
+        if row:
+            inserted = Movie(row[1], row[2], row[3], row[4], row[5], row[0])
+    except DatabaseErrors as e:
         print("Database error: ", e)
+        broken = True
     except Exception as e:
         print("Unexpected error: ", e)
+        broken = True
     finally:
         if conn:
-            conn.close()    # close connection
+            releaseConnection(conn, broken)    # close connection or return it to its pool
+
+    return inserted
 
 # delete a movie by movieID
-def deleteAMovie(movieID):
+@Tracer.traced("MovieDAO.deleteAMovie")
+def deleteAMovie(movieID, timeout=None):
     """
     Deletes a movie from the database by its MovieID.
 
     This function establishes a database connection, executes a DELETE query
     to remove the movie with the specified MovieID, and commits the changes.
+    The statement returns the deleted row, so the caller learns whether anything
+    was deleted and which genre the movie had.
 
     Args:
         movieID (int): The MovieID of the movie to delete.
+        timeout (float, optional): The query timeout in seconds. Defaults to None.
+
+    Returns:
+        Movie: The movie as it was before it was deleted, or None if no movie has that MovieID or an error occurred.
 
     Raises:
-        pyodbc.Error: If a database error occurs during the operation.
+        DatabaseErrors: If a database error occurs during the operation.
         Exception: For any other unexpected error.
     """
+    conn = None
+    broken = False
+    deleted = None
     try:
         # establish a connection with the Database
-        conn = getConnection()
+        conn = getConnection(timeout, shard=shardFor(movieID))
         # create a query string
-        delete_query = "DELETE FROM Movies WHERE MovieID =?"
+        output, returning = returningClauses("DELETED")
+        delete_query = f"DELETE FROM Movies {output} WHERE MovieID = ? {returning}"
 
         # create a cursor on the connection (a cursor is an object used to interact with the database)
         cursor = conn.cursor()
 
         # execuate the query
         cursor.execute(delete_query, (movieID,))
+        # read the deleted row before committing
+        row = cursor.fetchone()
         conn.commit()   # save all changes to the database
-    except pyodbc.Error as e:
+        if row:
+            deleted = Movie(row[1], row[2], row[3], row[4], row[5], row[0])
+    except DatabaseErrors as e:
         print("Database error: ", e)
+        broken = True
     except Exception as e:
         print("Unexpected error: ", e)
+        broken = True
     finally:
         if conn:
-            conn.close()    # close connection
+            releaseConnection(conn, broken)    # close connection or return it to its pool
+
+    return deleted
+
+# insert many movies, committing one chunk at a time
+@Tracer.traced("MovieDAO.insertMovies")
+def insertMovies(movies, chunkSize=1000, timeout=None):
+    """
+    Inserts a stream of movies into the database in chunks.
+
+    The movies are consumed lazily: at most `chunkSize` of them are held in memory, sent with one `executemany` call (with
+    pyodbc's `fast_executemany` enabled on SQL Server) and committed before the next chunk is read. A failure therefore
+    keeps the chunks that were already committed.
+
+    With shards, each chunk gets its MovieIDs from the `IdAllocator` in one reservation and is split by shard; the shards insert
+    and commit their part in parallel.
+
+    Args:
+        movies (iterable): The `Movie` objects to insert. Their movieID is ignored, the database assigns it.
+        chunkSize (int, optional): The number of rows per executemany call and transaction. Defaults to 1000.
+        timeout (float, optional): The query timeout in seconds, applied to each statement. Defaults to None.
+
+    Returns:
+        int: The number of rows inserted.
+
+    Raises:
+        DatabaseErrors: If a database error occurs. Unlike the single-row functions, the error is not swallowed.
+    """
+    if SHARDS:
+        return insertShardedMovies(movies, chunkSize, timeout)
+    insert_query = "INSERT INTO Movies (Title, Director, YearReleased, Description, GenreID) VALUES (?, ?, ?, ?, ?)"
+    count = 0
+    conn = getConnection(timeout)
+    broken = False
+    try:
+        cursor = conn.cursor()
+        if BACKEND == "sqlserver":
+            #send each chunk as one parameter array instead of one round trip per row
+            cursor.fast_executemany = True
+        movies = iter(movies)
+        while True:
+            chunk = [(movie.title, movie.director, movie.yearReleased, movie.description, movie.genreID)
+                     for movie in itertools.islice(movies, chunkSize)]
+            if not chunk:
+                break
+            cursor.executemany(insert_query, chunk)
+            conn.commit()   # one transaction per chunk
+            count += len(chunk)
+    except DatabaseErrors:
+        broken = True
+        raise
+    finally:
+        releaseConnection(conn, broken)    # close connection or return it to its pool
+    return count
+
+def insertShardedMovies(movies, chunkSize, timeout):
+    """
+    Inserts a stream of movies into the shards, see `insertMovies`.
+
+    Args:
+        movies (iterable): The `Movie` objects to insert.
+        chunkSize (int): The number of movies allocated and split at a time.
+        timeout (float): The query timeout in seconds, or None.
+
+    Returns:
+        int: The number of rows inserted.
+
+    Raises:
+        DatabaseErrors: If a database error occurs on any shard. The other shards keep their part of the chunk.
+    """
+    count = 0
+    movies = iter(movies)
+    while True:
+        chunk = list(itertools.islice(movies, chunkSize))
+        if not chunk:
+            break
+        groups = {}
+        for movieID, movie in zip(ID_ALLOCATOR.allocate(len(chunk)), chunk):
+            groups.setdefault(SHARDS.shardFor(movieID), []).append(
+                (movieID, movie.title, movie.director, movie.yearReleased, movie.description, movie.genreID))
+        count += sum(SHARDS.scatter(lambda shard: insertShardRows(shard, groups.get(shard), timeout)))
+    return count
+
+def insertShardRows(shard, rows, timeout=None):
+    """
+    Inserts rows that already have their MovieID into one shard, in one transaction.
+
+    Args:
+        shard (int): The shard index.
+        rows (list): (MovieID, Title, Director, YearReleased, Description, GenreID) tuples. None or empty does nothing.
+        timeout (float, optional): The query timeout in seconds. Defaults to None.
+
+    Returns:
+        int: The number of rows inserted.
+
+    Raises:
+        DatabaseErrors: If a database error occurs.
+    """
+    if not rows:
+        return 0
+    insert_query = ("INSERT INTO Movies (MovieID, Title, Director, YearReleased, Description, GenreID) "
+                    "VALUES (?, ?, ?, ?, ?, ?)")
+    conn = getConnection(timeout, shard=shard)
+    broken = False
+    try:
+        cursor = conn.cursor()
+        if BACKEND == "sqlserver":
+            cursor.fast_executemany = True
+        allowExplicitIds(cursor)
+        cursor.executemany(insert_query, rows)
+        conn.commit()
+    except DatabaseErrors:
+        broken = True
+        raise
+    finally:
+        releaseConnection(conn, broken)    # close connection or return it to its pool
+    return len(rows)
+
+# read all movies, a chunk at a time
+def iterMovies(chunkSize=1000, timeout=None, shard=None):
+    """
+    Yields every movie of the database, ordered by MovieID.
+
+    Rows are read with `fetchmany`, so only one chunk is held in memory at a time. The connection stays open until the
+    generator is exhausted or closed. With shards, every shard is read at the same time and the streams are merged by MovieID,
+    so one chunk per shard is held in memory.
+
+    Args:
+        chunkSize (int, optional): The number of rows fetched at a time. Defaults to 1000.
+        timeout (float, optional): The query timeout in seconds. Defaults to None.
+        shard (int, optional): Read only this shard. Defaults to None (all movies).
+
+    Yields:
+        Movie: The next movie.
+
+    Raises:
+        DatabaseErrors: If a database error occurs.
+    """
+    if SHARDS and shard is None:
+        streams = [iterMovies(chunkSize, timeout, index) for index in range(len(SHARDS.databases))]
+        try:
+            yield from heapq.merge(*streams, key=lambda movie: int(movie.movieID))
+        finally:
+            for stream in streams:
+                stream.close()
+        return
+    query = "SELECT MovieID, Title, Director, YearReleased, Description, GenreID FROM Movies ORDER BY MovieID"
+    conn = getConnection(timeout, forWrite=False, shard=shard)
+    broken = False
+    cursor = None
+    try:
+        cursor = conn.cursor()
+        cursor.execute(query)
+        while True:
+            rows = cursor.fetchmany(chunkSize)
+            if not rows:
+                break
+            for row in rows:
+                yield Movie(row[1], row[2], row[3], row[4], row[5], row[0])
+    except DatabaseErrors:
+        broken = True
+        raise
+    finally:
+        #the generator may be closed before the last row was read
+        if cursor and not broken:
+            cursor.close()
+        releaseConnection(conn, broken)    # close connection or return it to its pool
+
+def queryShard(shard, query, params, timeout=None):
+    """
+    Runs a read query on one shard (or the single database) and returns all its rows.
+
+    Args:
+        shard (int): The shard index, or None without shards.
+        query (str): The SELECT statement.
+        params (tuple): The query parameters.
+        timeout (float, optional): The query timeout in seconds. Defaults to None.
+
+    Returns:
+        list: The rows, or None if an error occurred.
+    """
+    conn = None
+    broken = False
+    rows = None
+    try:
+        conn = getConnection(timeout, forWrite=False, shard=shard)
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+    except DatabaseErrors as e:
+        print("Database error: ", e)
+        broken = True
+    except Exception as e:
+        print("Unexpected error: ", e)
+        broken = True
+    finally:
+        if conn:
+            releaseConnection(conn, broken)    # close connection or return it to its pool
+    return rows
+
+# count the movies of all shards
+@Tracer.traced("MovieDAO.countMovies")
+def countMovies(timeout=None):
+    """
+    Counts the movies of the catalog, summing the counts of all shards.
+
+    Args:
+        timeout (float, optional): The query timeout in seconds, per shard. Defaults to None.
+
+    Returns:
+        int: The number of movies, or None if a shard could not be counted.
+    """
+    counts = fanOut(lambda shard: queryShard(shard, "SELECT COUNT(*) FROM Movies", (), timeout))
+    if None in counts:
+        return None
+    return sum(rows[0][0] for rows in counts)
+
+# search the titles of all shards
+@Tracer.traced("MovieDAO.searchMovies")
+def searchMovies(text, limit=50, timeout=None):
+    """
+    Finds the movies whose title contains a text, on all shards.
+
+    Each shard returns at most `limit` matches in title order, and the lists are merged so the result is the same as one query
+    on an unsharded table. The shards sort with a binary collation, because the merge compares titles in Python: SQL Server's
+    default collation ignores case and accents, so lists sorted by it do not merge into one ordered list. Titles are therefore
+    in code point order on both backends (e.g. "Zodiac" before "alien"). A shard that fails is left out of the result.
+
+    Args:
+        text (str): The text to look for, case-insensitively for ASCII letters.
+        limit (int, optional): The maximum number of movies returned. Defaults to 50.
+        timeout (float, optional): The query timeout in seconds, per shard. Defaults to None.
+
+    Returns:
+        list: The matching `Movie` objects, ordered by title then MovieID.
+    """
+    pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    columns = "MovieID, Title, Director, YearReleased, Description, GenreID"
+    if BACKEND == "sqlite":
+        query = f"SELECT {columns} FROM Movies WHERE Title LIKE ? ESCAPE '\\' ORDER BY Title COLLATE BINARY, MovieID LIMIT ?"
+        params = (pattern, limit)
+        #BINARY compares UTF-8 bytes, which is the order of Python strings
+        titleKey = lambda title: title
+    else:
+        query = (f"SELECT TOP (?) {columns} FROM Movies WHERE Title LIKE ? ESCAPE '\\' "
+                 f"ORDER BY Title COLLATE Latin1_General_BIN2, MovieID")
+        params = (limit, pattern)
+        #BIN2 compares NVARCHAR values by UTF-16 code unit
+        titleKey = lambda title: title.encode("utf-16-be")
+    results = fanOut(lambda shard: queryShard(shard, query, params, timeout))
+    rows = heapq.merge(*(rows for rows in results if rows), key=lambda row: (titleKey(row[1]), row[0]))
+    return [Movie(row[1], row[2], row[3], row[4], row[5], row[0]) for row in itertools.islice(rows, limit)]
+
+# read the genres
+@Tracer.traced("MovieDAO.getGenres")
+def getGenres(timeout=None):
+    """
+    Retrieves every genre. With shards, the Genres table of the first shard is read, since every shard holds the same genres.
+
+    Args:
+        timeout (float, optional): The query timeout in seconds. Defaults to None.
+
+    Returns:
+        list: (GenreID, GenreName) rows ordered by GenreID. Empty if an error occurred.
+    """
+    rows = queryShard(None, "SELECT GenreID, GenreName FROM Genres ORDER BY GenreID", (), timeout)
+    return [(row[0], row[1]) for row in rows] if rows else []
@@ -0,0 +1,219 @@
+import bisect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from ConnectionRouter import ConnectionRouter
+
+class ShardMap:
+    """
+    Splits the Movies catalog over several databases (shards) by MovieID.
+
+    With the "hash" strategy the shard comes from a jump consistent hash of the MovieID, which spreads consecutive IDs evenly and,
+    unlike `MovieID % shards`, only moves 1/(N + 1) of the movies when an (N + 1)th shard is added. With the "range" strategy shard i holds the MovieIDs below `bounds[i]` (and at least `bounds[i - 1]`); the last shard holds the rest,
+    which keeps ranges of IDs together at the cost of a hot last shard for new movies.
+
+    Each shard has its own `ConnectionRouter`, so its connections are pooled. `scatter` runs a function on every shard in
+    parallel for queries that need the whole catalog.
+
+    Attributes:
+        databases (list): The connection string or SQLite path of each shard, in shard order.
+        strategy (str): "hash" or "range".
+        bounds (list): The exclusive upper MovieID bound of every shard but the last, for "range".
+        routers (list): The `ConnectionRouter` of each shard.
+    """
+    STRATEGIES = ("hash", "range")
+
+    def __init__(self, connect, databases, strategy="hash", bounds=None, poolSize=5):
+        """
+        Initializes the ShardMap object.
+
+        Args:
+            connect (callable): Opens a new connection given a database (connection string or SQLite path).
+            databases (iterable): The databases of the shards, in shard order.
+            strategy (str, optional): "hash" or "range". Defaults to "hash".
+            bounds (list, optional): For "range", the ascending exclusive upper bounds of all shards but the last.
+            poolSize (int, optional): The maximum number of idle connections kept per shard. Defaults to 5.
+
+        Raises:
+            ValueError: If there are no shards, the strategy is unknown or the bounds do not fit the shards.
+        """
+        self.databases = list(databases)
+        self.strategy = strategy
+        self.bounds = [int(bound) for bound in bounds] if bounds else []
+        ShardMap.validate(len(self.databases), strategy, self.bounds)
+        self.routers = [ConnectionRouter(connect, database, poolSize=poolSize) for database in self.databases]
+        self.owners = {}        # id(connection) -> router it came from
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=len(self.databases), thread_name_prefix="shard")
+
+    @staticmethod
+    def validate(count, strategy, bounds):
+        """
+        Checks a shard layout.
+
+        Args:
+            count (int): The number of shards.
+            strategy (str): "hash" or "range".
+            bounds (list): The range bounds (ignored for "hash").
+
+        Raises:
+            ValueError: If the layout is not usable.
+        """
+        if count < 1:
+            raise ValueError("At least one shard is needed")
+        if strategy not in ShardMap.STRATEGIES:
+            raise ValueError(f"Unknown sharding strategy {strategy}, use one of {', '.join(ShardMap.STRATEGIES)}")
+        if strategy == "range" and (len(bounds) != count - 1 or bounds != sorted(set(bounds))):
+            raise ValueError(f"{count} range shards need {count - 1} ascending bounds, got {bounds}")
+
+    @staticmethod
+    def shardOf(movieID, count, strategy="hash", bounds=()):
+        """
+        Computes the shard of a MovieID for a given layout, e.g. the layout a rebalance moves to.
+
+        Args:
+            movieID (int or str): The MovieID.
+            count (int): The number of shards.
+            strategy (str, optional): "hash" or "range". Defaults to "hash".
+            bounds (list, optional): The range bounds. Defaults to none.
+
+        Returns:
+            int: The shard index.
+        """
+        movieID = int(movieID)
+        if strategy == "range":
+            return bisect.bisect_right(bounds, movieID)
+        #jump consistent hash (Lamping and Veach): a 64-bit LCG seeded with the key decides at which shard count the key last jumps
+        key = movieID & 0xFFFFFFFFFFFFFFFF
+        shard, candidate = -1, 0
+        while candidate < count:
+            shard = candidate
+            key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+            candidate = int((shard + 1) * (float(1 << 31) / float((key >> 33) + 1)))
+        return shard
+
+    def shardFor(self, movieID):
+        """
+        Returns the shard holding a MovieID.
+
+        Args:
+            movieID (int or str): The MovieID.
+
+        Returns:
+            int: The shard index.
+        """
+        return ShardMap.shardOf(movieID, len(self.databases), self.strategy, self.bounds)
+
+    def acquire(self, shard, forWrite=True, preferPrimary=False):
+        """
+        Returns a pooled connection to a shard.
+
+        Args:
+            shard (int): The shard index.
+            forWrite (bool, optional): True if the connection will be used to change data. Defaults to True.
+            preferPrimary (bool, optional): True to read from the primary (see `ConnectionRouter.acquire`). Defaults to False.
+
+        Returns:
+            Connection: An open connection. Give it back with `release`.
+        """
+        router = self.routers[shard]
+        conn = router.acquire(forWrite, preferPrimary)
+        with self.lock:
+            self.owners[id(conn)] = router
+        return conn
+
+    def release(self, conn, broken=False):
+        """
+        Gives a connection back to the pool of its shard.
+
+        Args:
+            conn (Connection): The connection from `acquire`.
+            broken (bool, optional): True if a database error occurred on the connection. Defaults to False.
+        """
+        with self.lock:
+            router = self.owners.pop(id(conn), None)
+        if router:
+            router.release(conn, broken)
+        else:
+            conn.close()
+
+    def setSession(self, session):
+        """
+        Sets the session of the calling thread on every shard's router (see `ConnectionRouter.setSession`).
+
+        Args:
+            session (str): The session key, or None.
+        """
+        for router in self.routers:
+            router.setSession(session)
+
+    def scatter(self, function):
+        """
+        Runs a function on every shard in parallel and gathers the results.
+
+        Args:
+            function (callable): Called with the shard index.
+
+        Returns:
+            list: The results, in shard order.
+
+        Raises:
+            Exception: The error of the first shard, in shard order, that failed. It is raised as soon as that shard has
+                       finished; the later shards may still be running.
+        """
+        futures = [self.executor.submit(function, shard) for shard in range(len(self.databases))]
+        return [future.result() for future in futures]
+
+    def close(self):
+        """
+        Closes the idle connections of every shard and stops the scatter threads.
+        """
+        for router in self.routers:
+            router.close()
+        self.executor.shutdown(wait=False)
+
+class IdAllocator:
+    """
+    Hands out globally unique MovieIDs when movies live on several shards, so the shards' own identity columns are not used.
+
+    IDs are reserved from a central counter in blocks of `blockSize` (hi-lo allocation), so the counter's database is only
+    contacted once per block rather than once per insert. IDs of a block that are never used (e.g. when the server stops) are
+    skipped, so IDs are unique and increasing per process, but not gapless.
+
+    Attributes:
+        reserve (callable): Reserves `count` IDs from the central counter and returns (first ID, first ID after the block).
+        blockSize (int): The number of IDs reserved at a time.
+    """
+    def __init__(self, reserve, blockSize=100):
+        """
+        Initializes the IdAllocator object.
+
+        Args:
+            reserve (callable): Reserves IDs from the central counter, e.g. `MovieDAO.reserveMovieIds`.
+            blockSize (int, optional): The number of IDs reserved at a time. Defaults to 100.
+        """
+        self.reserve = reserve
+        self.blockSize = blockSize
+        self.nextID = 0
+        self.limit = 0
+        self.lock = threading.Lock()
+
+    def allocate(self, count=1):
+        """
+        Returns new unique IDs.
+
+        Args:
+            count (int, optional): The number of IDs. Defaults to 1.
+
+        Returns:
+            list: The IDs, ascending.
+        """
+        ids = []
+        with self.lock:
+            while len(ids) < count:
+                if self.nextID >= self.limit:
+                    #a large request reserves what it needs in one go
+                    self.nextID, self.limit = self.reserve(max(self.blockSize, count - len(ids)))
+                take = min(count - len(ids), self.limit - self.nextID)
+                ids.extend(range(self.nextID, self.nextID + take))
+                self.nextID += take
+        return ids
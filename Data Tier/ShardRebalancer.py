@@ -0,0 +1,162 @@
+import argparse
+import time
+import MovieDAO
+from ShardMap import ShardMap
+
+class ShardRebalancer:
+    """
+    Moves movies between shard databases when the shard layout changes, e.g. from one database to four hash shards or from
+    three hash shards to four.
+
+    Every source database is read in MovieID order, `chunkSize` rows at a time, and each row whose shard in the new layout is a
+    different database is copied there and then deleted from the source, one transaction per chunk on each side. A database
+    that appears in both layouts keeps the rows that still belong to it; a source missing from the new layout is emptied.
+
+    Copies first delete any row with the same MovieID in the target, so a rebalance that was interrupted can simply be run again.
+    Servers must be stopped while the tool runs; the next `MovieDAO.configureShards` starts the ID counter after the highest
+    MovieID found on the new shards.
+    """
+    COLUMNS = "MovieID, Title, Director, YearReleased, Description, GenreID"
+
+    @staticmethod
+    def readChunk(conn, afterID, chunkSize):
+        """
+        Reads the next rows of a database in MovieID order.
+
+        Args:
+            conn (Connection): The connection to the database.
+            afterID (int): Only rows with a higher MovieID are read.
+            chunkSize (int): The maximum number of rows.
+
+        Returns:
+            list: The rows, as (MovieID, Title, Director, YearReleased, Description, GenreID).
+        """
+        if MovieDAO.BACKEND == "sqlite":
+            query = f"SELECT {ShardRebalancer.COLUMNS} FROM Movies WHERE MovieID > ? ORDER BY MovieID LIMIT ?"
+            params = (afterID, chunkSize)
+        else:
+            query = f"SELECT TOP (?) {ShardRebalancer.COLUMNS} FROM Movies WHERE MovieID > ? ORDER BY MovieID"
+            params = (chunkSize, afterID)
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        return cursor.fetchall()
+
+    @staticmethod
+    def copyRows(conn, rows):
+        """
+        Writes rows into a database with their MovieIDs, replacing rows with the same MovieID, and commits.
+
+        Args:
+            conn (Connection): The connection to the target database.
+            rows (list): The rows from `readChunk`.
+        """
+        cursor = conn.cursor()
+        cursor.executemany("DELETE FROM Movies WHERE MovieID = ?", [(row[0],) for row in rows])
+        MovieDAO.allowExplicitIds(cursor)
+        cursor.executemany(f"INSERT INTO Movies ({ShardRebalancer.COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)",
+                           [tuple(row) for row in rows])
+        conn.commit()
+
+    @staticmethod
+    def deleteRows(conn, rows):
+        """
+        Deletes rows from a database and commits.
+
+        Args:
+            conn (Connection): The connection to the source database.
+            rows (list): The rows from `readChunk`.
+        """
+        cursor = conn.cursor()
+        cursor.executemany("DELETE FROM Movies WHERE MovieID = ?", [(row[0],) for row in rows])
+        conn.commit()
+
+    @staticmethod
+    def rebalance(sources, targets, strategy="hash", bounds=None, chunkSize=1000, dryRun=False):
+        """
+        Moves every movie of the source databases to its shard in the new layout.
+
+        Args:
+            sources (list): The databases holding movies now (connection strings or SQLite paths), in any order.
+            targets (list): The shard databases of the new layout, in shard order. SQLite files are created if missing.
+            strategy (str, optional): The new layout's "hash" or "range" strategy. Defaults to "hash".
+            bounds (list, optional): The new layout's range bounds. Defaults to None.
+            chunkSize (int, optional): The number of rows read and moved at a time. Defaults to 1000.
+            dryRun (bool, optional): True to only count the rows that would move. Defaults to False.
+
+        Returns:
+            dict: The number of rows moved (or to move) per (source, target) pair, and kept per (source, source) pair.
+
+        Raises:
+            ValueError: If the new layout is not usable.
+            DatabaseErrors: If a database error occurs. The chunks already moved stay moved.
+        """
+        bounds = [int(bound) for bound in bounds] if bounds else []
+        ShardMap.validate(len(targets), strategy, bounds)
+        if MovieDAO.BACKEND == "sqlite" and not dryRun:
+            for target in targets:
+                MovieDAO.createSQLiteDatabase(target, sampleMovies=False)
+
+        connections = {}
+        def connect(database):
+            if database not in connections:
+                connections[database] = MovieDAO.openConnection(database)
+            return connections[database]
+
+        counts = {}
+        try:
+            for source in dict.fromkeys(sources):
+                afterID = 0
+                while True:
+                    rows = ShardRebalancer.readChunk(connect(source), afterID, chunkSize)
+                    if not rows:
+                        break
+                    afterID = rows[-1][0]
+                    moves = {}
+                    for row in rows:
+                        target = targets[ShardMap.shardOf(row[0], len(targets), strategy, bounds)]
+                        moves.setdefault(target, []).append(row)
+                    for target, moving in moves.items():
+                        counts[(source, target)] = counts.get((source, target), 0) + len(moving)
+                        if target == source or dryRun:
+                            continue
+                        #copy before deleting, so a failure in between leaves a duplicate, never a lost movie
+                        ShardRebalancer.copyRows(connect(target), moving)
+                        ShardRebalancer.deleteRows(connect(source), moving)
+        finally:
+            for conn in connections.values():
+                conn.close()
+        return counts
+
+def main(argv=None):
+    """
+    Command line entry point, e.g.
+    "python ShardRebalancer.py --backend sqlite --source MovieData.db --target shard0.db --target shard1.db".
+
+    Args:
+        argv (list, optional): The command line arguments. Defaults to None (use sys.argv).
+    """
+    parser = argparse.ArgumentParser(description="Move movies between shard databases after the shard layout changed.")
+    parser.add_argument("--source", action="append", required=True, help="database holding movies now, repeatable")
+    parser.add_argument("--target", action="append", required=True, help="shard database of the new layout in shard order, repeatable")
+    parser.add_argument("--strategy", choices=list(ShardMap.STRATEGIES), default="hash", help="new sharding strategy (default: hash)")
+    parser.add_argument("--bounds", type=int, nargs="*", help="for range sharding, the upper MovieID bound of every shard but the last")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="rows moved per transaction (default: 1000)")
+    parser.add_argument("--dry-run", action="store_true", help="only report how many rows would move")
+    parser.add_argument("--backend", choices=["sqlserver", "sqlite"], default="sqlserver", help="database backend (default: sqlserver)")
+    args = parser.parse_args(argv)
+
+    MovieDAO.configure(args.backend)
+    start = time.perf_counter()
+    counts = ShardRebalancer.rebalance(args.source, args.target, args.strategy, args.bounds, args.chunk_size, args.dry_run)
+    elapsed = time.perf_counter() - start
+    moved = 0
+    for (source, target), count in sorted(counts.items()):
+        if source == target:
+            print(f"{source}: {count} rows stay")
+        else:
+            print(f"{source} -> {target}: {count} rows" + (" to move" if args.dry_run else " moved"))
+            moved += count
+    print(f"{'Would move' if args.dry_run else 'Moved'} {moved} movies in {elapsed:.2f} s.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import bisect
+import re
+import threading
+import unicodedata
+
+class TitleIndex:
+    """
+    A prefix index over movie titles, used to suggest movies as the user types.
+
+    Titles are normalized (see `normalize`) and kept in a sorted list of (normalized title, MovieID) pairs, so the matches of a
+    prefix are a contiguous run found with one binary search. Lookups take O(log n + k); adding or removing a title is a single
+    insert or delete in the list, cheap enough to keep the index current on every insert, update and delete.
+
+    Attributes:
+        entries (list): Sorted (normalized title, MovieID) pairs; MovieIDs are strings.
+        titles (dict): MovieID -> title as stored, returned in suggestions.
+    """
+    def __init__(self):
+        """
+        Initializes an empty TitleIndex object.
+        """
+        self.entries = []
+        self.titles = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def normalize(text):
+        """
+        Normalizes a title or a typed prefix so that case, accents and punctuation do not matter.
+
+        Args:
+            text (str): The text, e.g. "Amélie: Le Fabuleux Destin".
+
+        Returns:
+            str: The normalized text, e.g. "amelie le fabuleux destin".
+        """
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(character for character in text if not unicodedata.combining(character)).casefold()
+        return " ".join(re.sub(r"[^\w\s]", " ", text).split())
+
+    def build(self, movies):
+        """
+        Replaces the content of the index.
+
+        Args:
+            movies (iterable): The `Movie` objects to index, e.g. `MovieDAO.iterMovies()`.
+
+        Returns:
+            int: The number of titles indexed.
+        """
+        titles = {str(movie.movieID): movie.title for movie in movies}
+        entries = sorted((TitleIndex.normalize(title), movieID) for movieID, title in titles.items())
+        with self.lock:
+            self.entries = entries
+            self.titles = titles
+        return len(entries)
+
+    def add(self, movieID, title):
+        """
+        Adds a movie, or replaces its title if it is already indexed.
+
+        Args:
+            movieID (int or str): The MovieID.
+            title (str): The title.
+        """
+        movieID = str(movieID)
+        with self.lock:
+            self.discard(movieID)
+            bisect.insort(self.entries, (TitleIndex.normalize(title), movieID))
+            self.titles[movieID] = title
+
+    def remove(self, movieID):
+        """
+        Removes a movie. Does nothing if it is not indexed.
+
+        Args:
+            movieID (int or str): The MovieID.
+        """
+        with self.lock:
+            self.discard(str(movieID))
+
+    def discard(self, movieID):
+        """
+        Removes a movie; must be called with the lock held.
+
+        Args:
+            movieID (str): The MovieID.
+        """
+        title = self.titles.pop(movieID, None)
+        if title is None:
+            return
+        entry = (TitleIndex.normalize(title), movieID)
+        position = bisect.bisect_left(self.entries, entry)
+        if position < len(self.entries) and self.entries[position] == entry:
+            del self.entries[position]
+
+    def suggest(self, prefix, limit=10):
+        """
+        Finds the movies whose title starts with a prefix.
+
+        Args:
+            prefix (str): What the user typed so far.
+            limit (int, optional): The maximum number of suggestions. Defaults to 10.
+
+        Returns:
+            list: Up to `limit` (MovieID, title) pairs in alphabetical order of title. Empty if the prefix is blank.
+        """
+        key = TitleIndex.normalize(prefix)
+        if not key or limit <= 0:
+            return []
+        matches = []
+        with self.lock:
+            position = bisect.bisect_left(self.entries, (key,))
+            while position < len(self.entries) and len(matches) < limit:
+                title, movieID = self.entries[position]
+                if not title.startswith(key):
+                    break
+                matches.append((movieID, self.titles[movieID]))
+                position += 1
+        return matches
+
+    def __len__(self):
+        """
+        Returns the number of indexed titles.
+        """
+        return len(self.entries)
@@ -0,0 +1,207 @@
+import functools
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+
+class Trace:
+    """
+    Represents one traced request.
+
+    Attributes:
+        traceId (str): The unique ID of the request.
+        name (str): The name of the request, e.g. "request".
+        startedAt (int): The `time.perf_counter_ns()` value when the trace was started.
+        spans (list): The finished spans as (name, start ns, end ns, thread ID) tuples.
+        args (dict): Extra details shown with every span, e.g. the command verb.
+    """
+    def __init__(self, traceId, name):
+        """
+        Initializes the Trace object.
+
+        Args:
+            traceId (str): The unique ID of the request.
+            name (str): The name of the request.
+        """
+        self.traceId = traceId
+        self.name = name
+        self.startedAt = time.perf_counter_ns()
+        self.spans = []
+        self.args = {}
+
+class Span:
+    """
+    Times a block of code and records it in a trace when the block ends. Used as a context manager.
+    """
+    __slots__ = ("trace", "name", "start")
+
+    def __init__(self, trace, name):
+        """
+        Initializes the Span object.
+
+        Args:
+            trace (Trace): The trace the span belongs to.
+            name (str): The name of the span, e.g. "MovieDAO.getMovieById".
+        """
+        self.trace = trace
+        self.name = name
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.trace.spans.append((self.name, self.start, time.perf_counter_ns(), threading.get_ident()))
+        return False
+
+class NoSpan:
+    """
+    A span that records nothing, returned when the current request is not sampled.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        return False
+
+NO_SPAN = NoSpan()
+
+class Tracer:
+    """
+    Records where the time of individual requests goes and exports it in Chrome trace-event format.
+
+    The server starts a trace when it accepts a connection (for a `sampleRate` share of the requests) and activates it on the
+    worker thread that serves the request. Every layer then wraps its work in `Tracer.span(...)` or decorates it with
+    `@Tracer.traced(...)`; both look up the active trace of the calling thread, so the trace does not have to be passed through
+    every call. Finished traces are kept in memory (the most recent `maxTraces`) until they are exported.
+
+    When a request is not sampled, a span costs one thread-local lookup and returns a shared no-op object, so tracing can stay
+    compiled in. Benchmarks/TracingBenchmark.py measures the overhead with sampling off and on.
+
+    This class only has static methods and class-level state, like `FileHandler`.
+    """
+    sampleRate = 0.0
+    maxTraces = 1000
+    traces = deque(maxlen=maxTraces)
+    current = threading.local()
+    lock = threading.Lock()
+
+    @staticmethod
+    def startTrace(name="request"):
+        """
+        Starts a trace for a new request if it is picked by sampling.
+
+        Args:
+            name (str, optional): The name of the request. Defaults to "request".
+
+        Returns:
+            Trace: The new trace, or None if the request is not sampled.
+        """
+        if Tracer.sampleRate <= 0.0 or random.random() >= Tracer.sampleRate:
+            return None
+        return Trace(os.urandom(8).hex(), name)
+
+    @staticmethod
+    def activate(trace):
+        """
+        Makes a trace the active trace of the calling thread.
+
+        Args:
+            trace (Trace): The trace, or None to deactivate tracing on this thread.
+        """
+        Tracer.current.trace = trace
+
+    @staticmethod
+    def finishTrace(trace):
+        """
+        Stores a finished trace for export and deactivates it on the calling thread.
+
+        Args:
+            trace (Trace): The trace, or None (nothing happens).
+        """
+        Tracer.current.trace = None
+        if trace is not None:
+            with Tracer.lock:
+                Tracer.traces.append(trace)
+
+    @staticmethod
+    def activeTrace():
+        """
+        Returns the active trace of the calling thread.
+
+        Returns:
+            Trace: The active trace, or None.
+        """
+        return getattr(Tracer.current, "trace", None)
+
+    @staticmethod
+    def span(name):
+        """
+        Creates a span in the active trace of the calling thread.
+
+        Args:
+            name (str): The name of the span.
+
+        Returns:
+            Span: A context manager that records the span, or a no-op one if there is no active trace.
+        """
+        trace = getattr(Tracer.current, "trace", None)
+        if trace is None:
+            return NO_SPAN
+        return Span(trace, name)
+
+    @staticmethod
+    def traced(name):
+        """
+        Decorator that records every call of a function as a span.
+
+        Args:
+            name (str): The name of the span, e.g. "MovieDAO.getMovieById".
+
+        Returns:
+            callable: The decorator.
+        """
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                trace = getattr(Tracer.current, "trace", None)
+                if trace is None:
+                    return function(*args, **kwargs)
+                with Span(trace, name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def exportChrome(fileName, clear=True):
+        """
+        Writes the finished traces to a JSON file that chrome://tracing or Perfetto can open.
+
+        Each span becomes a complete ("X") event on the thread that ran it; the trace ID and any trace details are in its args.
+
+        Args:
+            fileName (str): The file to write.
+            clear (bool, optional): True to forget the exported traces. Defaults to True.
+
+        Returns:
+            int: The number of traces exported.
+        """
+        with Tracer.lock:
+            traces = list(Tracer.traces)
+            if clear:
+                Tracer.traces.clear()
+        pid = os.getpid()
+        events = []
+        for trace in traces:
+            args = dict(trace.args, traceId=trace.traceId)
+            for name, start, end, threadID in trace.spans:
+                events.append({"name": name, "cat": trace.name, "ph": "X", "ts": start / 1000, "dur": (end - start) / 1000,
+                               "pid": pid, "tid": threadID, "args": args})
+        with open(fileName, 'w') as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+        return len(traces)
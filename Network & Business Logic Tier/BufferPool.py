@@ -0,0 +1,56 @@
+import threading
+
+class BufferPool:
+    """
+    Keeps preallocated receive buffers so requests do not allocate a new one each time.
+
+    A worker takes a buffer with `acquire`, fills it with `socket.recv_into` and gives it back with `release` once the data has
+    been parsed. At most `maxBuffers` idle buffers are kept; when the pool is empty a new buffer is allocated (and kept on release
+    if there is room), so the pool never blocks. Taking and returning buffers relies on `list.pop` and `list.append` being atomic
+    instead of a lock, which would cost more than the allocation it saves.
+
+    Attributes:
+        bufferSize (int): The size of each buffer in bytes.
+        maxBuffers (int): The maximum number of idle buffers kept.
+        idle (list): The buffers not in use.
+        allocated (int): The number of buffers allocated so far.
+    """
+    def __init__(self, bufferSize=1024, maxBuffers=64, preallocate=16):
+        """
+        Initializes the BufferPool object.
+
+        Args:
+            bufferSize (int, optional): The size of each buffer in bytes. Defaults to 1024, the largest request the server reads.
+            maxBuffers (int, optional): The maximum number of idle buffers kept. Defaults to 64.
+            preallocate (int, optional): The number of buffers allocated up front. Defaults to 16.
+        """
+        self.bufferSize = bufferSize
+        self.maxBuffers = maxBuffers
+        self.idle = [bytearray(bufferSize) for _ in range(min(preallocate, maxBuffers))]
+        self.allocated = len(self.idle)
+        self.lock = threading.Lock()  # Protects allocated
+
+    def acquire(self):
+        """
+        Takes a buffer from the pool, or allocates one if none is idle.
+
+        Returns:
+            bytearray: A buffer of `bufferSize` bytes. Its content is whatever the previous user left in it.
+        """
+        try:
+            return self.idle.pop()
+        except IndexError:
+            with self.lock:
+                self.allocated += 1
+            return bytearray(self.bufferSize)
+
+    def release(self, buffer):
+        """
+        Gives a buffer back to the pool. No memoryview of it may still be in use.
+
+        Args:
+            buffer (bytearray): The buffer from `acquire`.
+        """
+        #racing releases may keep a buffer or two more than maxBuffers, which is harmless
+        if len(self.idle) < self.maxBuffers:
+            self.idle.append(buffer)
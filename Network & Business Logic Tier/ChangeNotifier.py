@@ -0,0 +1,149 @@
+import queue
+import threading
+
+class Subscriber:
+    """
+    Represents one client that subscribed to movie change events.
+
+    Each subscriber owns a bounded queue. The server thread that serves the subscriber's connection drains the queue
+    and pushes the events to the socket, so a slow client only fills its own queue and never blocks the thread that
+    publishes the change.
+
+    Attributes:
+        movieIDs (set): The MovieIDs (as strings) this subscriber is interested in.
+        genreIDs (set): The GenreIDs (as strings) this subscriber is interested in.
+        events (queue.Queue): The bounded queue of pending event lines.
+        dropped (int): The number of events discarded because the queue was full.
+    """
+    def __init__(self, movieIDs, genreIDs, maxQueueSize):
+        """
+        Initializes a Subscriber object.
+
+        Args:
+            movieIDs (iterable): The MovieIDs to watch.
+            genreIDs (iterable): The GenreIDs to watch.
+            maxQueueSize (int): The maximum number of pending events kept for this subscriber.
+        """
+        self.movieIDs = set(str(movieID).strip() for movieID in movieIDs)
+        self.genreIDs = set(str(genreID).strip() for genreID in genreIDs)
+        self.events = queue.Queue(maxsize=maxQueueSize)
+        self.dropped = 0
+
+    def matches(self, movieID, genreID):
+        """
+        Checks whether a change on the given movie should be delivered to this subscriber.
+
+        Args:
+            movieID (str): The MovieID of the changed movie, or an empty string if unknown.
+            genreID (str): The GenreID of the changed movie, or an empty string if unknown.
+
+        Returns:
+            bool: True if the subscriber watches the movie or its genre.
+        """
+        return (movieID != "" and movieID in self.movieIDs) or (genreID != "" and genreID in self.genreIDs)
+
+    def offer(self, event):
+        """
+        Queues an event without blocking.
+
+        If the queue is full, the oldest pending event is discarded to make room, so the subscriber always
+        receives the most recent changes.
+
+        Args:
+            event (str): The event line to queue, or None to ask the serving thread to stop.
+        """
+        while True:
+            try:
+                self.events.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self.events.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+class ChangeNotifier:
+    """
+    Keeps track of the subscribed clients and fans out movie change events to them.
+
+    Events are plain text lines in the format "#event|action|movieID|genreID" where action is one of
+    "update", "insert" or "delete". An empty field means the value is not known for that change.
+
+    Attributes:
+        maxQueueSize (int): The size of the queue given to each new subscriber. Defaults to 100.
+        maxSubscribers (int): The most subscribers registered at once, or None for no limit. Each subscription holds a server
+                              thread for as long as it lasts, so the limit keeps threads free for other commands.
+                              Defaults to None.
+        subscribers (list): The currently registered `Subscriber` objects.
+        lock (threading.Lock): Protects the subscriber list.
+    """
+    def __init__(self, maxQueueSize=100, maxSubscribers=None):
+        """
+        Initializes the ChangeNotifier object.
+
+        Args:
+            maxQueueSize (int, optional): The size of each subscriber's queue. Defaults to 100.
+            maxSubscribers (int, optional): The most subscribers registered at once. Defaults to None (no limit).
+        """
+        self.maxQueueSize = maxQueueSize
+        self.maxSubscribers = maxSubscribers
+        self.subscribers = []
+        self.lock = threading.Lock()
+
+    def subscribe(self, movieIDs=(), genreIDs=()):
+        """
+        Registers a new subscriber.
+
+        Args:
+            movieIDs (iterable, optional): The MovieIDs to watch.
+            genreIDs (iterable, optional): The GenreIDs to watch.
+
+        Returns:
+            Subscriber: The registered subscriber, or None if `maxSubscribers` are already registered.
+        """
+        subscriber = Subscriber(movieIDs, genreIDs, self.maxQueueSize)
+        with self.lock:
+            if self.maxSubscribers is not None and len(self.subscribers) >= self.maxSubscribers:
+                return None
+            self.subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        """
+        Removes a subscriber. Removing a subscriber that is not registered has no effect.
+
+        Args:
+            subscriber (Subscriber): The subscriber to remove.
+        """
+        with self.lock:
+            if subscriber in self.subscribers:
+                self.subscribers.remove(subscriber)
+
+    def publish(self, action, movieID="", genreID=""):
+        """
+        Sends a change event to every subscriber watching the movie or its genre.
+
+        Args:
+            action (str): The kind of change ("update", "insert" or "delete").
+            movieID (str, optional): The MovieID of the changed movie. Defaults to "".
+            genreID (str, optional): The GenreID of the changed movie. Defaults to "".
+        """
+        movieID = str(movieID).strip()
+        genreID = str(genreID).strip()
+        event = f"#event|{action}|{movieID}|{genreID}"
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            if subscriber.matches(movieID, genreID):
+                subscriber.offer(event)
+
+    def close(self):
+        """
+        Wakes up every serving thread so the subscriptions end, e.g. when the server stops.
+        """
+        with self.lock:
+            subscribers = list(self.subscribers)
+            self.subscribers = []
+        for subscriber in subscribers:
+            subscriber.offer(None)
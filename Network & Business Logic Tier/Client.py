@@ -1,6 +1,11 @@
 
+import select
 import socket
+import time
 from Movie import Movie
+from GenreTable import GenreTable
+from ResponseCodec import ResponseCodec, FrameDecoder
+from ServerBalancer import ServerBalancer
 
 class Client:
     """
@@ -13,62 +18,354 @@ class Client:
     Attributes:
         clientSocket (socket.socket): The socket object used for network communication with the server. Initialized to None.
         clientGUI (GUIClient): An instance of the `GUIClient` class, used to update the user interface.
+        compression (str): The encoding offered to the server on each connection (e.g. "zlib"), or None to receive plain responses.
+        cache (ClientCache): The movies already received, reused or revalidated by later selects. None disables caching.
+        balancer (ServerBalancer): Chooses the server node for each request and ejects nodes that fail.
+        hedgeAfter (float): Seconds after which a "#select" that has not been answered is also sent to a second node; the first
+                            answer wins. None disables hedging.
+        timeout (float): Seconds to wait for a server to answer before giving up on it.
+        hedged (int): The number of selects that were hedged.
+        hedgeWins (int): The number of hedged selects answered first by the second node.
+        genres (GenreTable): The genre snapshot received from the server, or None before `getGenres` succeeded.
     """
-    def __init__(self, clientGUI):
+    def __init__(self, clientGUI, compression=None, cache=None, endpoints=None, strategy="p2c", hedgeAfter=None, timeout=10.0):
         """
         Initializes the `Client` object.
 
         Args:
             clientGUI (GUIClient): An instance of the `GUIClient` class that this client will interact with to update the UI.
+            compression (str, optional): The encoding to negotiate with the server, e.g. "zlib". Defaults to None.
+            cache (ClientCache, optional): A cache for selected movies. Defaults to None (every select goes to the server).
+            endpoints (list, optional): The server nodes, as (host, port) pairs or "host:port" strings. Defaults to None
+                                        (only 127.0.0.1:3202).
+            strategy (str, optional): How a node is chosen, "p2c" (power of two choices) or "least" (fewest outstanding
+                                      requests). Defaults to "p2c".
+            hedgeAfter (float, optional): Seconds before a slow "#select" is also sent to a second node. Defaults to None (off).
+            timeout (float, optional): Seconds to wait for a server to answer. Defaults to 10.0.
         """
         self.clientSocket = None
         self.clientGUI = clientGUI
+        self.compression = compression
+        self.cache = cache
+        self.balancer = ServerBalancer(endpoints if endpoints else [("127.0.0.1", 3202)], strategy)
+        self.hedgeAfter = hedgeAfter
+        self.timeout = timeout
+        self.hedged = 0
+        self.hedgeWins = 0
+        self.genres = None
 
     def sendCommand(self, command):
         """
         Sends a command to the movie database server.
 
-        This method first establishes a connection to the server, then encodes and sends the provided command. If the command is a "#select" command,
-        it waits for and processes the server's response, updating the GUI with the retrieved movie details. Finally, it disconnects from the server.
+        This method first establishes a connection to the server, then encodes and sends the provided command. If the command is a "#select",
+        "#update" or "#insert" command, it waits for and processes the server's response, updating the GUI with the movie details as stored by the
+        server (including the MovieID generated for an insert). Finally, it disconnects from the server.
+        The server node is chosen by `balancer` (see `request`).
+
+        With a cache, a "#select" for a movie received less than `cache.ttl` seconds ago is answered locally, and an older copy is
+        revalidated by sending its version; the server then answers "#notmodified" instead of the movie if it has not changed.
 
         Args:
             command (str): The command string to be sent to the server.
                            Commands are expected to be prefixed with a '#'(e.g., "#select|1", "#insert|...").
         """
         try:
-            #connect to the server
-            self.connectToServer()
-            #send the command to the server
-            self.clientSocket.sendall(command.encode())  # Send command to server
-            if command.startswith("#select"):
-                response = self.clientSocket.recv(1024).decode()  # Receive response from server up to 1024 bytes of data
-                if response:
+            cached = None
+            if self.cache is not None and command.startswith("#select"):
+                movieID = command.split("|")[1]
+                cached, version, fresh = self.cache.lookup(movieID)
+                if fresh:
+                    #recent enough, no need to ask the server
+                    self.cache.hits += 1
+                    self.clientGUI.updateGUI(cached)
+                    return
+                if cached:
+                    #ask the server to send the movie only if it changed
+                    command = f"{command}|v={version}"
+            #send the command to a server node and read its answer
+            expectsResponse = command.startswith(("#select", "#update", "#insert"))
+            response = self.request(command, expectsResponse)
+            if expectsResponse:
+                if response == "#notmodified" and cached:
+                    self.cache.revalidated += 1
+                    self.cache.confirm(cached.movieID)
+                    self.clientGUI.updateGUI(cached)
+                elif response == "Not found":
+                    print(f"No movie answers {command}")
+                elif response:
                     parts = response.split("|")
-                    if len(parts) == 6:
-                        movie = Movie(*parts)
-                self.clientGUI.updateGUI(movie)
-            #disconnect
-            self.disconnectFromServer()
+                    #a seventh field is the genre name, sent when the select asked for it with "g=name"
+                    if len(parts) in (6, 7):
+                        movie = Movie(*parts[:6])
+                        if self.cache is not None:
+                            self.cache.store(movie)
+                        self.clientGUI.updateGUI(movie)
+            elif command.startswith("#delete") and self.cache is not None:
+                self.cache.invalidate(command.split("|")[1])
         except Exception as e:
             print(f"Error sending command: {e}")
+
+    def request(self, command, expectsResponse=True):
+        """
+        Sends one command to a server node and returns its answer.
+
+        The node is chosen by `balancer`; nodes that cannot be reached are skipped. A "#select" that fails (connection lost,
+        timeout, no answer or "Server busy") is sent again to another node, since reading twice is harmless; other commands are
+        not repeated, as the first node may already have applied them. Only connection errors and timeouts count as failures
+        of a node: an answer, even "Not found", "Server busy" or none at all, shows the node is up. With `hedgeAfter`, a select is also sent to a second node
+        when the first is slow to answer (see `receiveHedged`).
+
+        Args:
+            command (str): The command string.
+            expectsResponse (bool, optional): True to wait for the answer. Defaults to True.
+
+        Returns:
+            str: The answer, or an empty string if none was expected.
+
+        Raises:
+            ConnectionError: If no server node could be reached.
+            OSError: If the request failed and could not be retried.
+        """
+        data = self.prepareCommand(command).encode()
+        isRead = command.startswith("#select")
+        tried = []
+        while True:
+            endpoint = self.connectToServer(exclude=tried)
+            started = time.monotonic()
+            try:
+                self.clientSocket.sendall(data)
+                if not expectsResponse:
+                    response = ""
+                elif isRead and self.hedgeAfter is not None:
+                    response = self.receiveHedged(self.clientSocket, data, tried + [endpoint])
+                else:
+                    response = self.receiveResponse(self.clientSocket)
+            except OSError as e:
+                self.balancer.finish(endpoint, False)
+                self.disconnectFromServer()
+                tried.append(endpoint)
+                if isRead and len(tried) < len(self.balancer.endpoints):
+                    print(f"Request to {endpoint} failed ({e}), trying another server.")
+                    continue
+                raise
+            self.balancer.finish(endpoint, True, time.monotonic() - started)
+            self.disconnectFromServer()
+            if isRead and response in ("", "Server busy") and len(tried) + 1 < len(self.balancer.endpoints):
+                #the node is overloaded (or dropped the request when its deadline passed) but healthy: try another without
+                #ejecting it
+                print(f"{endpoint} did not answer the request, trying another server.")
+                tried.append(endpoint)
+                continue
+            return response
+
+    def receiveHedged(self, sock, data, tried):
+        """
+        Reads the answer to a select, also sending the select to a second node if the first has not answered after `hedgeAfter`.
+
+        Whichever node starts answering first is read; the other connection is closed. Hedging trades a little extra load for a
+        shorter tail latency when one node is slow (e.g. busy with a long write or a garbage collection).
+
+        Args:
+            sock (socket.socket): The connection the select was sent on.
+            data (bytes): The request as sent.
+            tried (list): The nodes not to use for the hedge, including the first one.
+
+        Returns:
+            str: The answer.
+        """
+        ready, _, _ = select.select([sock], [], [], self.hedgeAfter)
+        if ready:
+            return self.receiveResponse(sock)
+        try:
+            hedgeSocket, hedgeEndpoint = self.balancer.connect(exclude=tried)
+        except ConnectionError:
+            return self.receiveResponse(sock)
+        self.hedged += 1
+        started = time.monotonic()
+        answered = False
+        try:
+            hedgeSocket.settimeout(self.timeout)
+            hedgeSocket.sendall(data)
+            ready, _, _ = select.select([sock, hedgeSocket], [], [], self.timeout)
+            if hedgeSocket in ready and sock not in ready:
+                response = self.receiveResponse(hedgeSocket)
+                if response:
+                    self.hedgeWins += 1
+                    answered = True
+                    return response
+        except OSError as e:
+            print(f"Hedged request to {hedgeEndpoint} failed: {e}")
+        finally:
+            hedgeSocket.close()
+            #a hedge that lost the race is not a failure of its node
+            self.balancer.finish(hedgeEndpoint, True, time.monotonic() - started if answered else None)
+        return self.receiveResponse(sock)
     
-    def connectToServer(self, host="127.0.0.1", port=3202):
+    def subscribe(self, movieIDs=(), genreIDs=(), host=None, port=None):
+        """
+        Subscribes to change events for some movies and/or genres and yields them as they arrive.
+
+        This method opens a dedicated long-lived connection (separate from `clientSocket`) and sends a "#subscribe" command.
+        The server then pushes one line per change after a successful update, insert or delete. Keep-alive lines sent by
+        the server are skipped. The connection is closed when the generator is closed or the server ends the stream; a server
+        that already serves its maximum of subscribers answers "Server busy" and ends it at once.
+
+        Args:
+            movieIDs (iterable, optional): The MovieIDs to watch.
+            genreIDs (iterable, optional): The GenreIDs to watch.
+            host (str, optional): The IP address or hostname of the server. Defaults to None (a node chosen by `balancer`).
+            port (int, optional): The port number on which the server is listening. Defaults to 3202 when a host is given.
+
+        Yields:
+            tuple: (action, movieID, genreID) for each change, e.g. ("update", "1", "4").
+                   movieID or genreID is an empty string when the server does not know it.
+        """
+        command = f"#subscribe|{','.join(str(movieID) for movieID in movieIDs)}|{','.join(str(genreID) for genreID in genreIDs)}"
+        endpoint = None
+        if host is None:
+            #the subscription counts as an outstanding request on its node for as long as it lasts
+            subscriptionSocket, endpoint = self.balancer.connect()
+            subscriptionSocket.settimeout(None)
+        else:
+            subscriptionSocket = socket.create_connection((host, port if port else 3202))
+        try:
+            subscriptionSocket.sendall(self.prepareCommand(command).encode())
+            decoder = FrameDecoder() if self.compression else None
+            buffer = ""
+            while True:
+                chunk = subscriptionSocket.recv(1024)
+                if not chunk:
+                    break
+                if decoder:
+                    buffer += b"".join(decoder.feed(chunk)).decode()
+                else:
+                    buffer += chunk.decode()
+                #a chunk may hold several events or only part of one
+                while "\n" in buffer:
+                    line, buffer = buffer.split("\n", 1)
+                    if line.startswith("#event"):
+                        parts = line.split("|")
+                        yield parts[1], parts[2], parts[3]
+        finally:
+            subscriptionSocket.close()
+            if endpoint:
+                self.balancer.finish(endpoint, True)
+
+    def suggest(self, prefix, limit=10):
+        """
+        Asks the server for the movies whose title starts with a prefix.
+
+        Args:
+            prefix (str): What the user typed so far.
+            limit (int, optional): The maximum number of suggestions. Defaults to 10.
+
+        Returns:
+            list: (MovieID, title) pairs in alphabetical order of title. Empty if nothing matches or the server cannot be reached.
+        """
+        #the prefix must not break the command format
+        prefix = prefix.replace("|", " ").replace("\n", " ")
+        try:
+            response = self.request(f"#suggest|{prefix}|{limit}")
+        except Exception as e:
+            print(f"Error getting suggestions: {e}")
+            return []
+        return [tuple(line.split("|", 1)) for line in response.splitlines() if "|" in line]
+
+    def getGenres(self):
+        """
+        Returns the genres, asking the server again only if they changed.
+
+        The first call fetches the snapshot. Later calls send the version of the cached snapshot, and the server answers
+        "#notmodified" unless its genres changed, so checking costs one short round trip.
+
+        Returns:
+            GenreTable: The current genres, or the cached snapshot (None if there is none) if the server cannot be reached.
+        """
+        command = f"#genres|v={self.genres.version}" if self.genres else "#genres"
+        try:
+            response = self.request(command)
+        except Exception as e:
+            print(f"Error getting genres: {e}")
+            return self.genres
+        if response and response != "#notmodified":
+            version, _, body = response.partition("\n")
+            genres = GenreTable.fromRecord(body)
+            #a snapshot that does not match its version was cut short and is not kept
+            if genres.version == version:
+                self.genres = genres
+        return self.genres
+
+    def prepareCommand(self, command):
+        """
+        Adds the "#accept-encoding" header line to a command when compression is enabled.
+
+        Args:
+            command (str): The command string.
+
+        Returns:
+            str: The text to send to the server.
+        """
+        if self.compression:
+            return f"{ResponseCodec.HEADER}|{self.compression}\n{command}"
+        return command
+
+    def receiveResponse(self, sock):
+        """
+        Reads a whole response from the server.
+
+        The server closes the connection after a response, so this method reads until the end of the stream. When
+        compression was negotiated the data is decoded frame by frame.
+
+        Args:
+            sock (socket.socket): The socket to read from.
+
+        Returns:
+            str: The response text.
+        """
+        decoder = FrameDecoder() if self.compression else None
+        chunks = []
+        while True:
+            chunk = sock.recv(4096)
+            if not chunk:
+                break
+            if decoder:
+                chunks.extend(decoder.feed(chunk))
+            else:
+                chunks.append(chunk)
+        return b"".join(chunks).decode()
+
+    def connectToServer(self, host=None, port=None, exclude=()):
         """
         Establishes a connection to the movie database server.
 
-        This method creates a socket object and attempts to connect to the specified host and port.
+        This method creates a socket object and attempts to connect to the specified host and port, or, when no host is given,
+        to the node chosen by `balancer` (trying the other nodes if it cannot be reached).
 
         Args:
-            host (str, optional): The IP address or hostname of the server. Defaults to "127.0.0.1" (localhost).
-            port (int, optional): The port number on which the server is listening. Defaults to 3202.
+            host (str, optional): The IP address or hostname of the server. Defaults to None (a node chosen by `balancer`).
+            port (int, optional): The port number on which the server is listening. Defaults to 3202 when a host is given.
+            exclude (iterable, optional): Nodes the balancer must not choose, e.g. ones that already failed. Defaults to none.
+
+        Returns:
+            ServerEndpoint: The node connected to, with the request counted as outstanding on it, or None if a host was given.
+
+        Raises:
+            ConnectionError: If no host was given and no node could be reached.
         """
+        if host is None:
+            self.clientSocket, endpoint = self.balancer.connect(exclude)
+            self.clientSocket.settimeout(self.timeout)
+            print(f"Connected to the server {endpoint}.")
+            return endpoint
         try:
             # Create a socket and connect to the server
             self.clientSocket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.clientSocket.connect((host, port))
+            self.clientSocket.connect((host, port if port else 3202))
             print("Connected to the server.")
         except Exception as e:
             print(f"Error connecting to server: {e}")
+        return None
     
     def disconnectFromServer(self):
         """
@@ -0,0 +1,83 @@
+import time
+from collections import OrderedDict
+
+class ClientCache:
+    """
+    Remembers the movies a client has already received, keyed by MovieID.
+
+    An entry younger than `ttl` seconds is used without asking the server at all. An older entry is revalidated: the client sends
+    the version it holds and the server answers "#notmodified" when nothing changed, which saves sending the movie again. The cache
+    holds at most `maxSize` movies and evicts the least recently used one first.
+
+    Attributes:
+        ttl (float): Seconds an entry is used without revalidation.
+        maxSize (int): The maximum number of movies kept.
+        entries (OrderedDict): MovieID (string) -> [movie, version, time it was last confirmed], least recently used first.
+        hits (int): Selects answered from the cache without contacting the server.
+        revalidated (int): Selects the server answered with "#notmodified".
+    """
+    def __init__(self, ttl=5.0, maxSize=200):
+        """
+        Initializes the ClientCache object.
+
+        Args:
+            ttl (float, optional): Seconds an entry is used without revalidation. Defaults to 5.0.
+            maxSize (int, optional): The maximum number of movies kept. Defaults to 200.
+        """
+        self.ttl = ttl
+        self.maxSize = maxSize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.revalidated = 0
+
+    def lookup(self, movieID):
+        """
+        Looks up a movie.
+
+        Args:
+            movieID (int or str): The MovieID.
+
+        Returns:
+            tuple: (movie, version, fresh) where fresh tells whether the entry is younger than `ttl`, or (None, None, False) if the
+                   movie is not cached.
+        """
+        key = str(movieID).strip()
+        entry = self.entries.get(key)
+        if entry is None:
+            return None, None, False
+        self.entries.move_to_end(key)
+        movie, version, confirmedAt = entry
+        return movie, version, time.monotonic() - confirmedAt < self.ttl
+
+    def store(self, movie):
+        """
+        Adds or replaces a movie received from the server.
+
+        Args:
+            movie (Movie): The movie.
+        """
+        key = str(movie.movieID).strip()
+        self.entries[key] = [movie, movie.version(), time.monotonic()]
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxSize:
+            self.entries.popitem(last=False)
+
+    def confirm(self, movieID):
+        """
+        Restarts the TTL of an entry after the server said it is still current.
+
+        Args:
+            movieID (int or str): The MovieID.
+        """
+        entry = self.entries.get(str(movieID).strip())
+        if entry is not None:
+            entry[2] = time.monotonic()
+
+    def invalidate(self, movieID):
+        """
+        Forgets a movie, e.g. after this client deleted it.
+
+        Args:
+            movieID (int or str): The MovieID.
+        """
+        self.entries.pop(str(movieID).strip(), None)
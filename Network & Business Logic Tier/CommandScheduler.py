@@ -0,0 +1,240 @@
+import threading
+import time
+from collections import deque
+
+class WorkerPool:
+    """
+    Represents one class of requests (e.g. reads or writes) with its own worker threads, queue limit and metrics.
+
+    Attributes:
+        name (str): The class of requests served, e.g. "read".
+        size (int): The number of worker threads.
+        queueLimit (int): The maximum number of requests waiting for a worker; further requests are rejected.
+        queue (collections.deque): The waiting requests as (task, time queued) pairs, oldest first.
+        condition (threading.Condition): Wakes the pool's idle workers. Shares the scheduler's lock.
+        idle (int): The number of workers waiting for a request.
+        active (int): The number of requests being served.
+        submitted (int): Requests accepted into the queue.
+        rejected (int): Requests refused because the queue was full.
+        completed (int): Requests served.
+        borrowed (int): Requests of another pool served by this pool's workers (see `CommandScheduler.readPriority`).
+        latencies (collections.deque): (seconds queued, seconds served) of the most recent requests, for percentiles.
+    """
+    def __init__(self, name, size, queueLimit, lock):
+        """
+        Initializes the WorkerPool object.
+
+        Args:
+            name (str): The class of requests served.
+            size (int): The number of worker threads.
+            queueLimit (int): The maximum number of waiting requests.
+            lock (threading.Lock): The scheduler's lock.
+        """
+        self.name = name
+        self.size = size
+        self.queueLimit = queueLimit
+        self.queue = deque()
+        self.condition = threading.Condition(lock)
+        self.idle = 0
+        self.active = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.borrowed = 0
+        self.latencies = deque(maxlen=1024)
+
+    def report(self):
+        """
+        Describes the pool's current state and latencies in one line.
+
+        Must be called with the scheduler's lock held.
+
+        Returns:
+            str: e.g. "read: workers=32 active=1 queued=0 submitted=10 completed=9 rejected=0 borrowed=0 wait p50/p99=0.1/0.4 ms
+                 service p50/p99=1.2/5.0 ms"
+        """
+        waits = sorted(wait for wait, _ in self.latencies)
+        services = sorted(service for _, service in self.latencies)
+        return (f"{self.name}: workers={self.size} active={self.active} queued={len(self.queue)} submitted={self.submitted} "
+                f"completed={self.completed} rejected={self.rejected} borrowed={self.borrowed} "
+                f"wait p50/p99={percentile(waits, 50):.1f}/{percentile(waits, 99):.1f} ms "
+                f"service p50/p99={percentile(services, 50):.1f}/{percentile(services, 99):.1f} ms")
+
+def percentile(values, percent):
+    """
+    Returns a percentile of sorted latencies, in milliseconds.
+
+    Args:
+        values (list): Sorted latencies in seconds.
+        percent (float): The percentile, 0 to 100.
+
+    Returns:
+        float: The latency in milliseconds, or 0 if there are no values.
+    """
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(len(values) * percent / 100))
+    return values[index] * 1000
+
+class CommandScheduler:
+    """
+    Runs requests on a separate worker pool per class of command, so slow requests of one class cannot delay another.
+
+    Each pool has its own threads and a bounded queue: a request submitted to a full queue is rejected at once rather than
+    waiting behind everything else. With `readPriority`, idle workers of the other pools also serve queued reads (never the
+    other way round), so cheap lookups get spare capacity first while writes keep their own workers.
+
+    Attributes:
+        pools (dict): Pool name -> `WorkerPool`, in the order the pools were added.
+        readPriority (bool): True to let idle workers of the other pools serve queued "read" requests. Defaults to False.
+        running (bool): False once `shutdown` was called; no more requests are accepted.
+    """
+    def __init__(self, readPriority=False):
+        """
+        Initializes the CommandScheduler object.
+
+        Args:
+            readPriority (bool, optional): True to let idle workers of the other pools serve queued reads. Defaults to False.
+        """
+        self.pools = {}
+        self.readPriority = readPriority
+        self.running = True
+        self.threads = []
+        self.lock = threading.Lock()
+
+    def addPool(self, name, size, queueLimit):
+        """
+        Adds a pool. Pools must be added before `start`.
+
+        Args:
+            name (str): The class of requests served, e.g. "read".
+            size (int): The number of worker threads.
+            queueLimit (int): The maximum number of waiting requests.
+
+        Returns:
+            WorkerPool: The new pool, e.g. to change its size before the scheduler starts.
+        """
+        pool = WorkerPool(name, size, queueLimit, self.lock)
+        self.pools[name] = pool
+        return pool
+
+    def start(self):
+        """
+        Starts the worker threads of every pool. Does nothing if they are already running.
+        """
+        with self.lock:
+            if self.threads:
+                return
+            self.running = True
+            for pool in self.pools.values():
+                for index in range(pool.size):
+                    thread = threading.Thread(target=self.work, args=(pool,), name=f"{pool.name}-{index}", daemon=True)
+                    self.threads.append(thread)
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, name, task):
+        """
+        Queues a request for a pool.
+
+        Args:
+            name (str): The pool, e.g. "write".
+            task (callable): Serves the request; called without arguments on one of the pool's workers.
+
+        Returns:
+            bool: True if the request was queued, False if the pool's queue is full or the scheduler was shut down.
+        """
+        pool = self.pools[name]
+        with self.lock:
+            if not self.running or len(pool.queue) >= pool.queueLimit:
+                pool.rejected += 1
+                return False
+            pool.queue.append((task, time.perf_counter()))
+            pool.submitted += 1
+            if pool.idle:
+                pool.condition.notify()
+            elif self.readPriority and name == "read":
+                #no read worker is free, so wake an idle worker of another pool
+                for other in self.pools.values():
+                    if other.idle:
+                        other.condition.notify()
+                        break
+        return True
+
+    def nextTask(self, pool):
+        """
+        Waits for the next request a worker of a pool should serve.
+
+        Args:
+            pool (WorkerPool): The worker's pool.
+
+        Returns:
+            tuple: (pool the request was queued in, task, time queued), or (None, None, None) once the scheduler is shut down
+                   and the queues the worker serves are empty.
+        """
+        order = [pool]
+        if self.readPriority and pool.name != "read" and "read" in self.pools:
+            order.append(self.pools["read"])
+        with self.lock:
+            while True:
+                for candidate in order:
+                    if candidate.queue:
+                        task, queuedAt = candidate.queue.popleft()
+                        candidate.active += 1
+                        if candidate is not pool:
+                            pool.borrowed += 1
+                        return candidate, task, queuedAt
+                if not self.running:
+                    return None, None, None
+                pool.idle += 1
+                pool.condition.wait()
+                pool.idle -= 1
+
+    def work(self, pool):
+        """
+        The loop of one worker thread: serves requests until the scheduler is shut down.
+
+        Args:
+            pool (WorkerPool): The worker's pool.
+        """
+        while True:
+            owner, task, queuedAt = self.nextTask(pool)
+            if task is None:
+                return
+            started = time.perf_counter()
+            try:
+                task()
+            except Exception as e:
+                print(f"Exception in {owner.name} worker: {e}")
+            finally:
+                finished = time.perf_counter()
+                with self.lock:
+                    owner.active -= 1
+                    owner.completed += 1
+                    owner.latencies.append((started - queuedAt, finished - started))
+
+    def report(self):
+        """
+        Describes every pool in one line each.
+
+        Returns:
+            str: The pool reports, separated by newlines.
+        """
+        with self.lock:
+            return "\n".join(pool.report() for pool in self.pools.values())
+
+    def shutdown(self, wait=True):
+        """
+        Stops accepting requests. The workers finish the requests already queued, then exit.
+
+        Args:
+            wait (bool, optional): True to wait for the workers to exit. Defaults to True.
+        """
+        with self.lock:
+            self.running = False
+            threads, self.threads = self.threads, []
+            for pool in self.pools.values():
+                pool.condition.notify_all()
+        if wait:
+            for thread in threads:
+                thread.join()
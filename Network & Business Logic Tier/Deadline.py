@@ -0,0 +1,91 @@
+import time
+
+class DeadlineExceeded(TimeoutError):
+    """
+    Raised when a request is still being worked on after its deadline has passed.
+    """
+    pass
+
+class Deadline:
+    """
+    Represents the point in time by which a request must be finished.
+
+    A deadline is created when the server accepts a connection and is handed down to `ProcessSQL`, the services and
+    the `MovieDAO` calls (as a query timeout), so every layer stops working on a request nobody is waiting for anymore.
+
+    Attributes:
+        expiresAt (float): The `time.monotonic()` value at which the deadline expires, or None for no deadline.
+    """
+    def __init__(self, seconds=None):
+        """
+        Initializes the Deadline object.
+
+        Args:
+            seconds (float, optional): The time allowed from now. Defaults to None (no deadline).
+        """
+        self.expiresAt = time.monotonic() + seconds if seconds is not None else None
+
+    def remaining(self):
+        """
+        Returns the time left before the deadline.
+
+        Returns:
+            float: The seconds left (never negative), or None if there is no deadline.
+        """
+        if self.expiresAt is None:
+            return None
+        return max(0.0, self.expiresAt - time.monotonic())
+
+    def expired(self):
+        """
+        Checks whether the deadline has passed.
+
+        Returns:
+            bool: True if the deadline has passed.
+        """
+        return self.expiresAt is not None and time.monotonic() >= self.expiresAt
+
+    def timeout(self, limit=None, stage=""):
+        """
+        Computes a timeout for a blocking operation that must also respect this deadline.
+
+        The result is never 0: `socket.settimeout(0)` would make the socket non-blocking and a query timeout of 0 means no
+        timeout at all, so a deadline that has run out raises instead.
+
+        Args:
+            limit (float, optional): The operation's own timeout in seconds. Defaults to None.
+            stage (str, optional): A description of the operation, used in the error message.
+
+        Returns:
+            float: The smaller of `limit` and the remaining time, or None if neither applies.
+
+        Raises:
+            DeadlineExceeded: If the deadline has passed.
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return limit
+        if remaining <= 0.0:
+            raise DeadlineExceeded(f"Request deadline exceeded {stage}".strip())
+        if limit is None:
+            return remaining
+        return min(limit, remaining)
+
+    def check(self, stage=""):
+        """
+        Raises `DeadlineExceeded` if the deadline has passed.
+
+        Args:
+            stage (str, optional): A description of the work about to start, used in the error message.
+
+        Raises:
+            DeadlineExceeded: If the deadline has passed.
+        """
+        if self.expired():
+            raise DeadlineExceeded(f"Request deadline exceeded {stage}".strip())
+
+    def cancel(self):
+        """
+        Removes the deadline, e.g. when a connection becomes a long-lived subscription.
+        """
+        self.expiresAt = None
@@ -0,0 +1,39 @@
+from Service import Service
+from Tracer import Tracer
+
+class GenreService(Service):
+    """
+    Handles requests for the genre list.
+
+    This class inherits from the `Service` abstract base class. Its `doWork` method answers from the server's `GenreTable`
+    snapshot; the database is not queried.
+
+    Attributes:
+        command (str): The command string. The expected format is "#genres", optionally followed by "|v=version" with the version
+                       of the snapshot the client already holds.
+        genres (GenreTable): The server's genre snapshot.
+    """
+    def __init__(self, command, genres):
+        """
+        Initializes the GenreService object.
+
+        Args:
+            command (str): The genres command.
+            genres (GenreTable): The genre snapshot to answer from.
+        """
+        super().__init__(command)
+        self.genres = genres
+
+    @Tracer.traced("GenreService.doWork")
+    def doWork(self):
+        """
+        Returns the genre snapshot, unless the client already holds the current version.
+
+        Returns:
+            str: "#notmodified", or the version on the first line followed by one "GenreID|GenreName" line per genre.
+        """
+        #get the options, e.g. the version known by the client
+        options = dict(part.split("=", 1) for part in self.command.split("|")[1:] if "=" in part)
+        if options.get("v") == self.genres.version:
+            return "#notmodified"
+        return f"{self.genres.version}\n{self.genres.writeAsRecord()}"
@@ -4,6 +4,13 @@ from SQLUpdateService import SQLUpdateService
 from SQLInsertService import SQLInsertService
 from SQLDeleteService import SQLDeleteService
 from SaveLogsService import SaveLogsService
+from SubscribeService import SubscribeService
+from SuggestService import SuggestService
+from GenreService import GenreService
+from ProfileService import ProfileService
+from ResponseCodec import ResponseCodec
+from Deadline import Deadline, DeadlineExceeded
+from Tracer import Tracer
 
 class ProcessSQL:
     """
@@ -15,56 +22,155 @@ class ProcessSQL:
     Attributes:
         data (str): The data (command string) received from the client.
         clientSocket (socket.socket): The socket object used to communicate with the client.
+        server (Server): The server that accepted the connection, used to reach shared objects such as its `ChangeNotifier`.
+                         May be None.
+        codec (ResponseCodec): The codec negotiated with the client, or None if the client did not ask for framed responses.
+        deadline (Deadline): The time by which the request must be answered.
     """
-    def __init__(self, clientSocket):
+    #framed bodies at least this large are sent with sendmsg instead of being copied behind the frame header;
+    #below it joining is cheaper than the extra memoryviews (see Benchmarks/AllocationBenchmark.py)
+    SCATTER_THRESHOLD = 4096
+
+    def __init__(self, clientSocket, server=None, deadline=None):
         """
         Initializes the `ProcessSQL` object.
 
         Args:
             clientSocket (socket.socket): The socket object for communicating with the client.  The constructor receives data from the client using
                                          this socket.
+            server (Server, optional): The server that accepted the connection. Defaults to None.
+            deadline (Deadline, optional): The deadline of the request. Defaults to None (no deadline).
+
+        Raises:
+            socket.timeout: If the client sends nothing within the server's read timeout.
+            DeadlineExceeded: If the deadline passed before any data was read.
         """
-        self.data = clientSocket.recv(1024).decode()
+        self.deadline = deadline if deadline else Deadline()
+        #never wait longer than the read timeout or the request deadline for the client to speak
+        clientSocket.settimeout(self.deadline.timeout(server.readTimeout if server else None, "before reading the request"))
+        #read into a pooled buffer and decode only the command, once
+        bufferPool = server.bufferPool if server else None
+        buffer = bufferPool.acquire() if bufferPool else bytearray(1024)
+        try:
+            with Tracer.span("ProcessSQL.receive"):
+                size = clientSocket.recv_into(buffer)
+            #strip the optional "#accept-encoding" header before the command
+            threshold = server.compressionThreshold if server else 512
+            self.codec, self.data = ResponseCodec.negotiateBuffer(buffer, size, threshold)
+        finally:
+            if bufferPool:
+                bufferPool.release(buffer)
         self.clientSocket = clientSocket
+        self.server = server
+        self.notifier = server.notifier if server else None
+        self.cache = server.cache if server else None
+        self.titleIndex = server.titleIndex if server else None
+        self.genres = server.genres if server else None
+        trace = Tracer.activeTrace()
+        if trace is not None:
+            trace.args["command"] = self.data.split("|", 1)[0]
     
+    @Tracer.traced("ProcessSQL.process")
     def process(self):
         """
         Processes the command and returns a result.
 
         This method parses the command, calls the appropriate service class (e.g., `SQLSelectService`, `SQLUpdateService`), and handles sending
-        responses to the client for SELECT commands.  It also calls the `SaveLogsService` to log the command.
+        responses to the client for SELECT, UPDATE and INSERT commands (the latter two answer with the row as stored).  It also calls the
+        `SaveLogsService` to log the command.
 
         Returns:
             str: The content to be logged by the server.  This is typically the command that was processed.
+
+        Raises:
+            DeadlineExceeded: If the request's deadline passed before the work was done. The command is not logged in that case.
+                              Once an update or insert has committed the deadline is dropped, so its row is always sent
+                              and the command always logged.
         """
         #process based on type of request
         if self.data.startswith("#select"):
-            selectService = SQLSelectService(self.data)
+            selectService = SQLSelectService(self.data, self.deadline, self.cache, self.genres)
             
             try:
                 response = selectService.doWork()
                 #send the response back to the client
-                self.clientSocket.sendall(response.encode())
+                self.sendResponse(response)
                 print("Sent response back to client")
+            except DeadlineExceeded:
+                raise
             except Exception as e:
                 print(f"[ERROR] Exception during SQL processing: {e}")
+                #a read is always answered; an empty reply would look like a failed server to the client
+                self.sendResponse("Bad request")
         elif self.data.startswith("#update"):
-            updateService = SQLUpdateService(self.data)
+            updateService = SQLUpdateService(self.data, self.deadline)
             try:
-                updateService.doWork()
+                movie = updateService.doWork()
                 print("Updated the database")
+                #the change is committed, so the cache, the subscribers, the client and the log must all hear of it: from
+                #here on only the write timeout applies, since a client left without a reply would retry and write again
+                self.deadline.cancel()
+                if movie:
+                    self.onMovieChanged("update", movie.movieID, movie.genreID, movie.title)
+                #send the updated row back so the client does not need another select
+                self.sendMovie(movie)
+            except DeadlineExceeded:
+                raise
             except Exception as e:
                 print(f"[ERROR] Exception during SQL processing: {e}")
         elif self.data.startswith("#insert"):
-            insertService = SQLInsertService(self.data)
-            insertService.doWork()
-            print("Inserted a movie to the database")                 
+            insertService = SQLInsertService(self.data, self.deadline)
+            try:
+                movie = insertService.doWork()
+                print("Inserted a movie to the database")
+                #committed, as for an update
+                self.deadline.cancel()
+                if movie:
+                    self.onMovieChanged("insert", movie.movieID, movie.genreID, movie.title)
+                #send the new row, with its generated MovieID, back to the client
+                self.sendMovie(movie)
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                print(f"[ERROR] Exception during SQL processing: {e}")
         elif self.data.startswith("#delete"):
-            deleteService = SQLDeleteService(self.data)
-            deleteService.doWork()
-            print("Deleted a movie to the database")
+            deleteService = SQLDeleteService(self.data, self.deadline)
+            movie = deleteService.doWork()
+            #only a movie that existed is a change worth publishing
+            if movie:
+                print("Deleted a movie to the database")
+                self.onMovieChanged("delete", movie.movieID, movie.genreID)
+        elif self.data.startswith("#subscribe") and self.notifier:
+            #a subscription is meant to stay open, so it is not bound by the request deadline
+            self.deadline.cancel()
+            subscribeService = SubscribeService(self.data, self.sendResponse, self.notifier)
+            #blocks until the client disconnects or the server stops
+            dropped = subscribeService.doWork()
+            if dropped is None:
+                print("Subscription rejected: too many subscribers")
+                if self.server:
+                    self.server.countEvent("rejected")
+            else:
+                print(f"Subscription ended ({dropped} events dropped)")
+        elif self.data.startswith("#suggest") and self.titleIndex is not None:
+            suggestService = SuggestService(self.data, self.titleIndex)
+            self.sendResponse(suggestService.doWork())
+            #suggestions are requested as the user types, so they are not written to the query log
+            return self.data
+        elif self.data.startswith("#genres") and self.genres is not None:
+            genreService = GenreService(self.data, self.genres)
+            self.sendResponse(genreService.doWork())
+            #reference data, fetched when a client starts, is not worth logging either
+            return self.data
+        elif self.data.startswith("#profile") and self.server:
+            #sampling may take longer than a request is allowed to
+            self.deadline.cancel()
+            profileService = ProfileService(self.data, self.server.profiler, self.server.profileDir)
+            self.sendResponse(profileService.doWork())
+        elif self.data.startswith("#stats") and self.server:
+            self.sendResponse(self.server.statsReport())
         else:
-            self.clientSocket.sendall("Unknown command".encode())
+            self.sendResponse("Unknown command")
         
         #handle saving and displaying logs
         saveService = SaveLogsService(self.data)
@@ -72,6 +178,81 @@ class ProcessSQL:
         #return this information to update the logs to server GUI
         return content
 
+    @Tracer.traced("ProcessSQL.sendResponse")
+    def sendResponse(self, response):
+        """
+        Sends a response to the client, framed and compressed if a codec was negotiated.
+
+        Args:
+            response (str): The response text.
+
+        Raises:
+            DeadlineExceeded: If the deadline passed before the response could be sent.
+        """
+        body = response.encode()
+        #a client that stops reading must not hold the worker forever
+        self.clientSocket.settimeout(self.deadline.timeout(self.server.writeTimeout if self.server else None,
+                                                           "before sending the response"))
+        if not self.codec:
+            self.clientSocket.sendall(body)
+        elif len(body) >= self.SCATTER_THRESHOLD:
+            self.sendBuffers(self.codec.encodeParts(body))
+        else:
+            self.clientSocket.sendall(self.codec.encode(body))
+
+    def sendBuffers(self, buffers):
+        """
+        Sends several buffers as one message with `socket.sendmsg` (scatter-gather), so they are not joined into a new bytes
+        object first. Where `sendmsg` is not available (Windows) the buffers are joined and sent with `sendall`.
+
+        Args:
+            buffers (list): The bytes objects to send, in order.
+        """
+        if not hasattr(self.clientSocket, "sendmsg"):
+            self.clientSocket.sendall(b"".join(buffers))
+            return
+        views = [memoryview(buffer) for buffer in buffers if len(buffer)]
+        while views:
+            sent = self.clientSocket.sendmsg(views)
+            #drop what was sent; a partial send may end in the middle of a buffer
+            while views and sent >= len(views[0]):
+                sent -= len(views.pop(0))
+            if views and sent:
+                views[0] = views[0][sent:]
+
+    def sendMovie(self, movie):
+        """
+        Sends a movie to the client in the same format as a select response.
+
+        Args:
+            movie (Movie): The movie to send, or None to answer "Not found".
+        """
+        self.sendResponse(movie.writeAsRecord() if movie else "Not found")
+
+    def onMovieChanged(self, action, movieID, genreID, title=None):
+        """
+        Keeps the server's shared state in line with a movie that has just changed.
+
+        The changed movie is dropped from the cache so the next select reads it again, its title is updated in the title index,
+        and the subscribed clients are notified.
+        Does nothing when the processor was created without a server.
+
+        Args:
+            action (str): The kind of change ("update", "insert" or "delete").
+            movieID (str): The MovieID of the changed movie, or an empty string if unknown.
+            genreID (str): The GenreID of the changed movie, or an empty string if unknown.
+            title (str, optional): The new title of an updated or inserted movie. Defaults to None.
+        """
+        if self.cache is not None and movieID:
+            self.cache.invalidate(movieID)
+        if self.titleIndex is not None and movieID:
+            if action == "delete":
+                self.titleIndex.remove(movieID)
+            elif title is not None:
+                self.titleIndex.add(movieID, title)
+        if self.notifier:
+            self.notifier.publish(action, movieID, genreID)
+
 
         
 
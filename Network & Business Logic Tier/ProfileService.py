@@ -0,0 +1,104 @@
+import os
+from Service import Service
+
+class ProfileService(Service):
+    """
+    Handles requests to profile the server while it runs.
+
+    This class inherits from the `Service` abstract base class. Its `doWork` method samples the stacks of the server's threads
+    with a `StackSampler` for a number of seconds and answers with the collapsed stacks, ready for flamegraph.pl or speedscope,
+    or writes them to a file in `profileDir` and answers with a summary.
+
+    Attributes:
+        command (str): The command string. The expected format is "#profile|seconds|intervalMs|fileName", where every field is
+                       optional: "#profile" samples for 5 s every 10 ms and answers with the stacks.
+        sampler (StackSampler): The server's sampler; only one profile runs at a time.
+        profileDir (str): The directory profiles are written to.
+    """
+    DEFAULT_SECONDS = 5.0
+    MAX_SECONDS = 60.0
+    DEFAULT_INTERVAL_MS = 10.0
+    MIN_INTERVAL_MS = 1.0
+
+    def __init__(self, command, sampler, profileDir="Profiles"):
+        """
+        Initializes the ProfileService object.
+
+        Args:
+            command (str): The profile command.
+            sampler (StackSampler): The sampler to profile with.
+            profileDir (str, optional): The directory profiles are written to. Defaults to "Profiles".
+        """
+        super().__init__(command)
+        self.sampler = sampler
+        self.profileDir = profileDir
+
+    def parseNumber(self, parts, index, default, low, high, name):
+        """
+        Reads one numeric field of the command.
+
+        Args:
+            parts (list): The fields of the command.
+            index (int): The position of the field.
+            default (float): The value if the field is missing or empty.
+            low (float): The smallest value allowed.
+            high (float): The largest value allowed.
+            name (str): The name of the field, used in the error message.
+
+        Returns:
+            float: The value.
+
+        Raises:
+            ValueError: If the field is not a number or lies outside [low, high]; "nan" and "inf" are rejected too.
+        """
+        if len(parts) <= index or not parts[index].strip():
+            return default
+        value = float(parts[index])
+        #nan fails both comparisons, so it is rejected with everything out of range
+        if not low <= value <= high:
+            raise ValueError(f"{name} must be between {low:g} and {high:g}")
+        return value
+
+    def doWork(self):
+        """
+        Profiles the server and returns the result.
+
+        The duration must be above 0 and at most `MAX_SECONDS` and the interval at least `MIN_INTERVAL_MS`, so a profile
+        cannot tie up its worker indefinitely or slow the server down noticeably. Only the base name of the file is used, so
+        profiles are always written inside `profileDir`.
+
+        Returns:
+            str: The collapsed stacks, or a summary if they were written to a file or if no thread was busy while sampling.
+                 "Profiler busy" if a profile is already running, or a message starting with "Invalid profile" for bad values.
+        """
+        parts = self.command.split("|")
+        try:
+            seconds = self.parseNumber(parts, 1, self.DEFAULT_SECONDS, 0.001, self.MAX_SECONDS, "seconds")
+            intervalMs = self.parseNumber(parts, 2, self.DEFAULT_INTERVAL_MS, self.MIN_INTERVAL_MS, seconds * 1000, "intervalMs")
+        except ValueError as e:
+            return f"Invalid profile: {e}"
+        fileName = os.path.basename(parts[3].strip()) if len(parts) > 3 else ""
+        if fileName in (".", ".."):
+            return f"Invalid profile: {fileName} is not a file name"
+
+        print(f"Profiling for {seconds:g} s every {intervalMs:g} ms")
+        result = self.sampler.profile(seconds, intervalMs / 1000)
+        if result is None:
+            return "Profiler busy"
+        stacks, samples, overhead = result
+        summary = (f"{samples} samples, {sum(stacks.values())} busy thread stacks, {len(stacks)} distinct, "
+                   f"sampler overhead {overhead:.2%}")
+        print(f"Profile done: {summary}")
+        if not stacks:
+            #an idle server has nothing to draw; say so rather than answer with an empty body
+            return f"No samples: no thread was busy while profiling ({summary})"
+        if not fileName:
+            return self.sampler.collapse(stacks)
+        path = os.path.join(self.profileDir, fileName)
+        try:
+            os.makedirs(self.profileDir, exist_ok=True)
+            with open(path, 'w') as file:
+                file.write(self.sampler.collapse(stacks))
+        except OSError as e:
+            return f"{summary}, not written: {e}"
+        return f"{summary}, written to {path}"
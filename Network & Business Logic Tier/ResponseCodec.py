@@ -0,0 +1,171 @@
+import struct
+import zlib
+
+class ResponseCodec:
+    """
+    Frames and optionally compresses the responses sent on one connection.
+
+    A client asks for compression by sending the header line "#accept-encoding|zlib" before its command. Once a
+    codec has been negotiated every response on the connection is sent as a frame: a one byte flag ('R' for raw,
+    'Z' for zlib), the body length as a 4 byte big-endian integer and the body. Only bodies of at least `threshold`
+    bytes are compressed, since compressing a short row costs more CPU than it saves on the wire.
+
+    The same compressor object is reused for the whole connection and each frame is finished with a sync flush,
+    so later frames can refer back to the data of earlier ones. The server answers one command per connection, so this
+    only pays off for the event stream of a "#subscribe" connection; a select, search or genre list is a single frame
+    compressed from a fresh context, and the context is not kept across connections.
+
+    Attributes:
+        encoding (str): The negotiated encoding, "zlib" or "identity".
+        threshold (int): The minimum body size in bytes that gets compressed.
+        compressor (zlib.Compress): The compressor context reused for every frame.
+    """
+    HEADER = "#accept-encoding"
+    HEADER_BYTES = HEADER.encode()
+    SUPPORTED = ("zlib",)
+
+    def __init__(self, encoding="zlib", threshold=512, level=6):
+        """
+        Initializes the ResponseCodec object.
+
+        Args:
+            encoding (str, optional): The encoding to use, "zlib" or "identity". Defaults to "zlib".
+            threshold (int, optional): The minimum body size in bytes that gets compressed. Defaults to 512.
+            level (int, optional): The zlib compression level. Defaults to 6.
+        """
+        self.encoding = encoding
+        self.threshold = threshold
+        self.compressor = zlib.compressobj(level) if encoding == "zlib" else None
+
+    @staticmethod
+    def negotiate(data, threshold=512, level=6):
+        """
+        Extracts the optional "#accept-encoding" header line from the data received from a client.
+
+        Args:
+            data (str): The data received from the client.
+            threshold (int, optional): The compression threshold for the new codec. Defaults to 512.
+            level (int, optional): The zlib compression level for the new codec. Defaults to 6.
+
+        Returns:
+            tuple: (codec, command) where codec is a `ResponseCodec`, or None if the client did not send the header,
+                   and command is the data without the header line.
+        """
+        if not data.startswith(ResponseCodec.HEADER) or "\n" not in data:
+            return None, data
+        header, command = data.split("\n", 1)
+        return ResponseCodec.fromHeader(header, threshold, level), command
+
+    @staticmethod
+    def negotiateBuffer(buffer, size, threshold=512, level=6):
+        """
+        Same as `negotiate`, but for data still in a receive buffer.
+
+        The header is recognized and split off on the bytes, and only the header and the command are decoded, so the data is
+        never decoded as a whole and then split again. The buffer is searched in place; memoryviews are not used because for
+        requests this small creating one costs more than copying the few bytes decoded.
+
+        Args:
+            buffer (bytearray): The buffer filled with `recv_into`, e.g. from a `BufferPool`.
+            size (int): The number of bytes received.
+            threshold (int, optional): The compression threshold for the new codec. Defaults to 512.
+            level (int, optional): The zlib compression level for the new codec. Defaults to 6.
+
+        Returns:
+            tuple: (codec, command) as for `negotiate`.
+        """
+        newline = buffer.find(b"\n", 0, size) if buffer.startswith(ResponseCodec.HEADER_BYTES, 0, size) else -1
+        if newline < 0:
+            return None, buffer[:size].decode()
+        codec = ResponseCodec.fromHeader(buffer[:newline].decode(), threshold, level)
+        return codec, buffer[newline + 1:size].decode()
+
+    @staticmethod
+    def fromHeader(header, threshold=512, level=6):
+        """
+        Creates the codec for an "#accept-encoding" header line, picking the first supported encoding offered.
+
+        Args:
+            header (str): The header line without its newline, e.g. "#accept-encoding|zlib".
+            threshold (int, optional): The compression threshold for the new codec. Defaults to 512.
+            level (int, optional): The zlib compression level for the new codec. Defaults to 6.
+
+        Returns:
+            ResponseCodec: The codec; its encoding is "identity" if no offered encoding is supported.
+        """
+        parts = header.split("|")
+        offered = parts[1].split(",") if len(parts) > 1 else []
+        encoding = "identity"
+        for candidate in offered:
+            if candidate.strip() in ResponseCodec.SUPPORTED:
+                encoding = candidate.strip()
+                break
+        return ResponseCodec(encoding, threshold, level)
+
+    def encode(self, body):
+        """
+        Builds the frame for one response body.
+
+        Args:
+            body (bytes): The response body.
+
+        Returns:
+            bytes: The framed (and possibly compressed) body.
+        """
+        return b"".join(self.encodeParts(body))
+
+    def encodeParts(self, body):
+        """
+        Builds the frame for one response body as separate pieces, so it can be sent with `socket.sendmsg` without first
+        copying the body behind the frame header.
+
+        Args:
+            body (bytes): The response body.
+
+        Returns:
+            list: The frame header (5 bytes) followed by the body pieces.
+        """
+        if self.compressor and len(body) >= self.threshold:
+            pieces = [self.compressor.compress(body), self.compressor.flush(zlib.Z_SYNC_FLUSH)]
+            flag = b"Z"
+        else:
+            pieces = [body]
+            flag = b"R"
+        return [flag + struct.pack(">I", sum(len(piece) for piece in pieces))] + pieces
+
+class FrameDecoder:
+    """
+    Decodes the frames produced by a `ResponseCodec` on the client side.
+
+    Data can be fed in arbitrary chunks; complete frames are returned as soon as they are available. Like the
+    compressor, the decompressor context is kept for the whole connection.
+    """
+    def __init__(self):
+        """
+        Initializes the FrameDecoder object.
+        """
+        self.buffer = b""
+        self.decompressor = zlib.decompressobj()
+
+    def feed(self, chunk):
+        """
+        Adds received data and returns the bodies of all frames completed by it.
+
+        Args:
+            chunk (bytes): The data received from the socket.
+
+        Returns:
+            list: The decoded bodies (bytes), in order.
+        """
+        self.buffer += chunk
+        bodies = []
+        while len(self.buffer) >= 5:
+            size = struct.unpack(">I", self.buffer[1:5])[0]
+            if len(self.buffer) < 5 + size:
+                break
+            flag, body = self.buffer[:1], self.buffer[5:5 + size]
+            self.buffer = self.buffer[5 + size:]
+            if flag == b"Z":
+                body = self.decompressor.decompress(body)
+            bodies.append(body)
+        return bodies
@@ -1,5 +1,6 @@
 from Service import Service
 import MovieDAO
+from Tracer import Tracer
 
 class SQLDeleteService(Service):
     """
@@ -10,9 +11,10 @@ class SQLDeleteService(Service):
     `MovieDAO` module to interact with the database.
     """
     
-    def __init__(self, command):
-        super().__init__(command)
+    def __init__(self, command, deadline=None):
+        super().__init__(command, deadline)
     
+    @Tracer.traced("SQLDeleteService.doWork")
     def doWork(self):
         """
         Deletes movie data from the database.
@@ -20,10 +22,14 @@ class SQLDeleteService(Service):
         This method parses the command string to extract the MovieID,
         and calls the `MovieDAO.deleteAMovie()` method to delete the
         corresponding record from the database.
+
+        Returns:
+            Movie: The deleted movie, or None if no movie had that MovieID.
         """
         #split the command
         parts = self.command.split("|")
         #get the movieID
         movieID = parts[1]
         #query the database to delete the movie by ID
-        MovieDAO.deleteAMovie(movieID)
+        self.checkDeadline("before delete")
+        return MovieDAO.deleteAMovie(movieID, timeout=self.queryTimeout())
@@ -1,5 +1,6 @@
 from Service import Service
 import MovieDAO
+from Tracer import Tracer
 from Movie import Movie
 
 class SQLInsertService(Service):
@@ -11,10 +12,11 @@ class SQLInsertService(Service):
     `MovieDAO` module to interact with the database.
     """
     #constructor
-    def __init__(self, command):
-        super().__init__(command)
+    def __init__(self, command, deadline=None):
+        super().__init__(command, deadline)
     
     #override doWork()
+    @Tracer.traced("SQLInsertService.doWork")
     def doWork(self):
         """
         Inserts new movie data into the database.
@@ -22,10 +24,14 @@ class SQLInsertService(Service):
         This method parses the command string to extract the movie data,
         creates a `Movie` object, and calls the `MovieDAO.insertAMovie()`
         method to add the new record to the database.
+
+        Returns:
+            Movie: The inserted movie with the MovieID generated by the database, or None if the insert failed.
         """
         #split the command
         parts = self.command.split("|")
         #create a movie
         movie = Movie(parts[1], parts[2], parts[3], parts[4], parts[5], parts[6])
         #call a MovieDAO method to update the database
-        MovieDAO.insertAMovie(movie)
\ No newline at end of file
+        self.checkDeadline("before insert")
+        return MovieDAO.insertAMovie(movie, timeout=self.queryTimeout())
\ No newline at end of file
@@ -1,5 +1,6 @@
 from Service import Service
 import MovieDAO
+from Tracer import Tracer
 
 class SQLSelectService(Service):
     """
@@ -11,30 +12,67 @@ class SQLSelectService(Service):
 
     Attributes:
         command (str):  The command string containing the MovieID to select.
-                        The expected format is "#select|MovieID".
+                        The expected format is "#select|MovieID", optionally followed by "|key=value" options:
+                        "v=version" makes the select conditional (see `doWork`), "g=name" adds the genre name.
+        cache (MovieCache): The server's movie cache, checked before the database. May be None.
+        genres (GenreTable): The server's genre snapshot, used to name the genre without a join. May be None.
     """
-    def __init__(self, command):
-        super().__init__(command)
+    def __init__(self, command, deadline=None, cache=None, genres=None):
+        super().__init__(command, deadline)
+        self.cache = cache
+        self.genres = genres
     
+    @Tracer.traced("SQLSelectService.doWork")
     def doWork(self):
         """
         Retrieves movie data from the database and formats it as a string.
 
         This method parses the command string to extract the MovieID,
-        uses the `MovieDAO.getMovieById()` method to fetch the movie data,
-        and formats the movie attributes into a string separated by '|'.
+        looks the movie up in the cache or else uses the `MovieDAO.getMovieById()` method to fetch the movie data
+        (and caches it), and formats the movie attributes into a string separated by '|'. Cache misses are read from the
+        replicas like any other select; a copy cached from a lagging replica is served at most until its entry expires (see
+        `MovieCache.ttl`).
+
+        If the command carries the version the client already holds ("v=..." option, see `Movie.version()`) and the movie has not
+        changed since, only "#notmodified" is returned so the client can keep using its copy.
+
+        With the "g=name" option the genre name, looked up in the genre snapshot, is added as a seventh field.
 
         Returns:
             str: A string containing the movie data in the format
-                 "title|director|yearReleased|description|genreID|movieID".
+                 "title|director|yearReleased|description|genreID|movieID" (followed by "|genreName" with "g=name"),
+                 "#notmodified", "Not found" if no movie has the MovieID, or "Server busy" if the database failed or the
+                 query timed out, which the client retries on another node.
         """
         #split the command
         parts = self.command.split("|")
         #get the movieID
         movieID = parts[1]
-        #query the database to get the movie by ID
-        movie = MovieDAO.getMovieById(movieID)
+        #get the options, e.g. the version known by the client
+        options = dict(part.split("=", 1) for part in parts[2:] if "=" in part)
+        #try the cache first
+        movie = self.cache.get(movieID) if self.cache is not None else None
+        if movie is None:
+            generation = self.cache.generation if self.cache is not None else None
+            #query the database to get the movie by ID
+            self.checkDeadline("before select")
+            try:
+                movie = MovieDAO.getMovieById(movieID, timeout=self.queryTimeout())
+            except MovieDAO.DatabaseErrors:
+                #not "Not found": the movie may well exist, and this answer lets the client try again
+                return "Server busy"
+            self.checkDeadline("after select")
+            if self.cache is not None:
+                self.cache.put(movie, generation)
+        #answer explicitly, so the client can tell a missing movie from a server that did not answer
+        if movie is None:
+            return "Not found"
+        #the client's copy is still current, no need to send the movie again
+        if options.get("v") == movie.version():
+            return "#notmodified"
         #create the command string
-        response = f"{movie.title}|{movie.director}|{movie.yearReleased}|{movie.description}|{movie.genreID}|{movie.movieID}"
+        response = movie.writeAsRecord()
+        if options.get("g") == "name" and self.genres is not None:
+            response += f"|{self.genres.name(movie.genreID)}"
         return response
 
@@ -1,5 +1,6 @@
 from Service import Service
 import MovieDAO
+from Tracer import Tracer
 from Movie import Movie
 
 class SQLUpdateService(Service):
@@ -11,10 +12,11 @@ class SQLUpdateService(Service):
     module to interact with the database.
     """
     #constructor
-    def __init__(self, command):
-        super().__init__(command)
+    def __init__(self, command, deadline=None):
+        super().__init__(command, deadline)
     
     #override doWork()
+    @Tracer.traced("SQLUpdateService.doWork")
     def doWork(self):
         """
         Updates movie data in the database.
@@ -22,11 +24,15 @@ class SQLUpdateService(Service):
         This method parses the command string to extract the movie data,
         creates a `Movie` object, and calls the `MovieDAO.updateAMovie()`
         method to update the corresponding record in the database.
+
+        Returns:
+            Movie: The movie as stored after the update, or None if no movie has that MovieID.
         """
         #split the command
         parts = self.command.split("|")
         #create a movie
         movie = Movie(parts[1], parts[2], parts[3], parts[4], parts[5], parts[6])
         #call a MovieDAO method to update the database
-        MovieDAO.updateAMovie(movie)
+        self.checkDeadline("before update")
+        return MovieDAO.updateAMovie(movie, timeout=self.queryTimeout())
 
@@ -2,6 +2,7 @@ from datetime import datetime
 from Service import Service
 from FileHandler import FileHandler
 from Query import Query
+from Tracer import Tracer
 
 class SaveLogsService(Service):
     """
@@ -21,9 +22,10 @@ class SaveLogsService(Service):
         """
         super().__init__(command)
         self.gs = gui_server  # Reference to GUIServer
-        self.logs = FileHandler.getData("LogsOfQueries.txt")  # List of Query objects
+        self.logs = []  # List of Query objects, read when the log is saved
         self.query = None
 
+    @Tracer.traced("SaveLogsService.doWork")
     def doWork(self):
         return self.saveLogs(self.command)
 
@@ -33,6 +35,7 @@ class SaveLogsService(Service):
 
         This method creates a timestamp,  formats the command, creates a `Query` object, adds it to the log list,
         saves the updated log to the file using `FileHandler.save()`, and formats the log entry for display.
+        The log is read and saved under `FileHandler.lock`, so concurrent requests do not overwrite each other's records.
 
         Args:
             command (str): The command string to be saved in the log.
@@ -50,11 +53,14 @@ class SaveLogsService(Service):
         # Create a new Query object
         self.query = Query(timestamp, command)
 
-        # Add to logs
-        self.logs.append(self.query)
+        with FileHandler.lock:
+            self.logs = FileHandler.getData("LogsOfQueries.txt")
 
-        # Save updated logs to file
-        FileHandler.save(self.logs)
+            # Add to logs
+            self.logs.append(self.query)
+
+            # Save updated logs to file
+            FileHandler.save(self.logs)
 
         # Convert timestamp string to datetime
         datetime_obj = datetime.strptime(self.query.timestamp, "%Y%m%d_%H%M%S")
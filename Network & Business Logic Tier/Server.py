@@ -1,35 +1,109 @@
 import socket
 import threading
+import time
 from concurrent.futures import ThreadPoolExecutor
 from ProcessSQL import ProcessSQL
+from ChangeNotifier import ChangeNotifier
+from Deadline import Deadline, DeadlineExceeded
+from MovieCache import MovieCache
+from TitleIndex import TitleIndex
+from GenreTable import GenreTable
+from BufferPool import BufferPool
+from CommandScheduler import CommandScheduler
+from FileHandler import FileHandler
+from StackSampler import StackSampler
+from Tracer import Tracer
+import MovieDAO
 
 class Server:
     """
     A server class that listens for incoming client connections and processes their requests using a thread pool.
 
     This server binds to a specified host and port, accepts client connections, and delegates the handling of each client to 
-    a separate thread managed by a 'ThreadPoolExecutor'. It interacts with an optional GUI to display server logs.
+    a separate thread managed by a 'ThreadPoolExecutor'. It interacts with an optional GUI to display server logs; without a GUI the
+    log lines go to a pluggable sink, so the server can also run headless (see ServerDaemon.py).
 
     Attributes:
         host (str): The IP address the server will listen on. Defaults to '127.0.0.1' (localhost).
         port (int): The port number the server will listen on. Defaults to 3202.
         running (bool): A flag indicating whether the server is currently running. Initialized to True.
         gui (object, optional): An optional GUI object with a `showLogs` method to display server activity. Defaults to None.
-        executor (ThreadPoolExecutor): A thread pool used to manage the execution of client handling tasks. Initialized with a
-        maximum of 50 worker threads.
+        logSink (callable): Receives each log line when there is no GUI. Defaults to `print`.
+        executor (ThreadPoolExecutor): A thread pool that reads each client's command and hands the request to `scheduler`.
+        Initialized with a maximum of 50 worker threads.
+        notifier (ChangeNotifier): Pushes movie change events to the clients that sent a "#subscribe" command. Subscriptions
+                                   are served on the intake threads, so at most half of them (`notifier.maxSubscribers`)
+                                   can be subscribed at once; further subscribers are answered "Server busy".
+        compressionThreshold (int): Minimum response size in bytes that is compressed for clients that negotiated compression.
+                                    Defaults to 512.
+        readTimeout (float): Seconds a worker waits for a client to send its command. Defaults to 5.0.
+        writeTimeout (float): Seconds a worker waits for a client to accept a response. Defaults to 5.0.
+        requestDeadline (float): Seconds from accept until a request must be answered, including the time spent waiting for a
+                                 worker. Defaults to 10.0.
+        reapGrace (float): Extra seconds after its deadline before a connection is forcibly closed by the accept loop. Defaults to 1.0.
+        connections (dict): Maps each open client socket to its `Deadline`.
+        stats (dict): Counters of "expired" requests, "timedOut" socket reads/writes, "reaped" connections and requests
+                      "rejected" because their pool's queue was full.
+        cache (MovieCache): The movies recently returned by "#select", shared by all workers.
+        warmUpSize (int): How many of the most selected movies are loaded into the cache at startup. 0 disables the warm-up.
+                          Defaults to 200.
+        warmUpRecords (int): How many of the most recent log records are scanned to find them. Defaults to 10000.
+        warmUpInBackground (bool): True to accept connections while the cache is warming up, False to finish the warm-up first.
+                                   Defaults to False.
+        ready (threading.Event): Set once the warm-up has finished (or was skipped).
+        bufferPool (BufferPool): The reusable buffers the requests are received into.
+        titleIndex (TitleIndex): The titles of all movies, built at startup and answering "#suggest" commands.
+        genres (GenreTable): The snapshot of the Genres table, loaded at startup and answering "#genres" commands.
+        profiler (StackSampler): Samples the stacks of the server's threads on a "#profile" command.
+        profileDir (str): The directory "#profile" commands write their files to. Defaults to "Profiles".
+        scheduler (CommandScheduler): The worker pools that serve requests once their command has been read: "read" (32
+                                      workers, up to 256 queued), "write" (8 workers, up to 64 queued) and "admin" (2 workers,
+                                      up to 16 queued). Sizes can be changed before the server starts.
     """
-    def __init__(self, gui=None):
+    #worker pool of each command; None means the request stays on the thread that read it
+    COMMAND_POOLS = {"#select": "read", "#suggest": "read", "#genres": "read", "#update": "write", "#insert": "write",
+                     "#delete": "write", "#stats": "admin", "#profile": "admin", "#subscribe": None}
+
+    def __init__(self, gui=None, host='127.0.0.1', port=3202, maxWorkers=50, logSink=None):
         """
         Initializes the `Server` object.
 
         Args:
             gui (object, optional): An optional GUI object with a `showLogs` method for displaying server logs. Defaults to None.
+            host (str, optional): The IP address to listen on. Defaults to '127.0.0.1'.
+            port (int, optional): The port to listen on. Defaults to 3202.
+            maxWorkers (int, optional): The number of threads that read the clients' commands. Defaults to 50.
+            logSink (callable, optional): Receives each log line when there is no GUI. Defaults to None (`print`).
         """
-        self.host = '127.0.0.1'
-        self.port = 3202
+        self.host = host
+        self.port = port
         self.running = True
         self.gui = gui
-        self.executor = ThreadPoolExecutor(max_workers=50)  # Thread pool
+        self.logSink = logSink if logSink else print
+        self.executor = ThreadPoolExecutor(max_workers=maxWorkers, thread_name_prefix="intake")  # Thread pool
+        self.notifier = ChangeNotifier(maxSubscribers=max(1, maxWorkers // 2))  # Change events for subscribed clients
+        self.compressionThreshold = 512
+        self.readTimeout = 5.0
+        self.writeTimeout = 5.0
+        self.requestDeadline = 10.0
+        self.reapGrace = 1.0
+        self.connections = {}
+        self.stats = {"expired": 0, "timedOut": 0, "reaped": 0, "rejected": 0}
+        self.lock = threading.Lock()  # Protects connections and stats
+        self.cache = MovieCache()
+        self.titleIndex = TitleIndex()
+        self.genres = GenreTable(())
+        self.bufferPool = BufferPool(maxBuffers=maxWorkers)
+        self.warmUpSize = 200
+        self.warmUpRecords = 10000
+        self.warmUpInBackground = False
+        self.ready = threading.Event()
+        self.profiler = StackSampler()
+        self.profileDir = "Profiles"
+        self.scheduler = CommandScheduler()
+        self.scheduler.addPool("read", 32, 256)
+        self.scheduler.addPool("write", 8, 64)
+        self.scheduler.addPool("admin", 2, 16)
 
     def startServer(self):
         """
@@ -37,54 +111,273 @@ class Server:
 
         This method creates a socket, binds it to the configured host and port, and starts listening for connections. It uses a non-blocking `accept()`
         call with a timeout to periodically check the `running` flag, allowing for graceful shutdown. Accepted client connections are submitted to the
-        thread pool for handling. If a GUI object is provided, it displays a startup message in the logs.
+        thread pool for handling. A startup message is written to the logs.
+        Each connection gets its request deadline at accept time, and connections still open well past their deadline are reaped
+        whenever the loop wakes up.
+        Before the first connection is accepted the cache is warmed up with the most selected movies (see `warmUpCache`), unless
+        `warmUpInBackground` is set, in which case the warm-up runs alongside and `ready` tells when it is done. The title index
+        used by "#suggest" and the genre snapshot are always loaded before the first connection is accepted.
         """
         self.running = True
+        self.ready.clear()
+        self.scheduler.start()
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as serverSocket:
             serverSocket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             serverSocket.bind((self.host, self.port))
             serverSocket.listen(5)
             serverSocket.settimeout(1.0)
 
-            if self.gui:
-                self.gui.showLogs(f"Server is running on {self.host}:{self.port}\n... Waiting for clients...")
+            #clients connecting during the warm-up wait in the listen backlog
+            if self.warmUpInBackground:
+                threading.Thread(target=self.warmUpCache, daemon=True).start()
+            else:
+                self.warmUpCache()
+            self.buildTitleIndex()
+            self.loadGenres()
+
+            self.log(f"Server is running on {self.host}:{self.port}\n... Waiting for clients...")
 
             while self.running:
                 try:
                     clientSocket, addr = serverSocket.accept()
+                    #the deadline starts now, so time spent queued for a worker counts
+                    deadline = Deadline(self.requestDeadline)
+                    #sampled requests are traced from accept, so the wait for a worker shows up too
+                    trace = Tracer.startTrace()
+                    with self.lock:
+                        self.connections[clientSocket] = deadline
                     #data = client_socket.recv(1024).decode()
                     # Submit the whole handling to thread pool - submit (function, arg1, arg2)
-                    self.executor.submit(self.handleClient, clientSocket, addr)
+                    self.executor.submit(self.handleClient, clientSocket, addr, deadline, trace)
                 except socket.timeout:
                     continue
                 except Exception as e:
                     print(f"Server error: {e}")
+                finally:
+                    self.reapConnections()
+
+    def log(self, message):
+        """
+        Sends a log line to the GUI if there is one, otherwise to `logSink`.
+
+        Args:
+            message (str): The log line.
+        """
+        if self.gui:
+            self.gui.showLogs(message)
+        else:
+            self.logSink(message)
+
+    def warmUpCache(self):
+        """
+        Loads the movies that were selected most often recently into the cache.
+
+        The last `warmUpRecords` records of the query log are scanned, the `warmUpSize` most selected MovieIDs are ranked and
+        loaded with a single `MovieDAO.getMoviesByIds` query. The time taken and the share of the scanned selects that the cache
+        now covers are reported in the logs. `ready` is set when done, even if the warm-up failed.
+
+        Returns:
+            str: The warm-up report.
+        """
+        try:
+            if self.warmUpSize <= 0:
+                return "Cache warm-up skipped."
+            start = time.perf_counter()
+            queries = FileHandler.getData("LogsOfQueries.txt")[-self.warmUpRecords:]
+            hotIDs, counts = MovieCache.hotMovieIDs(queries, self.warmUpSize)
+            loaded = set()
+            for movie in MovieDAO.getMoviesByIds(hotIDs):
+                self.cache.put(movie)
+                loaded.add(str(movie.movieID))
+            elapsed = (time.perf_counter() - start) * 1000
+
+            #share of the recent selects that would have been answered by the cache
+            selects = sum(counts.values())
+            covered = sum(counts[movieID] for movieID in loaded)
+            coverage = covered / selects * 100 if selects else 0.0
+            report = (f"Cache warm-up: {len(loaded)} of {len(hotIDs)} hot movies loaded in {elapsed:.1f} ms, "
+                      f"covering {coverage:.1f}% of {selects} recent selects")
+        except Exception as e:
+            report = f"Cache warm-up failed: {e}"
+        finally:
+            self.ready.set()
+        self.log(report)
+        return report
+
+    def buildTitleIndex(self):
+        """
+        Loads the titles of all movies into `titleIndex`, streaming them from the database, and reports the time taken.
+
+        Returns:
+            str: The report.
+        """
+        try:
+            start = time.perf_counter()
+            count = self.titleIndex.build(MovieDAO.iterMovies())
+            report = f"Title index: {count} titles in {(time.perf_counter() - start) * 1000:.1f} ms"
+        except Exception as e:
+            report = f"Title index build failed: {e}"
+        self.log(report)
+        return report
+
+    def loadGenres(self):
+        """
+        Loads the Genres table into a new `GenreTable` snapshot and puts it in place of `genres`, e.g. at startup or after the
+        genres were changed in the database. Requests already holding the previous snapshot keep using it.
+
+        Returns:
+            str: The report.
+        """
+        rows = MovieDAO.getGenres()
+        if not rows:
+            report = "Genres could not be loaded"
+        else:
+            self.genres = GenreTable(rows)
+            report = f"Genres: {len(self.genres)} loaded, version {self.genres.version}"
+        self.log(report)
+        return report
+
+    def reapConnections(self):
+        """
+        Closes the connections that are still open after their deadline plus `reapGrace`.
+
+        Shutting the socket down wakes up a worker blocked on it (or makes a queued request fail as soon as it starts), so stalled
+        peers cannot keep workers busy. Subscriptions have no deadline and are never reaped.
+        """
+        with self.lock:
+            now = time.monotonic()
+            stale = [clientSocket for clientSocket, deadline in self.connections.items()
+                     if deadline.expiresAt is not None and now >= deadline.expiresAt + self.reapGrace]
+            for clientSocket in stale:
+                del self.connections[clientSocket]
+                self.stats["reaped"] += 1
+        for clientSocket in stale:
+            try:
+                clientSocket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
 
-    def handleClient(self, clientSocket, addr):
+    def countEvent(self, name):
+        """
+        Increments one of the counters in `stats`.
+
+        Args:
+            name (str): The counter to increment.
+        """
+        with self.lock:
+            self.stats[name] += 1
+
+    def handleClient(self, clientSocket, addr, deadline=None, trace=None):
         """
         Handles the communication with a connected client.
 
-        This method is executed in a separate thread for each client. It creates a `ProcessSQL` object to manage the data exchange
-        with the client and process any SQL commands received. 
-        If a GUI object is available, it displays any data processed by `ProcessSQL`. Finally, it ensures the client socket is closed.
+        This method is executed in a separate thread for each client. It creates a `ProcessSQL` object, which reads the command
+        from the client, and hands the request to the worker pool of its class in `COMMAND_POOLS` (see `serveRequest`), so this
+        thread is free again as soon as the command has been read. If the pool's queue is full the client is answered
+        "Server busy". Subscriptions are served on this thread because they stay open.
+        If the request is traced, the trace is active on this thread while the command is read.
 
         Args:
             clientSocket (socket.socket): The socket object representing the connection to the client.
             addr (tuple): The address (IP address and port) of the connected client.
+            deadline (Deadline, optional): The request deadline set when the connection was accepted. Defaults to None.
+            trace (Trace, optional): The trace started when the connection was accepted. Defaults to None (not traced).
         """
+        Tracer.activate(trace)
+        if trace is not None:
+            trace.spans.append(("Server.queued", trace.startedAt, time.perf_counter_ns(), threading.get_ident()))
+        handedOff = False
         try:
+            with Tracer.span("Server.intake"):
+                processor = ProcessSQL(clientSocket, self, deadline)
+            poolName = self.COMMAND_POOLS.get(processor.data.split("|", 1)[0].strip(), "admin")
+            if poolName is None:
+                handedOff = True
+                self.serveRequest(processor, addr, trace)
+            else:
+                queuedAt = time.perf_counter_ns()
+                handedOff = self.scheduler.submit(poolName, lambda: self.serveRequest(processor, addr, trace, queuedAt))
+                if not handedOff:
+                    self.countEvent("rejected")
+                    processor.sendResponse("Server busy")
+        except Exception as e:
+            self.reportFailure(e, addr)
+        finally:
+            if handedOff:
+                Tracer.activate(None)
+            else:
+                self.closeClient(clientSocket, trace)
 
-            processor = ProcessSQL(clientSocket)
-            data = processor.process()
-            self.gui.showLogs(data)
+    def serveRequest(self, processor, addr, trace=None, queuedAt=None):
+        """
+        Processes a request whose command has been read, on a worker of its pool.
 
-        except socket.timeout:
-            print("Client socket timed out waiting for data.")
+        The data processed by `ProcessSQL` is written to the logs (GUI or log sink). Finally, it ensures the client socket is closed.
+        If the request is traced, the trace is active on this thread while it is served and is stored for export afterwards.
+
+        Args:
+            processor (ProcessSQL): The processor holding the client's command.
+            addr (tuple): The address (IP address and port) of the connected client.
+            trace (Trace, optional): The trace of the request. Defaults to None (not traced).
+            queuedAt (int, optional): The `time.perf_counter_ns()` value when the request was queued for the pool. Defaults to None.
+        """
+        Tracer.activate(trace)
+        if trace is not None and queuedAt is not None:
+            trace.spans.append(("Server.poolQueued", queuedAt, time.perf_counter_ns(), threading.get_ident()))
+        try:
+            with Tracer.span("Server.serveRequest"):
+                #reads of a client that has just written stay on the primary database (if replicas are configured)
+                MovieDAO.setSession(addr[0])
+
+                data = processor.process()
+                self.log(data)
         except Exception as e:
-            print(f"Exception in handle_client: {e}")
+            self.reportFailure(e, addr)
         finally:
-            clientSocket.close()
+            self.closeClient(processor.clientSocket, trace)
 
+    def reportFailure(self, error, addr):
+        """
+        Counts and prints an error that ended a request.
+
+        Args:
+            error (Exception): The error.
+            addr (tuple): The address of the client.
+        """
+        #DeadlineExceeded is a TimeoutError too, so it must be checked first
+        if isinstance(error, DeadlineExceeded):
+            self.countEvent("expired")
+            print(f"Request from {addr} aborted: {error}")
+        elif isinstance(error, socket.timeout):
+            self.countEvent("timedOut")
+            print("Client socket timed out waiting for data.")
+        else:
+            print(f"Exception in handle_client: {error}")
+
+    def closeClient(self, clientSocket, trace=None):
+        """
+        Closes a client connection, stops tracking it and stores its trace.
+
+        Args:
+            clientSocket (socket.socket): The client socket.
+            trace (Trace, optional): The trace of the request. Defaults to None.
+        """
+        with self.lock:
+            self.connections.pop(clientSocket, None)
+        clientSocket.close()
+        Tracer.finishTrace(trace)
+
+    def statsReport(self):
+        """
+        Describes the worker pools, the server counters and the cache, as answered to the "#stats" command.
+
+        Returns:
+            str: One line per worker pool, then the counters and the cache.
+        """
+        with self.lock:
+            counters = " ".join(f"{name}={count}" for name, count in self.stats.items())
+        return (f"{self.scheduler.report()}\nserver: {counters}\n"
+                f"cache: size={len(self.cache)} hits={self.cache.hits} misses={self.cache.misses}")
 
     def stopServer(self):
         """
@@ -93,5 +386,7 @@ class Server:
         Sets the `running` flag to False, which will cause the server's main loop to terminate after the current `accept()` call (or timeout).
         It does not immediately terminate the handling of currently connected clients.
         The thread pool will also need to be shut down separately if immediate termination of client handling is required.
+        Open subscriptions are ended so their worker threads are released.
         """
-        self.running = False
\ No newline at end of file
+        self.running = False
+        self.notifier.close()
\ No newline at end of file
@@ -0,0 +1,198 @@
+import random
+import socket
+import threading
+import time
+
+class ServerEndpoint:
+    """
+    Represents one server node a client can send requests to.
+
+    Attributes:
+        host (str): The IP address or hostname of the server.
+        port (int): The port the server listens on.
+        outstanding (int): The number of requests sent to the server and not answered yet.
+        failures (int): The number of consecutive failures.
+        unhealthyUntil (float): The `time.monotonic()` value before which the server is skipped. 0 when healthy.
+        latency (float): Moving average of the server's response time in seconds, or None before the first response.
+    """
+    def __init__(self, host, port):
+        """
+        Initializes the ServerEndpoint object.
+
+        Args:
+            host (str): The IP address or hostname of the server.
+            port (int): The port the server listens on.
+        """
+        self.host = host
+        self.port = port
+        self.outstanding = 0
+        self.failures = 0
+        self.unhealthyUntil = 0.0
+        self.latency = None
+
+    def isHealthy(self, now):
+        """
+        Checks whether requests may be sent to the server.
+
+        Args:
+            now (float): The current `time.monotonic()` value.
+
+        Returns:
+            bool: True if the server is healthy or its back-off period is over (it is then probed again).
+        """
+        return now >= self.unhealthyUntil
+
+    def __str__(self):
+        return f"{self.host}:{self.port}"
+
+class ServerBalancer:
+    """
+    Spreads a client's requests over several server nodes and steers them away from nodes that fail.
+
+    Each request goes to the healthy node with the fewest outstanding requests ("least") or to the less busy of two nodes picked
+    at random ("p2c", power of two choices, which avoids every client rushing to the same idle node). A node that refuses a
+    connection or fails a request is ejected for `retryAfter` seconds, doubling with each further failure up to `maxRetryAfter`;
+    after that it receives requests again and its first success restores it. If every node is ejected, the one due back first is
+    tried anyway rather than failing without trying.
+
+    Attributes:
+        endpoints (list): The `ServerEndpoint` of every node.
+        strategy (str): "p2c" or "least".
+        connectTimeout (float): Seconds to wait for a connection before trying another node.
+        retryAfter (float): The initial ejection time in seconds.
+        maxRetryAfter (float): The longest ejection time in seconds.
+    """
+    STRATEGIES = ("p2c", "least")
+
+    def __init__(self, endpoints, strategy="p2c", connectTimeout=2.0, retryAfter=1.0, maxRetryAfter=30.0):
+        """
+        Initializes the ServerBalancer object.
+
+        Args:
+            endpoints (iterable): The nodes, as (host, port) pairs or "host:port" strings.
+            strategy (str, optional): "p2c" or "least". Defaults to "p2c".
+            connectTimeout (float, optional): Seconds to wait for a connection. Defaults to 2.0.
+            retryAfter (float, optional): The initial ejection time. Defaults to 1.0.
+            maxRetryAfter (float, optional): The longest ejection time. Defaults to 30.0.
+
+        Raises:
+            ValueError: If there are no endpoints or the strategy is unknown.
+        """
+        self.endpoints = [ServerEndpoint(*ServerBalancer.parseEndpoint(endpoint)) for endpoint in endpoints]
+        if not self.endpoints:
+            raise ValueError("At least one server endpoint is needed")
+        if strategy not in ServerBalancer.STRATEGIES:
+            raise ValueError(f"Unknown balancing strategy {strategy}, use one of {', '.join(ServerBalancer.STRATEGIES)}")
+        self.strategy = strategy
+        self.connectTimeout = connectTimeout
+        self.retryAfter = retryAfter
+        self.maxRetryAfter = maxRetryAfter
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def parseEndpoint(endpoint):
+        """
+        Reads an endpoint given as a (host, port) pair or a "host:port" string.
+
+        Args:
+            endpoint (tuple or str): The endpoint.
+
+        Returns:
+            tuple: (host, port)
+        """
+        if isinstance(endpoint, str):
+            host, _, port = endpoint.rpartition(":")
+            return host, int(port)
+        host, port = endpoint
+        return host, int(port)
+
+    def pick(self, exclude=()):
+        """
+        Chooses the node for the next request and counts the request as outstanding on it.
+
+        Args:
+            exclude (iterable, optional): Nodes not to choose, e.g. the ones already tried for this request.
+
+        Returns:
+            ServerEndpoint: The node, or None if every node is excluded.
+        """
+        with self.lock:
+            candidates = [endpoint for endpoint in self.endpoints if endpoint not in exclude]
+            if not candidates:
+                return None
+            now = time.monotonic()
+            healthy = [endpoint for endpoint in candidates if endpoint.isHealthy(now)]
+            if not healthy:
+                #everything is ejected: probe the node that is due back first
+                chosen = min(candidates, key=lambda endpoint: endpoint.unhealthyUntil)
+            elif self.strategy == "least" or len(healthy) < 3:
+                lowest = min(endpoint.outstanding for endpoint in healthy)
+                chosen = random.choice([endpoint for endpoint in healthy if endpoint.outstanding == lowest])
+            else:
+                first, second = random.sample(healthy, 2)
+                chosen = first if first.outstanding <= second.outstanding else second
+            chosen.outstanding += 1
+            return chosen
+
+    def finish(self, endpoint, succeeded, latency=None):
+        """
+        Records the end of a request on a node.
+
+        Args:
+            endpoint (ServerEndpoint): The node from `pick` or `connect`.
+            succeeded (bool): False if the connection to the node failed or timed out; the node is then ejected. Any answer,
+                              including an error message, counts as success.
+            latency (float, optional): The response time in seconds, if the node answered. Defaults to None.
+        """
+        with self.lock:
+            endpoint.outstanding -= 1
+            if succeeded:
+                endpoint.failures = 0
+                endpoint.unhealthyUntil = 0.0
+                if latency is not None:
+                    endpoint.latency = latency if endpoint.latency is None else 0.8 * endpoint.latency + 0.2 * latency
+            else:
+                endpoint.failures += 1
+                backOff = min(self.maxRetryAfter, self.retryAfter * 2 ** (endpoint.failures - 1))
+                endpoint.unhealthyUntil = time.monotonic() + backOff
+
+    def connect(self, exclude=()):
+        """
+        Opens a connection to the node chosen by `pick`, trying the other nodes if it cannot be reached.
+
+        Args:
+            exclude (iterable, optional): Nodes not to try.
+
+        Returns:
+            tuple: (socket, endpoint). The request is outstanding on the endpoint until `finish` is called.
+
+        Raises:
+            ConnectionError: If no node could be reached.
+        """
+        tried = list(exclude)
+        errors = []
+        while True:
+            endpoint = self.pick(tried)
+            if endpoint is None:
+                raise ConnectionError(("No server could be reached: " + "; ".join(errors)) if errors else "No server left to try")
+            try:
+                return socket.create_connection((endpoint.host, endpoint.port), timeout=self.connectTimeout), endpoint
+            except OSError as e:
+                print(f"Server {endpoint} is unavailable: {e}")
+                self.finish(endpoint, False)
+                errors.append(f"{endpoint}: {e}")
+                tried.append(endpoint)
+
+    def report(self):
+        """
+        Describes every node in one line each.
+
+        Returns:
+            str: e.g. "127.0.0.1:3202 outstanding=0 failures=0 healthy=True latency=1.2 ms"
+        """
+        now = time.monotonic()
+        with self.lock:
+            return "\n".join(f"{endpoint} outstanding={endpoint.outstanding} failures={endpoint.failures} "
+                             f"healthy={endpoint.isHealthy(now)} latency="
+                             + (f"{endpoint.latency * 1000:.1f} ms" if endpoint.latency is not None else "-")
+                             for endpoint in self.endpoints)
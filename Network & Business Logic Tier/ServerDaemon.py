@@ -0,0 +1,135 @@
+import argparse
+import os
+import signal
+import sys
+import threading
+from datetime import datetime
+
+#make the data tier importable when the daemon is started directly
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Data Tier"))
+
+import MovieDAO
+from LogCompactor import LogCompactor
+from Server import Server
+from Tracer import Tracer
+
+class FileLogSink:
+    """
+    A log sink that appends each server log line, with a timestamp, to a text file.
+
+    Lines come from all worker threads, so writes are serialized with a lock.
+
+    Attributes:
+        fileName (str): The file the log lines are appended to.
+    """
+    def __init__(self, fileName):
+        """
+        Initializes the FileLogSink object.
+
+        Args:
+            fileName (str): The file the log lines are appended to.
+        """
+        self.fileName = fileName
+        self.lock = threading.Lock()
+
+    def __call__(self, message):
+        """
+        Appends one log line to the file.
+
+        Args:
+            message (str): The log line.
+        """
+        with self.lock:
+            with open(self.fileName, 'a') as file:
+                file.write(f"{datetime.now():%Y-%m-%d %H:%M:%S} {message}\n")
+
+def parseArguments(argv=None):
+    """
+    Parses the command line of the daemon.
+
+    Args:
+        argv (list, optional): The arguments to parse. Defaults to None (use sys.argv).
+
+    Returns:
+        argparse.Namespace: The parsed options.
+    """
+    parser = argparse.ArgumentParser(description="Run the movie server without a GUI.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=3202, help="port to listen on (default: 3202)")
+    parser.add_argument("--workers", type=int, default=50, help="number of threads reading client commands (default: 50)")
+    parser.add_argument("--read-workers", type=int, default=32, help="workers serving #select (default: 32)")
+    parser.add_argument("--write-workers", type=int, default=8, help="workers serving #update, #insert and #delete (default: 8)")
+    parser.add_argument("--read-priority", action="store_true", help="let idle write and admin workers serve queued reads")
+    parser.add_argument("--max-subscribers", type=int, help="subscriptions served at once, each holding a command-reading thread (default: half of --workers)")
+    parser.add_argument("--backend", choices=["sqlserver", "sqlite"], default="sqlserver", help="database backend (default: sqlserver)")
+    parser.add_argument("--database", help="pyodbc connection string, or SQLite file path (created if missing)")
+    parser.add_argument("--replica", action="append", default=[], help="read replica (connection string or SQLite path), repeatable")
+    parser.add_argument("--shard", action="append", default=[], help="shard database of the Movies table in shard order, repeatable (replaces --database)")
+    parser.add_argument("--shard-strategy", choices=["hash", "range"], default="hash", help="how movies are split over the shards (default: hash)")
+    parser.add_argument("--shard-bounds", type=int, nargs="*", help="for range sharding, the upper MovieID bound of every shard but the last")
+    parser.add_argument("--pin-seconds", type=float, default=2.0, help="keep a client's reads on the primary this long after it writes (default: 2.0)")
+    parser.add_argument("--log-file", help="append log lines to this file instead of printing them")
+    parser.add_argument("--compact-logs-every", type=float, default=0.0, help="seconds between query log compactions (default: 0, off)")
+    parser.add_argument("--keep-raw-hours", type=float, default=24.0, help="hours query log records stay raw before compaction (default: 24)")
+    parser.add_argument("--cache-ttl", type=float, default=60.0, help="seconds a movie stays in the select cache, 0 for no limit (default: 60)")
+    parser.add_argument("--no-warm-up", action="store_true", help="do not warm up the cache from the query log")
+    parser.add_argument("--trace-sample-rate", type=float, default=0.0, help="share of requests to trace, 0 to 1 (default: 0, off)")
+    parser.add_argument("--trace-file", default="ServerTrace.json", help="Chrome trace file written at shutdown (default: ServerTrace.json)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """
+    Starts a headless server and runs it until SIGINT or SIGTERM.
+
+    Neither tkinter nor the GUI modules are imported, and pyodbc is only loaded by `MovieDAO` when the SQL Server backend makes its
+    first connection, so the daemon starts quickly and stays small on machines without a display or ODBC driver.
+
+    Args:
+        argv (list, optional): The command line arguments. Defaults to None (use sys.argv).
+    """
+    args = parseArguments(argv)
+
+    MovieDAO.configure(args.backend, args.database)
+    if args.backend == "sqlite":
+        #missing shards start empty; ShardRebalancer fills them from an existing database
+        for database in args.shard or [MovieDAO.SQLITE_PATH]:
+            MovieDAO.createSQLiteDatabase(database, sampleMovies=not args.shard)
+    if args.shard:
+        MovieDAO.configureShards(args.shard, args.shard_strategy, args.shard_bounds)
+    elif args.replica:
+        MovieDAO.configureReplicas(replicas=args.replica, pinSeconds=args.pin_seconds)
+
+    logSink = FileLogSink(args.log_file) if args.log_file else None
+    server = Server(host=args.host, port=args.port, maxWorkers=args.workers, logSink=logSink)
+    if args.no_warm_up:
+        server.warmUpSize = 0
+    server.cache.ttl = args.cache_ttl if args.cache_ttl > 0 else None
+    Tracer.sampleRate = args.trace_sample_rate
+    server.scheduler.pools["read"].size = args.read_workers
+    server.scheduler.pools["write"].size = args.write_workers
+    server.scheduler.readPriority = args.read_priority
+    if args.max_subscribers is not None:
+        server.notifier.maxSubscribers = args.max_subscribers
+
+    #stop accepting on Ctrl+C or a service manager's TERM signal
+    def stop(signum, frame):
+        server.log("Server is stopping...")
+        server.stopServer()
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    compactor = LogCompactor(keepRawHours=args.keep_raw_hours)
+    if args.compact_logs_every > 0:
+        compactor.start(args.compact_logs_every)
+
+    server.startServer()
+    compactor.stop()
+    server.executor.shutdown(wait=True)
+    server.scheduler.shutdown(wait=True)
+    if Tracer.sampleRate > 0:
+        count = Tracer.exportChrome(args.trace_file)
+        server.log(f"Wrote {count} request traces to {args.trace_file}")
+    server.log("Server has been stopped.")
+
+if __name__ == "__main__":
+    main()
@@ -9,17 +9,45 @@ class Service(ABC):
 
     Attributes:
         command (str): The command or data that the service will process.
+        deadline (Deadline): The deadline of the request being served, or None if the request has no deadline.
     """
 
     #constructor
-    def __init__(self, command):
+    def __init__(self, command, deadline=None):
         """
         Initializes the Service object with a command.
 
         Args:
             command (str): The command or data to be processed by the service.
+            deadline (Deadline, optional): The deadline of the request. Defaults to None.
         """
         self.command = command
+        self.deadline = deadline
+
+    def checkDeadline(self, stage=""):
+        """
+        Aborts the work if the request's deadline has already passed.
+
+        Args:
+            stage (str, optional): A description of the work about to start, used in the error message.
+
+        Raises:
+            DeadlineExceeded: If the deadline has passed.
+        """
+        if self.deadline:
+            self.deadline.check(stage)
+
+    def queryTimeout(self):
+        """
+        Returns the time the database may spend on the request's query.
+
+        Returns:
+            float: The seconds left before the deadline, or None if there is no deadline.
+
+        Raises:
+            DeadlineExceeded: If the deadline has passed.
+        """
+        return self.deadline.timeout(stage="before the query") if self.deadline else None
     
     @abstractmethod
     def doWork(self):
@@ -0,0 +1,67 @@
+import queue
+from Service import Service
+
+class SubscribeService(Service):
+    """
+    Handles a client subscription to movie change events.
+
+    This class inherits from the `Service` abstract base class. Its `doWork` method registers the client with the
+    server's `ChangeNotifier` and then keeps the connection open, pushing each queued event to the client as one
+    line of text until the client disconnects or the server stops.
+
+    Attributes:
+        command (str): The command string. The expected format is "#subscribe|movieIDs|genreIDs" where both
+                       lists are comma separated and may be empty (e.g. "#subscribe|1,2|" or "#subscribe||3").
+        send (callable): Sends one piece of text on the long-lived connection, e.g. `ProcessSQL.sendResponse`.
+        notifier (ChangeNotifier): The notifier the subscriber is registered with.
+        heartbeat (float): Seconds without events after which a "#ping" line is sent to detect dead clients.
+    """
+    def __init__(self, command, send, notifier, heartbeat=5.0):
+        """
+        Initializes the SubscribeService object.
+
+        Args:
+            command (str): The subscribe command.
+            send (callable): The function used to push text to the client.
+            notifier (ChangeNotifier): The notifier to register with.
+            heartbeat (float, optional): Seconds between keep-alive lines when there are no events. Defaults to 5.0.
+        """
+        super().__init__(command)
+        self.send = send
+        self.notifier = notifier
+        self.heartbeat = heartbeat
+
+    def doWork(self):
+        """
+        Registers the subscription and streams events until the connection ends.
+
+        Returns:
+            int: The number of events that were dropped because the client was too slow to read them, or None if the
+                 notifier already had its maximum of subscribers and the client was answered "Server busy".
+        """
+        #split the command
+        parts = self.command.split("|")
+        movieIDs = [movieID.strip() for movieID in parts[1].split(",") if movieID.strip()] if len(parts) > 1 else []
+        genreIDs = [genreID.strip() for genreID in parts[2].split(",") if genreID.strip()] if len(parts) > 2 else []
+
+        subscriber = self.notifier.subscribe(movieIDs, genreIDs)
+        if subscriber is None:
+            self.send("Server busy")
+            return None
+        try:
+            self.send("#subscribed\n")
+            while True:
+                try:
+                    event = subscriber.events.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    #nothing happened, make sure the client is still there
+                    event = "#ping"
+                if event is None:
+                    break
+                self.send(f"{event}\n")
+        except OSError:
+            #the client went away
+            pass
+        finally:
+            self.notifier.unsubscribe(subscriber)
+        return subscriber.dropped
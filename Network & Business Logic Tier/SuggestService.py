@@ -0,0 +1,42 @@
+from Service import Service
+from Tracer import Tracer
+
+class SuggestService(Service):
+    """
+    Handles title suggestions for as-you-type search.
+
+    This class inherits from the `Service` abstract base class. Its `doWork` method looks the typed prefix up in the server's
+    `TitleIndex`; the database is not queried.
+
+    Attributes:
+        command (str): The command string. The expected format is "#suggest|prefix|limit", where limit is optional.
+        index (TitleIndex): The server's title index.
+        maxLimit (int): The largest number of suggestions a client may ask for.
+    """
+    def __init__(self, command, index, maxLimit=50):
+        """
+        Initializes the SuggestService object.
+
+        Args:
+            command (str): The suggest command.
+            index (TitleIndex): The title index to search.
+            maxLimit (int, optional): The largest number of suggestions a client may ask for. Defaults to 50.
+        """
+        super().__init__(command)
+        self.index = index
+        self.maxLimit = maxLimit
+
+    @Tracer.traced("SuggestService.doWork")
+    def doWork(self):
+        """
+        Finds the movies whose title starts with the prefix.
+
+        Returns:
+            str: One "MovieID|Title" line per match, in alphabetical order of title; empty if nothing matches.
+        """
+        #split the command
+        parts = self.command.split("|")
+        prefix = parts[1] if len(parts) > 1 else ""
+        limit = int(parts[2]) if len(parts) > 2 and parts[2].strip().isdigit() else 10
+        matches = self.index.suggest(prefix, min(limit, self.maxLimit))
+        return "".join(f"{movieID}|{title}\n" for movieID, title in matches)
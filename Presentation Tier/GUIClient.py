@@ -1,8 +1,13 @@
+import queue
+import threading
+import time
 import tkinter as tk
 from tkinter import simpledialog
 from tkinter import messagebox
 from tkinter import ttk
 from Client import Client
+from ClientCache import ClientCache
+from GenreTable import GenreTable
 
 class GUIClient:
     """
@@ -14,15 +19,30 @@ class GUIClient:
     Attributes:
         root (tkinter.Tk): The main window of the application.
         window (tkinter.Toplevel): The separate top-level window for the client form.
-        client (Client): An instance of the `Client` class responsible for communicating with the server.
+        client (Client): An instance of the `Client` class responsible for communicating with the server, with a `ClientCache`.
         txtTitle (tkinter.Entry): Entry field for the movie title.
         txtDirector (tkinter.Entry): Entry field for the movie director.
         txtYear (tkinter.Entry): Entry field for the movie release year.
         txtDescription (tkinter.Text): Text area for the movie description.
-        cbbGenre (ttk.Combobox): Combobox for selecting the movie genre.
+        cbbGenre (ttk.Combobox): Combobox for selecting the movie genre, listing the genres of `genres` in GenreID order.
+        genres (GenreTable): The genres received from the server, or `OFFLINE_GENRES` until they are.
+        genresCheckedAt (float): The `time.monotonic()` value when the server was last asked whether `genres` is current.
+        shownGenreID (str): The GenreID of the movie shown, kept to select its genre once the genres arrive.
         currentMovieID (int): Stores the ID of the currently displayed movie. Initialized to -1.
+        lstSuggestions (tkinter.Listbox): The titles suggested while typing in the title field, shown below it.
+        suggestionIDs (list): The MovieIDs of the suggestions, in the order shown.
+        suggestJob (str): The pending `after` job that asks for suggestions, or None.
+        suggestPrefix (str): The text the shown (or awaited) suggestions are for, or None if none are wanted.
+        lookups (queue.Queue): The lookups waiting for the background lookup thread, as ("suggest", prefix) or ("genres", None).
+        lookupClient (Client): The `Client` of the lookup thread, so lookups never share a connection with the form's commands.
     """
     currentMovieID = -1
+    SUGGEST_DELAY_MS = 250  # wait for a pause in typing before asking the server
+    SUGGEST_MIN_LENGTH = 2
+    GENRES_MAX_AGE = 60.0   # seconds before a shown movie makes the client check whether the genres changed
+    #the genres of MovieDatabase.sql, shown if the server cannot be asked for its own
+    OFFLINE_GENRES = ((1, "Horror"), (2, "Fantasy"), (3, "Action"), (4, "Drama"), (5, "Science Fiction"), (6, "Comedy"),
+                      (7, "Thriller"), (8, "Adventure"), (9, "Romance"), (10, "Crime"))
     def __init__(self, root):
         """
         Initializes the `GUIClient` object.
@@ -32,8 +52,55 @@ class GUIClient:
         """
         self.root = root
         self.window = tk.Toplevel(self.root)
+        self.suggestionIDs = []
+        self.suggestJob = None
+        self.suggestPrefix = None
+        self.genres = GenreTable(self.OFFLINE_GENRES)
+        self.genresCheckedAt = 0.0
+        self.shownGenreID = None
         self.setupGUI()
-        self.client = Client(self)
+        # reopening a movie is answered from the cache or revalidated instead of fetched again
+        self.client = Client(self, cache=ClientCache())
+        # suggestions and genres are looked up on a thread of their own, so a slow server never freezes the window
+        self.lookups = queue.Queue()
+        self.lookupClient = Client(self)
+        threading.Thread(target=self.runLookups, name="lookups", daemon=True).start()
+        # the server may not be up yet; the genres are asked for again whenever a movie is shown
+        self.loadGenres()
+
+    def loadGenres(self):
+        """
+        Asks the lookup thread to get the genres from the server, or to confirm the ones shown are current; `showGenres` lists
+        them once they arrive.
+        """
+        self.genresCheckedAt = time.monotonic()
+        self.lookups.put(("genres", None))
+
+    def showGenres(self, genres):
+        """
+        Lists the genres received from the server in the genre combobox, keeping the chosen genre.
+
+        Args:
+            genres (GenreTable): The genres from `Client.getGenres`, or None if the server could not be reached (the genres
+                                 shown are then kept).
+        """
+        if genres is None or genres.version == self.genres.version:
+            return
+        index = self.cbbGenre.current()
+        genreID = self.genres.genres[index][0] if index >= 0 else self.shownGenreID
+        self.genres = genres
+        self.cbbGenre['values'] = [name for _, name in genres.genres]
+        self.cbbGenre.set(genres.name(genreID) if genres.name(genreID) else genres.genres[0][1])
+
+    def selectedGenreID(self):
+        """
+        Converts the genre chosen in the combobox to its GenreID.
+
+        Returns:
+            str: The GenreID of the chosen genre, or of the first genre if none is chosen.
+        """
+        index = self.cbbGenre.current()
+        return self.genres.genres[index if index >= 0 else 0][0]
 
     def selectAction(self):
         """
@@ -48,6 +115,106 @@ class GUIClient:
             command = f"#select|{movie_id}"
             self.client.sendCommand(command)
 
+    def onTitleTyped(self, event):
+        """
+        Schedules new suggestions after a key press in the title field.
+
+        Each key press cancels the previous request, so the server is only asked once the user pauses for `SUGGEST_DELAY_MS`.
+        The Down key moves into the suggestions and Escape hides them.
+
+        Args:
+            event (tkinter.Event): The key event.
+        """
+        if event.keysym == "Down" and self.suggestionIDs:
+            self.lstSuggestions.focus_set()
+            self.lstSuggestions.selection_set(0)
+            return
+        if event.keysym == "Escape":
+            self.hideSuggestions()
+            return
+        if event.keysym in ("Up", "Left", "Right", "Return", "Tab", "Shift_L", "Shift_R"):
+            return
+        if self.suggestJob:
+            self.window.after_cancel(self.suggestJob)
+        self.suggestJob = self.window.after(self.SUGGEST_DELAY_MS, self.showSuggestions)
+
+    def showSuggestions(self):
+        """
+        Asks the lookup thread for the titles starting with the text of the title field; `listSuggestions` shows them.
+        """
+        self.suggestJob = None
+        prefix = self.txtTitle.get()
+        if len(prefix.strip()) < self.SUGGEST_MIN_LENGTH:
+            self.hideSuggestions()
+            return
+        self.suggestPrefix = prefix
+        self.lookups.put(("suggest", prefix))
+
+    def runLookups(self):
+        """
+        Runs the lookups on the lookup thread and hands each result to the Tk main loop with `root.after`.
+
+        Lookups that queued up while the server was answering are done once: the genres are fetched once, and only the newest
+        prefix is looked up, the older ones having been typed over.
+        """
+        while True:
+            lookups = [self.lookups.get()]
+            while not self.lookups.empty():
+                lookups.append(self.lookups.get_nowait())
+            if ("genres", None) in lookups:
+                genres = self.lookupClient.getGenres()
+                self.root.after(0, lambda genres=genres: self.showGenres(genres))
+            prefixes = [prefix for kind, prefix in lookups if kind == "suggest"]
+            if prefixes:
+                prefix = prefixes[-1]
+                matches = self.lookupClient.suggest(prefix)
+                self.root.after(0, lambda prefix=prefix, matches=matches: self.listSuggestions(prefix, matches))
+
+    def listSuggestions(self, prefix, matches):
+        """
+        Lists the suggestions below the title field, unless they are stale.
+
+        Args:
+            prefix (str): The text the suggestions were looked up for.
+            matches (list): (MovieID, title) pairs from `Client.suggest`.
+        """
+        #the user typed on or hid the list while the server was answering
+        if prefix != self.suggestPrefix or prefix != self.txtTitle.get():
+            return
+        if not matches:
+            self.hideSuggestions()
+            return
+        self.suggestionIDs = [movieID for movieID, _ in matches]
+        self.lstSuggestions.delete(0, tk.END)
+        for _, title in matches:
+            self.lstSuggestions.insert(tk.END, title)
+        self.lstSuggestions.configure(height=len(matches))
+        #show the list right under the title field, over the other fields
+        self.lstSuggestions.place(in_=self.txtTitle, x=0, rely=1.0, relwidth=1.0)
+        self.lstSuggestions.lift()
+
+    def hideSuggestions(self):
+        """
+        Hides the suggestion list, also dropping the suggestions still being looked up.
+        """
+        self.suggestPrefix = None
+        self.suggestionIDs = []
+        self.lstSuggestions.place_forget()
+
+    def onSuggestionChosen(self, event):
+        """
+        Selects the movie of the clicked (or Enter-ed) suggestion and shows it in the form.
+
+        Args:
+            event (tkinter.Event): The selection or key event.
+        """
+        selection = self.lstSuggestions.curselection()
+        if not selection or not self.suggestionIDs:
+            return
+        movieID = self.suggestionIDs[selection[0]]
+        self.hideSuggestions()
+        self.client.sendCommand(f"#select|{movieID}")
+
     def updateAction(self):
         """
         Handles the "Update" button action.
@@ -56,8 +223,7 @@ class GUIClient:
         containing the movie details and the `currentMovieID`, and sends it to the server through the `Client`.
         """
         #get information from the inputs using get() to create a command
-        genreList = self.cbbGenre['values']
-        genreID = genreList.index(self.cbbGenre.get()) + 1 #convert genre name to genreID
+        genreID = self.selectedGenreID()
         command = f"#update|{self.txtTitle.get()}|{self.txtDirector.get()}|{self.txtYear.get()}|{self.txtDescription.get('1.0', 'end-1c')}|{genreID}|{self.currentMovieID}"
         self.client.sendCommand(command)
     
@@ -69,8 +235,7 @@ class GUIClient:
         The `currentMovieID` is also included (though it might not be relevant for insertion).
         """
         #get information from the inputs using get()
-        genreList = self.cbbGenre['values']
-        genreID = genreList.index(self.cbbGenre.get()) + 1 #convert genre name to genreID
+        genreID = self.selectedGenreID()
         command = f"#insert|{self.txtTitle.get()}|{self.txtDirector.get()}|{self.txtYear.get()}|{self.txtDescription.get('1.0', 'end-1c')}|{genreID}|{self.currentMovieID}"
         self.client.sendCommand(command)
     
@@ -92,7 +257,7 @@ class GUIClient:
         Sets up the user interface elements within the client window.
 
         This method creates and arranges labels, entry fields, a text area, a combobox for genre selection, and buttons for database operations
-        using the Tkinter grid layout manager.
+        using the Tkinter grid layout manager. The title field also offers suggestions as the user types.
         """
         #1/ create an empty window
         self.window.title("Client Form") #add the title to the window
@@ -106,6 +271,12 @@ class GUIClient:
         # create a textbox and set it inside the window and at a width
         self.txtTitle = tk.Entry(self.window, width=30)
         self.txtTitle.grid(row=0, column=1, padx=15, pady=15)
+        #suggest titles as the user types, so a movie can be found by name
+        self.lstSuggestions = tk.Listbox(self.window, exportselection=False)
+        self.lstSuggestions.bind("<ButtonRelease-1>", self.onSuggestionChosen)
+        self.lstSuggestions.bind("<Return>", self.onSuggestionChosen)
+        self.lstSuggestions.bind("<Escape>", lambda event: self.hideSuggestions())
+        self.txtTitle.bind("<KeyRelease>", self.onTitleTyped)
 
         #b-create a Director label and set where it is placed at once
         lblDirector = tk.Label(self.window, text = "Director").grid(row=1, column=0, padx=20, pady=15, sticky="e")
@@ -128,7 +299,7 @@ class GUIClient:
         #e-create a Genre label and set where it is placed at once
         lblGenre = tk.Label(self.window, text = "Genre").grid(row=4, column=0, padx=20, pady=15, sticky="e")
         #create a combobox
-        self.cbbGenre = ttk.Combobox(self.window, width=27, values=["Horror", "Fantacy", "Action", "Drama", "Science Fiction", "Comedy", "Thriller", "Adventure", "Romance", "Crime"])
+        self.cbbGenre = ttk.Combobox(self.window, width=27, values=[name for _, name in self.genres.genres])
         self.cbbGenre.grid(row=4, column=1, padx=15, pady=15)
         self.cbbGenre.current(0)
 
@@ -169,7 +340,10 @@ class GUIClient:
         self.txtDescription.delete("1.0", tk.END)
         self.txtDescription.insert(tk.END, movie.description)
 
-        #get the genre list
-        genreList = self.cbbGenre['values']
-        self.cbbGenre.set(genreList[int(movie.genreID)])
+        #show the genre's name; a GenreID the client does not know means the genres changed on the server, and names may
+        #have changed too, so the genres are checked again (in the background) once they are a minute old
+        self.shownGenreID = str(movie.genreID)
+        if not self.genres.name(movie.genreID) or time.monotonic() - self.genresCheckedAt > self.GENRES_MAX_AGE:
+            self.loadGenres()
+        self.cbbGenre.set(self.genres.name(movie.genreID))
         self.currentMovieID = int(movie.movieID)        